@@ -0,0 +1,75 @@
+"""
+주소 정규화(canonicalization) 모듈
+
+같은 장소를 다르게 쓴 주소가 지오코딩 캐시(메모리 / SQLite / 쿼리 결과 캐시)에서 같은 키가 되도록
+표기를 결정적으로 한 가지로 맞춘다. 결과 문자열은 그대로 카카오 주소 검색 쿼리로도 쓸 수 있다.
+
+- 유니코드 NFKC (전각 숫자/기호), 여러 종류의 대시 → '-', 연속 공백 축약
+- 첫 단어의 시도 약칭 → 정식 명칭 (서울/서울시 → 서울특별시, 경기 → 경기도, 강원도 → 강원특별자치도 ...)
+  '광주시', '제주시' 는 경기도 광주시 / 제주특별자치도 제주시와 겹치므로 바꾸지 않는다
+- 번지: '번지' 접미사 제거, 본번/부번 앞자리 0 제거, 부번 0 제거 (0123-0000 → 123),
+  산 번지는 '산' 과 숫자를 붙여 쓴다 (산 12 번지 → 산12)
+  숫자와 하이픈만으로 된 토큰만 번지로 보므로 '1가', '2동' 같은 행정구역 이름은 바뀌지 않는다
+"""
+import re
+import unicodedata
+
+# 첫 단어 시도 약칭 → 정식 명칭
+PROVINCE_ALIASES = {
+    '서울': '서울특별시', '서울시': '서울특별시',
+    '부산': '부산광역시', '부산시': '부산광역시',
+    '대구': '대구광역시', '대구시': '대구광역시',
+    '인천': '인천광역시', '인천시': '인천광역시',
+    '광주': '광주광역시',
+    '대전': '대전광역시', '대전시': '대전광역시',
+    '울산': '울산광역시', '울산시': '울산광역시',
+    '세종': '세종특별자치시', '세종시': '세종특별자치시',
+    '경기': '경기도',
+    '강원': '강원특별자치도', '강원도': '강원특별자치도',
+    '충북': '충청북도',
+    '충남': '충청남도',
+    '전북': '전북특별자치도', '전라북도': '전북특별자치도',
+    '전남': '전라남도',
+    '경북': '경상북도',
+    '경남': '경상남도',
+    '제주': '제주특별자치도', '제주도': '제주특별자치도',
+}
+
+_DASHES = re.compile(r'[‐-―−﹘﹣－]')
+_WHITESPACE = re.compile(r'\s+')
+# '산 12', '12 번지' 처럼 번지 구성 요소 사이에 들어간 공백
+_SAN_SPACE = re.compile(r'(^|\s)산\s+(?=\d)')
+_BUNJI_SPACE = re.compile(r'(\d)\s+(번지|번)(?=\s|$)')
+_HYPHEN_SPACE = re.compile(r'(\d)\s*-\s*(?=\d)')
+# 번지 토큰: [산]본번[-부번][번지|번]
+_LOT = re.compile(r'^(산)?(\d+)(?:-(\d+))?(?:번지|번)?$')
+
+
+def _canonical_lot(token: str) -> str:
+    match = _LOT.match(token)
+    if not match:
+        return token
+    san, main, sub = match.groups()
+    lot = f"{san or ''}{int(main)}"
+    if sub is not None and int(sub) != 0:
+        lot += f"-{int(sub)}"
+    return lot
+
+
+def canonicalize_address(address: str) -> str:
+    """주소를 캐시 키 / 지오코딩 쿼리용 정규 표기로 변환 (같은 입력은 항상 같은 결과, 두 번 적용해도 같음)"""
+    text = unicodedata.normalize('NFKC', address or '')
+    text = _DASHES.sub('-', text)
+    text = _WHITESPACE.sub(' ', text).strip()
+    if not text:
+        return ''
+    text = _SAN_SPACE.sub(r'\1산', text)
+    text = _BUNJI_SPACE.sub(r'\1\2', text)
+    text = _HYPHEN_SPACE.sub(r'\1-', text)
+
+    tokens = text.split(' ')
+    tokens[0] = PROVINCE_ALIASES.get(tokens[0], tokens[0])
+    tokens = [_canonical_lot(token) for token in tokens]
+    # 번지 뒤에 따로 떨어진 '번지' 토큰 제거
+    tokens = [token for i, token in enumerate(tokens) if not (token == '번지' and i > 0)]
+    return ' '.join(tokens)
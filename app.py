@@ -1,6 +1,6 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, send_file, session, flash
-from supabase import create_client, Client
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response
+from supabase import create_client
 
 # .env 파일 로드
 try:
@@ -15,23 +15,42 @@ import pandas as pd
 import numpy as np
 from werkzeug.utils import secure_filename
 from datetime import datetime
-import io
 import requests
-from typing import Optional
-import hashlib
+import json
 import time
 import re
 
 # --- Custom Modules ---
-from config import get_config, Config
+from config import get_config
 from data_processing import (
-    normalize_columns,
     process_uploaded_csv,
-    get_stats,
-    clean_for_json,
-    match_with_supabase
+    match_with_supabase,
+    fetch_apt_master_coords,
+    sync_apt_master_snapshot,
+    APT_MASTER_TABLE
+)
+from map_utils import get_latlon_from_address, configure_geocode_store
+from spatial_index import build_and_save_index, extend_and_save_index, get_index
+from facets import get_facets, build_and_save_facets, extend_and_save_facets, FACET_COLUMNS
+from stats_cube import get_cube, build_and_save_cube, CUBE_COLUMNS, DIMENSIONS as CUBE_DIMENSIONS
+from price_index import get_price_trends, build_and_save_repeat_sales, PRICE_INDEX_COLUMNS, LEVELS as PRICE_INDEX_LEVELS
+from cluster_grid import get_cluster_grid, build_and_save_clusters, CLUSTER_COLUMNS
+from query_engine import configure as configure_query_engine, run_query, invalidate_query_results, query_etag
+from result_formatter import format_records
+from export_stream import export_stream
+from upload_store import save_upload, file_hash as compute_file_hash
+from job_queue import configure as configure_jobs, submit_job, get_job, NULL_PROGRESS
+from dataset_cache import configure as configure_dataset_cache, load_dataset, invalidate_dataset, dataset_key
+from dataset_merge import merged_dataset_hash, select_new_rows, known_location_table, merge_datasets
+from dataset_store import (
+    ANALYZED_SUFFIX,
+    analyzed_path_for,
+    legacy_csv_path_for,
+    list_analyzed_files,
+    migrate_csv_cache,
+    read_columns,
+    write_analyzed
 )
-from map_utils import get_latlon_from_address, clear_cache
 
 # --- Application Factory ---
 def create_app(config_name='default'):
@@ -52,6 +71,14 @@ def create_app(config_name='default'):
     # 업로드 디렉토리 생성
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # 분석 데이터셋 메모리 캐시 한도 설정
+    configure_dataset_cache(app.config['DATAFRAME_CACHE_MAX_BYTES'])
+    configure_query_engine(app.config['QUERY_CACHE_SIZE'])
+    # 영구 지오코딩 캐시 (시작 시 만료된 negative 결과 정리)
+    configure_geocode_store(app.config['GEOCODE_CACHE_PATH'], app.config['GEOCODE_NEGATIVE_TTL'])
+    # 업로드 분석 백그라운드 작업 큐 (SQLite 작업 테이블 + 스레드 풀)
+    configure_jobs(app.config['JOB_DB_PATH'], app.config['JOB_WORKERS'], app.config['JOB_RETENTION_SECONDS'])
+    
     # Supabase 클라이언트 초기화
     supabase = create_client(
         app.config['SUPABASE_URL'],
@@ -74,21 +101,79 @@ app = create_app(os.environ.get('FLASK_ENV', 'default'))
 supabase = app.supabase
 
 # --- 신규 아파트 DB 추가 함수 ---
-def insert_new_apartments_to_supabase(df, supabase):
+def insert_new_apartments_to_supabase(df, supabase, chunk_size=None):
+    """
+    좌표가 없는(매칭 안 된) 단지를 apt_master_info 에 일괄 저장.
+    1) 페이로드를 벡터화로 생성 → 2) DB 에 이미 있는 (단지명, 지번주소) 제외
+    → 3) 충돌 키 기준 upsert 를 chunk 단위로 전송.
+    반환: 신규/건너뜀/실패 건수와 chunk 별 지연시간 리포트
+    """
+    chunk_size = chunk_size or app.config['SUPABASE_UPSERT_CHUNK_SIZE']
+    conflict_key = app.config['APT_MASTER_CONFLICT_KEY']
+    report = {'candidates': 0, 'inserted': 0, 'skipped': 0, 'failed': 0, 'chunks': []}
+    
     # 위도/경도 없는(매칭 안 된) 단지만 추출
-    new_apts = df[df['위도'].isna() | df['경도'].isna()].copy()
-    # 시군구+번지 조합 컬럼 생성
-    new_apts['lnno_adres'] = new_apts.apply(lambda row: f"{row.get('시군구', '')} {row.get('번지', '')}", axis=1)
-    # 단지명, 도로명, lnno_adres, 건축년도 기준으로 중복 제거
-    deduped = new_apts.drop_duplicates(subset=['단지명', '도로명', 'lnno_adres', '건축년도'])
-    for _, row in deduped.iterrows():
-        data = {
-            'apt_nm': row.get('단지명', ''),
-            'rdnmadr': row.get('도로명', ''),
-            'use_aprv_yr': row.get('건축년도', ''),
-            'lnno_adres': row.get('lnno_adres', ''),
-        }
-        supabase.table('apt_master_info').insert(data).execute()
+    new_apts = df[df['위도'].isna() | df['경도'].isna()]
+    if new_apts.empty:
+        return report
+    
+    def text_column(col):
+        if col not in new_apts.columns:
+            return pd.Series('', index=new_apts.index)
+        return new_apts[col].fillna('').astype(str).str.strip()
+    
+    build_year = pd.to_numeric(new_apts['건축년도'], errors='coerce') if '건축년도' in new_apts.columns \
+        else pd.Series(np.nan, index=new_apts.index)
+    payload = pd.DataFrame({
+        'apt_nm': text_column('단지명'),
+        'rdnmadr': text_column('도로명'),
+        'use_aprv_yr': build_year.round().astype('Int64'),
+        # 시군구+번지 조합 컬럼 생성
+        'lnno_adres': (text_column('시군구') + ' ' + text_column('번지')).str.strip(),
+    })
+    payload = payload[payload['apt_nm'] != '']
+    # 충돌 키 (단지명, 지번주소) 기준으로 중복 제거
+    payload = payload.drop_duplicates(subset=['apt_nm', 'lnno_adres'])
+    report['candidates'] = len(payload)
+    
+    # DB 에 이미 있는 단지 제외
+    existing = fetch_apt_master_coords(supabase, payload['apt_nm'].unique().tolist())
+    if not existing.empty:
+        existing_keys = pd.MultiIndex.from_arrays([existing['apt_nm'].astype(str),
+                                                   existing['lnno_adres'].fillna('').astype(str)])
+        already = pd.MultiIndex.from_arrays([payload['apt_nm'], payload['lnno_adres']]).isin(existing_keys)
+        report['skipped'] += int(already.sum())
+        payload = payload[~already]
+    
+    records = payload.astype(object).where(payload.notna(), None).to_dict(orient='records')
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        started = time.perf_counter()
+        status = 'upsert'
+        try:
+            try:
+                response = supabase.table(APT_MASTER_TABLE) \
+                    .upsert(chunk, on_conflict=conflict_key, ignore_duplicates=True) \
+                    .execute()
+            except Exception as e:
+                # 충돌 키에 유니크 제약이 없는 DB 는 upsert 가 실패하므로 insert 로 재시도 (기존 행은 위에서 제외됨)
+                print(f"[DB INSERT] upsert 실패, insert 로 재시도: {e}")
+                status = 'insert'
+                response = supabase.table(APT_MASTER_TABLE).insert(chunk).execute()
+            written = len(response.data or [])
+            report['inserted'] += written
+            report['skipped'] += len(chunk) - written
+        except Exception as e:
+            status = 'failed'
+            report['failed'] += len(chunk)
+            print(f"[DB INSERT] chunk 저장 실패 ({len(chunk)}건): {e}")
+        latency_ms = (time.perf_counter() - started) * 1000
+        report['chunks'].append({'rows': len(chunk), 'latency_ms': round(latency_ms, 1), 'status': status})
+        print(f"[DB INSERT] chunk {len(report['chunks'])}: {len(chunk)}건, {latency_ms:.0f}ms ({status})")
+    
+    print(f"[DB INSERT] 신규 {report['inserted']}건, 건너뜀 {report['skipped']}건, 실패 {report['failed']}건 "
+          f"(후보 {report['candidates']}건, chunk {len(report['chunks'])}개)")
+    return report
 
 # ------------------- Routes -------------------
 
@@ -111,21 +196,165 @@ def analysis():
         return redirect(url_for('index'))
     
     try:
-        df = pd.read_csv(temp_path, encoding='utf-8-sig')
-        columns = df.columns.tolist()
-        stats = get_stats(df)
+        columns = read_columns(temp_path)
+        # 통계는 분석 시점에 만든 큐브에서 계산 (행을 다시 읽지 않음)
+        stats = get_cube(temp_path, lambda: load_dataset(temp_path, columns=CUBE_COLUMNS)).overview()
+        facet_counts = get_facets(temp_path, load_dataset(temp_path, columns=FACET_COLUMNS)).counts()
+        price_trend = get_price_trends(temp_path, lambda: load_dataset(temp_path, columns=PRICE_INDEX_COLUMNS)).recent_table()
         
         return render_template('analysis.html', 
                              stats=stats, 
                              columns=columns, 
-                             analyzed_file=temp_filename)
+                             analyzed_file=temp_filename,
+                             facet_counts=facet_counts,
+                             price_trend=price_trend)
     except Exception as e:
         print(f"[Analysis Error] {e}")
         return redirect(url_for('index'))
 
 def get_file_hash(file_path):
-    with open(file_path, 'rb') as f:
-        return hashlib.md5(f.read()).hexdigest()
+    """저장된 파일의 캐시 키 해시 (chunk 단위로 읽어 파일 전체를 메모리에 올리지 않음)"""
+    return compute_file_hash(file_path, app.config['UPLOAD_HASH_ALGORITHM'])
+
+def resolve_analyzed_path(file_hash, merge_base=None):
+    """업로드 파일 해시(병합 시 기존 데이터셋 키와 조합)에 대응하는 분석 캐시 경로. 기존 CSV 캐시는 변환한다."""
+    if merge_base:
+        file_hash = merged_dataset_hash(dataset_key(merge_base), file_hash)
+    analyzed_path = analyzed_path_for(app.config['UPLOAD_FOLDER'], file_hash)
+    legacy_path = legacy_csv_path_for(app.config['UPLOAD_FOLDER'], file_hash)
+    if not os.path.exists(analyzed_path) and os.path.exists(legacy_path):
+        print(f"[UPLOAD] 🔁 기존 CSV 캐시를 Parquet 로 변환: {legacy_path}")
+        migrate_csv_cache(legacy_path)
+    return analyzed_path
+
+# 업로드 분석 단계 (이름, 진행률 가중치) - 로그의 '단계 n/6' 과 같은 순서
+UPLOAD_STAGES = [
+    ('파일 업로드', 5),
+    ('데이터 전처리', 25),
+    ('좌표 조회', 45),
+    ('신규 아파트 DB 저장', 10),
+    ('데이터 분석', 5),
+    ('결과 파일 생성', 10),
+]
+
+UPLOAD_ERROR_MESSAGES = [
+    (FileNotFoundError, '파일을 찾을 수 없습니다.'),
+    (pd.errors.EmptyDataError, '빈 파일이거나 유효한 데이터가 없습니다.'),
+    (pd.errors.ParserError, 'CSV 파일 형식이 올바르지 않습니다.'),
+    (MemoryError, '파일이 너무 커서 처리할 수 없습니다.'),
+]
+
+def upload_error_message(e):
+    """업로드 처리 예외를 사용자에게 보여줄 메시지로 변환"""
+    for error_type, message in UPLOAD_ERROR_MESSAGES:
+        if isinstance(e, error_type):
+            return message
+    return f'파일 처리 중 오류가 발생했습니다: {str(e)}'
+
+def run_upload_pipeline(file_path, merge_base=None, progress=NULL_PROGRESS, supabase_client=None, file_hash=None):
+    """
+    저장된 업로드 파일의 분석 단계 2~6 (전처리 → 좌표 조회 → 신규 단지 저장 → 분석 → 결과 파일 생성).
+    merge_base 가 있으면 해당 분석 데이터셋에 새 거래만 병합한다.
+    file_hash 는 저장하면서 계산한 해시 (없으면 파일을 읽어 계산)
+    progress 에 단계/처리 건수를 기록하며, 반환값은 (분석 파일 경로, DataFrame, 컬럼 목록)
+    """
+    supabase_client = supabase_client or supabase
+
+    # 파일 해시로 분석 결과 캐싱
+    analyzed_path = resolve_analyzed_path(file_hash or get_file_hash(file_path), merge_base)
+    
+    if os.path.exists(analyzed_path):
+        print(f"[UPLOAD] 🎯 캐시 파일 발견: {analyzed_path}")
+        print(f"[UPLOAD] 📊 캐시 파일 크기: {os.path.getsize(analyzed_path):,} bytes")
+        print(f"[UPLOAD] ⚡ 캐시 파일 사용으로 빠른 처리")
+        df = load_dataset(analyzed_path)
+        columns = df.columns.tolist()
+        temp_path = analyzed_path
+    else:
+        print("[UPLOAD] 🔄 단계 2/6: 데이터 전처리 시작...")
+        progress.stage(2)
+        temp_path, columns = process_uploaded_csv(file_path, progress_callback=progress.rows)
+        print(f"[UPLOAD] ✅ 단계 2/6: 데이터 전처리 완료 - 처리된 파일: {temp_path}")
+        df = pd.read_csv(temp_path, encoding='utf-8-sig')
+        print(f"[UPLOAD] 📊 데이터 로드 완료 - 행 수: {len(df)}, 컬럼 수: {len(df.columns)}")
+        print(f"[UPLOAD] 📋 컬럼 목록: {df.columns.tolist()}")
+
+        known_locations = None
+        if merge_base:
+            existing_df = load_dataset(merge_base)
+            df = select_new_rows(existing_df, df)
+            known_locations = known_location_table(existing_df)
+            print(f"[UPLOAD] ➕ 신규 거래 {len(df):,}건 (기존 {len(existing_df):,}건, "
+                  f"좌표 보유 주소 {len(known_locations):,}개)")
+        
+        print("[UPLOAD] 🔄 단계 3/6: Supabase DB 좌표 조회 시작...")
+        progress.stage(3)
+        def log_geocode_progress(done, total):
+            progress.rows(done, total)
+            if done == total or done % max(1, total // 10) == 0:
+                print(f"[UPLOAD] 📍 주소 지오코딩 진행: {done}/{total}")
+        if df.empty:
+            df = df.assign(위도=np.nan, 경도=np.nan)
+        else:
+            df = match_with_supabase(df, supabase_client, progress_callback=log_geocode_progress,
+                                     known_locations=known_locations)
+        print("[UPLOAD] ✅ 단계 3/6: Supabase DB 좌표 조회 완료")
+        
+        # 신규 아파트 정보 DB 저장
+        print("[UPLOAD] 🔄 단계 4/6: 신규 아파트 정보 DB 저장 시작...")
+        progress.stage(4)
+        try:
+            insert_report = insert_new_apartments_to_supabase(df, supabase_client)
+            print(f"[UPLOAD] ✅ 단계 4/6: 신규 아파트 정보 DB 저장 완료 - 신규 {insert_report['inserted']}건, "
+                  f"건너뜀 {insert_report['skipped']}건, 실패 {insert_report['failed']}건")
+        except Exception as e:
+            print(f"[UPLOAD] ❌ 단계 4/6: 신규 아파트 정보 DB 저장 실패: {e}")
+        
+        # 좌표 변환 및 DB 저장 완료
+        print("[UPLOAD] 🔄 단계 5/6: 데이터 분석 시작...")
+        progress.stage(5)
+        coord_count = df[['위도', '경도']].dropna().shape[0]
+        print(f"[UPLOAD] 📍 좌표 보유 데이터: {coord_count}건 / 전체 {len(df)}건")
+        print("[UPLOAD] ✅ 단계 5/6: 데이터 분석 완료")
+        
+        # 분석 결과를 캐시 파일로 저장
+        print("[UPLOAD] 🔄 단계 6/6: 결과 파일 생성 시작...")
+        progress.stage(6)
+        new_rows = df
+        if merge_base:
+            df = merge_datasets(existing_df, new_rows)
+        write_analyzed(df, analyzed_path)
+        invalidate_dataset(analyzed_path)
+        invalidate_query_results(analyzed_path)
+        temp_path = analyzed_path
+        print(f"[UPLOAD] 💾 결과 파일 저장: {analyzed_path}")
+        cell_deg = app.config['SPATIAL_INDEX_CELL_DEG']
+        if merge_base:
+            # 기존 데이터셋의 인덱스에 새 행만 추가
+            extend_and_save_index(analyzed_path, get_index(merge_base, existing_df, cell_deg=cell_deg),
+                                  new_rows, df, cell_deg=cell_deg)
+            extend_and_save_facets(analyzed_path, get_facets(merge_base, existing_df), new_rows, df)
+        else:
+            build_and_save_index(analyzed_path, df, cell_deg=cell_deg)
+            build_and_save_facets(analyzed_path, df)
+        build_and_save_cube(analyzed_path, df)
+        build_and_save_clusters(analyzed_path, df)
+        build_and_save_repeat_sales(analyzed_path, df)
+        print("[UPLOAD] ✅ 단계 6/6: 결과 파일 생성 완료")
+    return temp_path, df, columns
+
+def run_upload_job(progress, file_path, merge_base=None, file_hash=None):
+    """백그라운드 작업 스레드에서 실행되는 업로드 분석 (job_queue 작업 함수)"""
+    # 요청 처리 스레드와 HTTP 연결을 공유하지 않도록 작업마다 클라이언트를 새로 만든다
+    client = create_client(app.config['SUPABASE_URL'], app.config['SUPABASE_KEY'])
+    try:
+        temp_path, df, _ = run_upload_pipeline(file_path, merge_base, progress=progress, supabase_client=client,
+                                               file_hash=file_hash)
+    except Exception as e:
+        print(f"[Upload Error] {e}")
+        raise RuntimeError(upload_error_message(e)) from e
+    print(f"[UPLOAD] 🎉 === 백그라운드 데이터 분석 완료 === 총 {len(df)}건 처리")
+    return {'datafile': os.path.basename(temp_path), 'filename': os.path.basename(file_path), 'rows': len(df)}
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -165,84 +394,80 @@ def upload_file():
         # 전용면적 구간 선택값 받기
         area_range = request.form.get('area_range', 'all')
         session['area_range'] = area_range
+
+        # 증분 병합: 현재 세션의 분석 데이터셋에 새 거래만 추가
+        merge_base = None
+        if request.form.get('merge') and session.get('datafile'):
+            candidate = os.path.join(app.config['UPLOAD_FOLDER'], os.path.basename(session['datafile']))
+            if os.path.exists(candidate):
+                merge_base = candidate
+                print(f"[UPLOAD] ➕ 증분 병합 모드: 기존 데이터셋 {os.path.basename(candidate)}")
         
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        # 요청 스트림을 저장하면서 해시 계산 (저장 후 다시 읽지 않음).
+        # 저장 이름은 {해시}_{파일명} 이라 같은 이름의 동시 업로드가 작업이 읽는 파일을 덮어쓰지 않는다
+        file_path, file_hash, file_size = save_upload(file.stream, app.config['UPLOAD_FOLDER'], filename,
+                                                      app.config['UPLOAD_HASH_ALGORITHM'])
         print(f"[UPLOAD] 💾 파일 저장: {file_path}")
-        print(f"[UPLOAD] 📏 파일 크기: {os.path.getsize(file_path):,} bytes")
+        print(f"[UPLOAD] 📏 파일 크기: {file_size:,} bytes, 해시({app.config['UPLOAD_HASH_ALGORITHM']}): {file_hash}")
         print(f"[UPLOAD] ✅ 단계 1/6: 파일 업로드 완료")
 
-        # 파일 해시로 분석 결과 캐싱
-        file_hash = get_file_hash(file_path)
-        analyzed_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{file_hash}_분석완료.csv')
-        
-        if os.path.exists(analyzed_path):
+        # 파싱 전에 분석 캐시 확인: 이미 분석된 파일이면 작업 없이 바로 결과 사용
+        analyzed_path = resolve_analyzed_path(file_hash, merge_base)
+        if request.form.get('async') and os.path.exists(analyzed_path):
             print(f"[UPLOAD] 🎯 캐시 파일 발견: {analyzed_path}")
-            print(f"[UPLOAD] 📊 캐시 파일 크기: {os.path.getsize(analyzed_path):,} bytes")
-            print(f"[UPLOAD] ⚡ 캐시 파일 사용으로 빠른 처리")
-            df = pd.read_csv(analyzed_path, encoding='utf-8-sig')
-            columns = df.columns.tolist()
-            temp_path = analyzed_path
-        else:
-            print("[UPLOAD] 🔄 단계 2/6: 데이터 전처리 시작...")
-            temp_path, columns = process_uploaded_csv(file_path)
-            print(f"[UPLOAD] ✅ 단계 2/6: 데이터 전처리 완료 - 처리된 파일: {temp_path}")
-            df = pd.read_csv(temp_path, encoding='utf-8-sig')
-            print(f"[UPLOAD] 📊 데이터 로드 완료 - 행 수: {len(df)}, 컬럼 수: {len(df.columns)}")
-            print(f"[UPLOAD] 📋 컬럼 목록: {df.columns.tolist()}")
-            
-            print("[UPLOAD] 🔄 단계 3/6: Supabase DB 좌표 조회 시작...")
-            df = match_with_supabase(df, supabase)  # 재활성화
-            print("[UPLOAD] ✅ 단계 3/6: Supabase DB 좌표 조회 완료")
-            
-            # 신규 아파트 정보 DB 저장
-            print("[UPLOAD] 🔄 단계 4/6: 신규 아파트 정보 DB 저장 시작...")
-            try:
-                insert_new_apartments_to_supabase(df, supabase)
-                print("[UPLOAD] ✅ 단계 4/6: 신규 아파트 정보 DB 저장 완료")
-            except Exception as e:
-                print(f"[UPLOAD] ❌ 단계 4/6: 신규 아파트 정보 DB 저장 실패: {e}")
-            
-            # 좌표 변환 및 DB 저장 완료
-            print("[UPLOAD] 🔄 단계 5/6: 데이터 분석 시작...")
-            coord_count = df[['위도', '경도']].dropna().shape[0]
-            print(f"[UPLOAD] 📍 좌표 보유 데이터: {coord_count}건 / 전체 {len(df)}건")
-            print("[UPLOAD] ✅ 단계 5/6: 데이터 분석 완료")
-            
-            # 분석 결과를 캐시 파일로 저장
-            print("[UPLOAD] 🔄 단계 6/6: 결과 파일 생성 시작...")
-            df.to_csv(analyzed_path, index=False, encoding='utf-8-sig')
-            temp_path = analyzed_path
-            print(f"[UPLOAD] 💾 결과 파일 저장: {analyzed_path}")
-            print("[UPLOAD] ✅ 단계 6/6: 결과 파일 생성 완료")
-            
+            session['datafile'] = os.path.basename(analyzed_path)
+            return jsonify({'job_id': None, 'cached': True, 'result_url': url_for('analysis')})
+
+        if request.form.get('async'):
+            # 백그라운드 작업으로 실행하고 job id 를 바로 반환 (진행 상황은 /jobs/<job_id> 로 조회)
+            job_id = submit_job(run_upload_job, file_path, merge_base, file_hash,
+                                kind='upload', stages=UPLOAD_STAGES)
+            return jsonify({
+                'job_id': job_id,
+                'status_url': url_for('job_status', job_id=job_id),
+                'result_url': url_for('job_result', job_id=job_id),
+            }), 202
+
+        temp_path, df, columns = run_upload_pipeline(file_path, merge_base, file_hash=file_hash)
+        
         session['datafile'] = os.path.basename(temp_path)
         print(f"[UPLOAD] 🎉 === 데이터 분석 완료 === 총 {len(df) if 'df' in locals() else 0}건 처리")
         print(f"[UPLOAD] Processed file saved to session: {session['datafile']}")
-        stats = get_stats(df)
+        stats = get_cube(temp_path, lambda: df).overview()
+        facet_counts = get_facets(temp_path, df).counts()
+        price_trend = get_price_trends(temp_path, lambda: df).recent_table()
         print("[UPLOAD] Stats generated. Rendering analysis.html...")
-        return render_template('analysis.html', stats=stats, columns=columns, analyzed_file=filename)
-    except FileNotFoundError as e:
-        print(f"[Upload Error - File Not Found] {e}")
-        flash('파일을 찾을 수 없습니다.', 'error')
-        return redirect(url_for('index'))
-    except pd.errors.EmptyDataError as e:
-        print(f"[Upload Error - Empty Data] {e}")
-        flash('빈 파일이거나 유효한 데이터가 없습니다.', 'error')
-        return redirect(url_for('index'))
-    except pd.errors.ParserError as e:
-        print(f"[Upload Error - Parser Error] {e}")
-        flash('CSV 파일 형식이 올바르지 않습니다.', 'error')
+        return render_template('analysis.html', stats=stats, columns=columns, analyzed_file=filename,
+                               facet_counts=facet_counts, price_trend=price_trend)
+    except Exception as e:
+        print(f"[Upload Error] {type(e).__name__}: {e}")
+        flash(upload_error_message(e), 'error')
         return redirect(url_for('index'))
-    except MemoryError as e:
-        print(f"[Upload Error - Memory Error] {e}")
-        flash('파일이 너무 커서 처리할 수 없습니다.', 'error')
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """백그라운드 작업 진행 상황 (현재 단계, 처리 건수, 진행률, 남은 시간 추정)"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """완료된 업로드 작업의 결과 데이터셋을 세션에 연결하고 분석 페이지로 이동"""
+    job = get_job(job_id)
+    if job is None or job['kind'] != 'upload':
+        flash('작업을 찾을 수 없습니다.', 'error')
         return redirect(url_for('index'))
-    except Exception as e:
-        print(f"[Upload Error] {e}")
-        flash(f'파일 처리 중 오류가 발생했습니다: {str(e)}', 'error')
+    if job['status'] == 'failed':
+        flash(job['error'] or '파일 처리 중 오류가 발생했습니다.', 'error')
         return redirect(url_for('index'))
+    if job['status'] != 'done':
+        return jsonify(job), 409
+    session['datafile'] = job['result']['datafile']
+    print(f"[UPLOAD] 작업 {job_id} 결과 연결: {session['datafile']}")
+    return redirect(url_for('analysis'))
 
 @app.route('/filter', methods=['POST'])
 def filter_data():
@@ -296,8 +521,7 @@ def show_filtered_results():
         print(f"[INFO] 자동으로 가장 최근 분석 파일 사용 시도")
         
         # 가장 최근 분석 파일 찾기
-        import glob
-        analysis_files = glob.glob('uploads/*_분석완료.csv')
+        analysis_files = list_analyzed_files(app.config['UPLOAD_FOLDER'])
         if analysis_files:
             latest_file = max(analysis_files, key=os.path.getmtime)
             session['datafile'] = os.path.basename(latest_file)
@@ -312,82 +536,29 @@ def show_filtered_results():
         temp_filename = session['datafile']
         # 항상 uploads 폴더에서만 찾도록 경로 고정
         temp_path = os.path.join(app.config['UPLOAD_FOLDER'], os.path.basename(temp_filename))
-        df = pd.read_csv(temp_path, encoding='utf-8-sig')
+        df = load_dataset(temp_path)
         columns = df.columns.tolist()
 
-        print(f"[DEBUG] 주소 좌표 변환 요청: '{address}'")
-        center_lat, center_lon = get_latlon_from_address(address)
-        print(f"[DEBUG] 좌표 변환 결과: lat={center_lat}, lon={center_lon}")
+        # 주소 좌표 변환 → 구간 필터 → 반경 필터 (같은 조건의 결과는 쿼리 엔진 캐시 재사용)
+        print(f"[DEBUG] 필터 쿼리 요청: '{address}'")
+        result = run_query(temp_path, df, filter_params, geocode=get_latlon_from_address,
+                           method=app.config['DISTANCE_METHOD'],
+                           cell_deg=app.config['SPATIAL_INDEX_CELL_DEG'])
         
-        if center_lat is None or center_lon is None:
+        if result is None:
             print(f"[ERROR] 좌표 변환 실패 - 주소: '{address}'")
             return render_template('map.html', error='입력하신 주소로 좌표를 찾을 수 없습니다. 주소를 더 정확히 입력해 주세요.', data=[], columns=columns, center_lat=None, center_lon=None, radius=radius_m)
+        center_lat, center_lon = result.center_lat, result.center_lon
+        print(f"[DEBUG] 좌표 변환 결과: lat={center_lat}, lon={center_lon}")
 
-        # 번지 컬럼 정규화: 숫자+하이픈만 남기고 문자열로 변환
-        if '번지' in df.columns:
-            df['번지'] = df['번지'].astype(str).str.replace(r'[^0-9\-]', '', regex=True)
-
-        # --- 전용면적 구간 필터링 ---
-        area_col = None
-        for col in ['전용면적(㎡)', '전용면적(\u33A1)']:
-            if col in df.columns:
-                area_col = col
-                break
-        if area_col:
-            if area_range == 'le60':
-                df = df[df[area_col] <= 60]
-            elif area_range == 'gt60le85':
-                df = df[(df[area_col] > 60) & (df[area_col] <= 85)]
-            elif area_range == 'gt85le102':
-                df = df[(df[area_col] > 85) & (df[area_col] <= 102)]
-            elif area_range == 'gt102le135':
-                df = df[(df[area_col] > 102) & (df[area_col] <= 135)]
-            elif area_range == 'gt135':
-                df = df[df[area_col] > 135]
-            # 'all'은 필터링 없음
-
-        # --- 건축년도 필터링 ---
-        build_year = filter_params.get('build_year', 'all')
-        if build_year != 'all' and '건축년도' in df.columns:
-            current_year = datetime.now().year
-            df['건축년도'] = pd.to_numeric(df['건축년도'], errors='coerce')
-            df = df.dropna(subset=['건축년도'])
-            
-            if build_year == 'recent5':
-                df = df[df['건축년도'] >= (current_year - 5)]
-            elif build_year == 'recent10':
-                df = df[df['건축년도'] >= (current_year - 10)]
-            elif build_year == 'recent15':
-                df = df[df['건축년도'] >= (current_year - 15)]
-            elif build_year == 'over15':
-                df = df[df['건축년도'] < (current_year - 15)]
-
-        # Filter by distance
-        df['위도'] = pd.to_numeric(df['위도'], errors='coerce')
-        df['경도'] = pd.to_numeric(df['경도'], errors='coerce')
-        df = df.dropna(subset=['위도', '경도'])
-        
-        from geopy.distance import geodesic
-        if not df.empty:
-            df['중심점과의거리'] = df.apply(lambda row: geodesic((center_lat, center_lon), (row['위도'], row['경도'])).meters / 1000, axis=1)  # km 단위
-        else:
-            df['중심점과의거리'] = np.nan
-            
-        filtered_df = df[df['중심점과의거리'] <= radius_km].copy()
-
-        # --- 정렬 기능 추가 ---
-        if sort_col and sort_col in filtered_df.columns:
-            # 숫자/문자 구분 없이 정렬
-            filtered_df = filtered_df.sort_values(by=sort_col, ascending=(sort_order=='asc'), na_position='last')
+        # --- 정렬 (결과 집합별로 정렬 순서 캐시) ---
+        order = result.order(df, sort_col, sort_order, distance_col='중심점과의거리')
 
         # 평균 거래금액 계산 (안전하게)
-        avg_price = 0
-        if not filtered_df.empty and '거래금액' in filtered_df.columns:
-            price_series = pd.to_numeric(filtered_df['거래금액'], errors='coerce')
-            avg_price = price_series.mean() if not price_series.isna().all() else 0
+        avg_price = result.avg_price(df)
         
         # --- 페이지네이션 적용 ---
-        total_count = len(filtered_df)
+        total_count = len(result)
         total_pages = (total_count + per_page - 1) // per_page  # 올림 계산
         
         # 페이지 범위 검증
@@ -399,63 +570,14 @@ def show_filtered_results():
         # 현재 페이지 데이터 추출
         start_idx = (page - 1) * per_page
         end_idx = start_idx + per_page
-        paginated_df = filtered_df.iloc[start_idx:end_idx]
+        paginated_df = result.frame(df, order[start_idx:end_idx], distance_col='중심점과의거리')
+
+        # 번지 컬럼 정규화: 숫자+하이픈만 남기고 문자열로 변환
+        if '번지' in paginated_df.columns:
+            paginated_df['번지'] = paginated_df['번지'].astype(str).str.replace(r'[^0-9\-]', '', regex=True)
         
-        data_records = paginated_df.to_dict(orient='records')  # type: ignore
-        # --- 숫자 포맷팅: 번지, 거래금액 제외 모든 숫자에 쉼표 추가 ---
-        def format_number(val):
-            try:
-                if val is None or val == '' or (isinstance(val, float) and pd.isna(val)):
-                    return ''
-                if isinstance(val, (int, float)):
-                    return '{:,}'.format(int(val))
-                if isinstance(val, str) and val.replace(',', '').replace('.', '', 1).isdigit():
-                    return '{:,}'.format(int(float(val)))
-                return val
-            except Exception:
-                return val
-        for row in data_records:
-            for col in columns:
-                # 금액, 보증금, 월세 등 '금액'이 포함된 모든 숫자 컬럼에 쉼표 추가
-                if ('금액' in col or '보증금' in col or '월세' in col) and col in row and (isinstance(row[col], (int, float)) or (isinstance(row[col], str) and str(row[col]).replace(',', '').replace('.', '', 1).isdigit())):
-                    row[col] = format_number(row[col])
-                elif col == '계약년월' and col in row and row[col] is not None and row[col] != '':
-                    try:
-                        # 계약년월은 정수로 변환 (소수점 제거)
-                        row[col] = str(int(float(row[col])))
-                    except Exception:
-                        pass
-                elif (col == '전용면적(㎡)' or col == '전용면적(㎡)') and col in row and row[col] is not None and row[col] != '':
-                    try:
-                        row[col] = f"{float(row[col]):.2f}"
-                    except Exception:
-                        pass
-                elif col == '전용평' and col in row and row[col] is not None and row[col] != '':
-                    try:
-                        row[col] = f"{float(row[col]):.2f}"
-                    except Exception:
-                        pass
-                elif col == '층' and col in row and row[col] is not None and row[col] != '':
-                    try:
-                        row[col] = str(int(float(row[col])))  # 정수로 변환
-                    except Exception:
-                        pass
-                elif col == '건축년도' and col in row and row[col] is not None and row[col] != '':
-                    try:
-                        row[col] = str(int(float(row[col])))  # 정수로 변환
-                    except Exception:
-                        pass
-                elif col == '전용평당' and col in row and row[col] is not None and row[col] != '':
-                    try:
-                        row[col] = f"{float(row[col]):,.2f}"  # 쉼표와 소수점 둘째자리
-                    except Exception:
-                        pass
-                elif col == '공급평당' and col in row and row[col] is not None and row[col] != '':
-                    try:
-                        row[col] = f"{float(row[col]):,.2f}"  # 쉼표와 소수점 둘째자리
-                    except Exception:
-                        pass
-        data_records = clean_for_json(data_records)
+        # --- 표시용 포맷: 컬럼 단위 벡터화 (금액 쉼표, 면적/평당가 소수점 둘째 자리, 연월/층/건축년도 정수) ---
+        data_records = format_records(paginated_df, columns)
         
         # 페이지네이션 정보 계산
         pagination_info = {
@@ -521,6 +643,38 @@ def show_filtered_results():
         }
         return render_template('results.html', **error_data)
 
+def _aggregate_params():
+    """bins / complex_limit 쿼리 파라미터 검증 (오류 시 ValueError)"""
+    bins = int(request.args.get('bins', app.config['RESULT_HISTOGRAM_BINS']))
+    complex_limit = int(request.args.get('complex_limit', app.config['RESULT_COMPLEX_LIMIT']))
+    if not 1 <= bins <= app.config['RESULT_HISTOGRAM_MAX_BINS']:
+        raise ValueError(f"bins 는 1~{app.config['RESULT_HISTOGRAM_MAX_BINS']} 이어야 합니다.")
+    if not 1 <= complex_limit <= app.config['RESULT_COMPLEX_LIMIT']:
+        raise ValueError(f"complex_limit 는 1~{app.config['RESULT_COMPLEX_LIMIT']} 이어야 합니다.")
+    return bins, complex_limit
+
+@app.route('/results/aggregates', methods=['GET'])
+def results_aggregates():
+    """현재 세션 필터 결과 전체의 집계 (결과 페이지 지도/분포 표시용 JSON)"""
+    filter_params = session.get('filter_params')
+    if not filter_params or 'datafile' not in session:
+        return jsonify({'error': '필터 조건이 설정되지 않았습니다.'}), 400
+    try:
+        bins, complex_limit = _aggregate_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    temp_path = os.path.join(app.config['UPLOAD_FOLDER'], os.path.basename(session['datafile']))
+    if not os.path.exists(temp_path):
+        return jsonify({'error': '분석 데이터 파일을 찾을 수 없습니다.'}), 404
+    df = load_dataset(temp_path)
+    result = run_query(temp_path, df, filter_params, geocode=get_latlon_from_address,
+                       method=app.config['DISTANCE_METHOD'],
+                       cell_deg=app.config['SPATIAL_INDEX_CELL_DEG'])
+    if result is None:
+        return jsonify({'error': '입력하신 주소로 좌표를 찾을 수 없습니다.'}), 422
+    return jsonify(result.aggregates(df, bins, complex_limit))
+
 @app.route('/download', methods=['GET'])
 def download_csv():
     if 'datafile' not in session or 'filter_params' not in session:
@@ -535,79 +689,36 @@ def download_csv():
         return redirect(url_for('index'))
 
     try:
-        df = pd.read_csv(temp_path, encoding='utf-8-sig')
+        df = load_dataset(temp_path)
         
         # 세션에서 모든 필터 파라미터 가져오기
         filter_params = session.get('filter_params', {})
         address = filter_params.get('address')
-        radius_km = filter_params.get('radius', 10.0)
-        area_range = filter_params.get('area_range', 'all')
-        build_year = filter_params.get('build_year', 'all')
 
         if not address:
             flash('다운로드를 위해 주소를 먼저 설정해야 합니다.', 'error')
             return redirect(request.referrer or url_for('index'))
 
-        # --- show_filtered_results와 동일한 필터링 로직 적용 ---
-        
-        # 1. 주소 -> 좌표 변환
-        center_lat, center_lon = get_latlon_from_address(address)
-        if center_lat is None or center_lon is None:
+        # --- show_filtered_results와 같은 쿼리 엔진 결과 재사용 ---
+        result = run_query(temp_path, df, filter_params, geocode=get_latlon_from_address,
+                           method=app.config['DISTANCE_METHOD'],
+                           cell_deg=app.config['SPATIAL_INDEX_CELL_DEG'])
+        if result is None:
             flash('주소의 좌표를 찾을 수 없어 다운로드할 수 없습니다.', 'error')
             return redirect(request.referrer or url_for('index'))
 
-        # 2. 전용면적 필터링
-        area_col = next((col for col in ['전용면적(㎡)', '전용면적(\u33A1)'] if col in df.columns), None)
-        if area_col:
-            df[area_col] = pd.to_numeric(df[area_col], errors='coerce')
-            if area_range == 'le60':
-                df = df[df[area_col] <= 60]
-            elif area_range == 'gt60le85':
-                df = df[(df[area_col] > 60) & (df[area_col] <= 85)]
-            elif area_range == 'gt85le102':
-                df = df[(df[area_col] > 85) & (df[area_col] <= 102)]
-            elif area_range == 'gt102le135':
-                df = df[(df[area_col] > 102) & (df[area_col] <= 135)]
-            elif area_range == 'gt135':
-                df = df[df[area_col] > 135]
-
-        # 3. 건축년도 필터링
-        if build_year != 'all' and '건축년도' in df.columns:
-            current_year = datetime.now().year
-            df['건축년도'] = pd.to_numeric(df['건축년도'], errors='coerce')
-            df = df.dropna(subset=['건축년도'])
-            
-            if build_year == 'recent5':
-                df = df[df['건축년도'] >= (current_year - 5)]
-            elif build_year == 'recent10':
-                df = df[df['건축년도'] >= (current_year - 10)]
-            elif build_year == 'recent15':
-                df = df[df['건축년도'] >= (current_year - 15)]
-            elif build_year == 'over15':
-                df = df[df['건축년도'] < (current_year - 15)]
-        
-        # 4. 거리 필터링
-        df['위도'] = pd.to_numeric(df['위도'], errors='coerce')
-        df['경도'] = pd.to_numeric(df['경도'], errors='coerce')
-        df = df.dropna(subset=['위도', '경도'])
-        
-        from geopy.distance import geodesic
-        if not df.empty:
-            df['중심점과의거리(km)'] = df.apply(
-                lambda row: geodesic((center_lat, center_lon), (row['위도'], row['경도'])).kilometers,
-                axis=1
-            )
-            df = df[df['중심점과의거리(km)'] <= radius_km].copy()
-        else:
-            df['중심점과의거리(km)'] = np.nan
+        # 다운로드 파일을 메모리에 만들지 않고 chunk 단위로 직렬화하며 전송
+        # format=csv(기본)|parquet, gzip=1 이면 csv 를 gzip 으로 압축
+        export_format = request.args.get('format', 'csv').lower()
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+        chunks, extension, mimetype = export_stream(result, df, fmt=export_format, compress=compress,
+                                                    distance_col='중심점과의거리(km)',
+                                                    chunk_rows=app.config['DOWNLOAD_CHUNK_ROWS'])
 
-        # 다운로드 파일 생성
-        output = io.BytesIO()
-        df.to_csv(output, index=False, encoding='utf-8-sig')
-        output.seek(0)
-        
-        download_name = f'filtered_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        return send_file(output, as_attachment=True, download_name=download_name, mimetype='text/csv')
+        download_name = f'filtered_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+        print(f"[Download] {download_name} 스트리밍 시작 ({len(result):,}건)")
+        return Response(chunks, mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={download_name}'})
 
     except Exception as e:
         print(f"[Download Error] {e}")
@@ -681,6 +792,297 @@ def fill_latlon():
             f.write(line + '\n')
     return '<br>'.join(log_lines) + f'<br><br>로그 파일: {log_path}'
 
+@app.route('/sync_apt_master', methods=['GET'])
+def sync_apt_master():
+    """apt_master_info 좌표를 로컬 스냅샷으로 동기화 (업로드 시 단지 좌표 조회에 사용)"""
+    try:
+        path, count = sync_apt_master_snapshot(supabase)
+        return f'apt_master_info 스냅샷 동기화 완료: {count}건<br>파일: {path}'
+    except Exception as e:
+        print(f"[Sync Error] {e}")
+        return f'apt_master_info 스냅샷 동기화 실패: {e}', 500
+
+# --- JSON API (세션 없이 쿼리 파라미터만으로 조회) ---
+API_AREA_RANGES = ('all', 'le60', 'gt60le85', 'gt85le102', 'gt102le135', 'gt135')
+API_BUILD_YEARS = ('all', 'recent5', 'recent10', 'recent15', 'over15')
+
+def _api_error(message, status=400):
+    return jsonify({'error': message}), status
+
+def _api_dataset_path():
+    """dataset 파라미터(분석 파일명)의 경로. 없으면 가장 최근 분석 파일"""
+    name = request.args.get('dataset')
+    if name:
+        name = os.path.basename(name)
+        path = os.path.join(app.config['UPLOAD_FOLDER'], name)
+        if ANALYZED_SUFFIX not in name or not os.path.exists(path):
+            return None
+        return path
+    analysis_files = list_analyzed_files(app.config['UPLOAD_FOLDER'])
+    return max(analysis_files, key=os.path.getmtime) if analysis_files else None
+
+def _api_filter_params():
+    """filter_data 와 같은 이름의 쿼리 파라미터를 검증해 filter_params 형태로 반환 (오류 시 ValueError)"""
+    args = request.args
+    params = {
+        'address': (args.get('address') or '').strip(),
+        'lat': args.get('lat'),
+        'lon': args.get('lon'),
+        'radius': float(args.get('radius', 10)),
+        'area_range': args.get('area_range', 'all'),
+        'build_year': args.get('build_year', 'all'),
+        'sort_col': args.get('sort_col') or None,
+        'sort_order': args.get('sort_order', 'desc'),
+    }
+    if params['lat'] not in (None, '') and params['lon'] not in (None, ''):
+        lat, lon = float(params['lat']), float(params['lon'])
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError('lat/lon 범위가 올바르지 않습니다.')
+    elif not params['address']:
+        raise ValueError('address 또는 lat/lon 파라미터가 필요합니다.')
+    if not 0 < params['radius'] <= app.config['API_MAX_RADIUS_KM']:
+        raise ValueError(f"radius 는 0 초과 {app.config['API_MAX_RADIUS_KM']}km 이하여야 합니다.")
+    if params['area_range'] not in API_AREA_RANGES:
+        raise ValueError(f"area_range 는 {', '.join(API_AREA_RANGES)} 중 하나여야 합니다.")
+    if params['build_year'] not in API_BUILD_YEARS:
+        raise ValueError(f"build_year 는 {', '.join(API_BUILD_YEARS)} 중 하나여야 합니다.")
+    if params['sort_order'] not in ('asc', 'desc'):
+        raise ValueError('sort_order 는 asc 또는 desc 여야 합니다.')
+    return params
+
+def _api_rows_json(frame, lines=False):
+    """결과 행을 JSON 으로 변환. float32 컬럼은 84.9300003 대신 84.93 처럼 최단 표현으로 내보낸다"""
+    frame = frame.copy()
+    for col in frame.columns[frame.dtypes == 'float32']:
+        frame[col] = frame[col].to_numpy().astype(str).astype('float64')
+    return frame.to_json(orient='records', lines=lines, force_ascii=False)
+
+@app.route('/api/results', methods=['GET'])
+def api_results():
+    """
+    필터 결과 JSON API. /filter 와 같은 파라미터(address 또는 lat/lon, radius, area_range, build_year,
+    sort_col, sort_order)에 page/per_page 를 받는다.
+    format=ndjson 이면 한 줄에 한 행씩 스트리밍한다 (page 를 주지 않으면 전체 결과).
+    """
+    try:
+        filter_params = _api_filter_params()
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 20))
+    except ValueError as e:
+        return _api_error(str(e))
+    streaming = request.args.get('format') == 'ndjson'
+    if page < 1 or not 1 <= per_page <= app.config['API_MAX_PER_PAGE']:
+        return _api_error(f"page 는 1 이상, per_page 는 1~{app.config['API_MAX_PER_PAGE']} 이어야 합니다.")
+    paged = not streaming or 'page' in request.args
+
+    dataset_path = _api_dataset_path()
+    if dataset_path is None:
+        return _api_error('분석 데이터 파일을 찾을 수 없습니다.', 404)
+
+    # 데이터셋 버전 + 조건으로 ETag 를 먼저 계산해 변경이 없으면 쿼리 없이 304 응답
+    etag = query_etag(dataset_path, filter_params, filter_params['sort_col'], filter_params['sort_order'],
+                      page if paged else None, per_page if paged else None, 'ndjson' if streaming else 'json',
+                      method=app.config['DISTANCE_METHOD'], cell_deg=app.config['SPATIAL_INDEX_CELL_DEG'])
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    df = load_dataset(dataset_path)
+    result = run_query(dataset_path, df, filter_params, geocode=get_latlon_from_address,
+                       method=app.config['DISTANCE_METHOD'],
+                       cell_deg=app.config['SPATIAL_INDEX_CELL_DEG'])
+    if result is None:
+        return _api_error('입력하신 주소로 좌표를 찾을 수 없습니다.', 422)
+
+    order = result.order(df, filter_params['sort_col'], filter_params['sort_order'], distance_col='중심점과의거리')
+    total_count = len(result)
+    if paged:
+        order = order[(page - 1) * per_page:page * per_page]
+
+    if streaming:
+        chunk_rows = app.config['API_STREAM_CHUNK_ROWS']
+
+        def generate():
+            for start in range(0, len(order), chunk_rows):
+                frame = result.frame(df, order[start:start + chunk_rows], distance_col='중심점과의거리')
+                text = _api_rows_json(frame, lines=True)
+                yield text if text.endswith('\n') else text + '\n'
+
+        response = Response(generate(), mimetype='application/x-ndjson')
+        response.headers['X-Total-Count'] = str(total_count)
+        response.headers['X-Center'] = f'{result.center_lat},{result.center_lon}'
+        response.set_etag(etag)
+        return response
+
+    frame = result.frame(df, order, distance_col='중심점과의거리')
+    response = jsonify({
+        'dataset': os.path.basename(dataset_path),
+        'center': {'lat': result.center_lat, 'lon': result.center_lon},
+        'filters': {key: filter_params[key] for key in ('radius', 'area_range', 'build_year', 'sort_col', 'sort_order')},
+        'count': total_count,
+        'avg_price': result.avg_price(df),
+        'page': page,
+        'per_page': per_page,
+        'total_pages': (total_count + per_page - 1) // per_page,
+        'columns': frame.columns.tolist(),
+        'rows': json.loads(_api_rows_json(frame)),
+    })
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/aggregates', methods=['GET'])
+def api_aggregates():
+    """
+    /api/results 와 같은 필터 조건의 결과 전체 집계.
+    전용평당 히스토그램(bins 구간), 단지별 요약(건수 상위 complex_limit 개), 거래금액/전용평당 백분위수 구간.
+    """
+    try:
+        filter_params = _api_filter_params()
+        bins, complex_limit = _aggregate_params()
+    except ValueError as e:
+        return _api_error(str(e))
+
+    dataset_path = _api_dataset_path()
+    if dataset_path is None:
+        return _api_error('분석 데이터 파일을 찾을 수 없습니다.', 404)
+
+    etag = query_etag(dataset_path, filter_params, 'aggregates', bins, complex_limit,
+                      method=app.config['DISTANCE_METHOD'], cell_deg=app.config['SPATIAL_INDEX_CELL_DEG'])
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    df = load_dataset(dataset_path)
+    result = run_query(dataset_path, df, filter_params, geocode=get_latlon_from_address,
+                       method=app.config['DISTANCE_METHOD'],
+                       cell_deg=app.config['SPATIAL_INDEX_CELL_DEG'])
+    if result is None:
+        return _api_error('입력하신 주소로 좌표를 찾을 수 없습니다.', 422)
+
+    response = jsonify({
+        'dataset': os.path.basename(dataset_path),
+        'center': {'lat': result.center_lat, 'lon': result.center_lon},
+        'filters': {key: filter_params[key] for key in ('radius', 'area_range', 'build_year')},
+        **result.aggregates(df, bins, complex_limit),
+    })
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/clusters', methods=['GET'])
+def api_clusters():
+    """
+    지도 범위의 마커 클러스터.
+    bbox=서,남,동,북(경도/위도, Leaflet toBBoxString 형식)과 zoom 으로 분석 시점에 만든 다중 해상도 격자에서
+    셀별 건수/좌표 중심/평균 거래금액·전용평당을 반환한다 (최대 MAP_CLUSTER_MAX 개).
+    """
+    try:
+        west, south, east, north = (float(v) for v in request.args.get('bbox', '').split(','))
+        zoom = float(request.args.get('zoom', 13))
+    except ValueError:
+        return _api_error('bbox=서,남,동,북 경위도와 zoom 숫자 파라미터가 필요합니다.')
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        return _api_error('bbox 범위가 올바르지 않습니다.')
+    if not 0 <= zoom <= 22:
+        return _api_error('zoom 은 0~22 이어야 합니다.')
+
+    dataset_path = _api_dataset_path()
+    if dataset_path is None:
+        return _api_error('분석 데이터 파일을 찾을 수 없습니다.', 404)
+
+    grid = get_cluster_grid(dataset_path, lambda: load_dataset(dataset_path, columns=CLUSTER_COLUMNS))
+    return jsonify({
+        'dataset': os.path.basename(dataset_path),
+        'bbox': [west, south, east, north],
+        'zoom': zoom,
+        **grid.clusters((south, north, west, east), zoom,
+                        cluster_pixels=app.config['MAP_CLUSTER_PIXELS'],
+                        max_clusters=app.config['MAP_CLUSTER_MAX']),
+    })
+
+@app.route('/api/stats', methods=['GET'])
+def api_stats():
+    """
+    지역/단지 drill-down 통계 (통계 큐브에서 계산).
+    region, complex, area_range, month_from, month_to 로 범위를 좁히고
+    by(region/complex/month/area_range) 를 주면 해당 차원별 건수/평균 목록을 함께 반환한다.
+    최소/최대/백분위수(중앙값)는 측정값 배열을 읽어야 하므로 percentiles=1 일 때만 계산한다.
+    """
+    args = request.args
+    area_range = args.get('area_range', 'all')
+    by = args.get('by') or None
+    percentiles = args.get('percentiles', '').lower() in ('1', 'true', 'yes')
+    try:
+        month_from = int(args['month_from']) if args.get('month_from') else None
+        month_to = int(args['month_to']) if args.get('month_to') else None
+        limit = int(args.get('limit', 20))
+    except ValueError as e:
+        return _api_error(str(e))
+    if area_range not in API_AREA_RANGES:
+        return _api_error(f"area_range 는 {', '.join(API_AREA_RANGES)} 중 하나여야 합니다.")
+    if by is not None and by not in CUBE_DIMENSIONS:
+        return _api_error(f"by 는 {', '.join(CUBE_DIMENSIONS)} 중 하나여야 합니다.")
+    if not 1 <= limit <= app.config['API_MAX_PER_PAGE']:
+        return _api_error(f"limit 는 1~{app.config['API_MAX_PER_PAGE']} 이어야 합니다.")
+
+    dataset_path = _api_dataset_path()
+    if dataset_path is None:
+        return _api_error('분석 데이터 파일을 찾을 수 없습니다.', 404)
+
+    cube = get_cube(dataset_path, lambda: load_dataset(dataset_path, columns=CUBE_COLUMNS))
+    filters = {
+        'region': (args.get('region') or '').strip() or None,
+        'complex': (args.get('complex') or '').strip() or None,
+        'area_range': area_range,
+        'month_from': month_from,
+        'month_to': month_to,
+    }
+    return jsonify({
+        'dataset': os.path.basename(dataset_path),
+        'filters': filters,
+        'percentiles': percentiles,
+        'summary': cube.summary(percentiles=percentiles, **filters),
+        'by': by,
+        'breakdown': cube.breakdown(by, limit=limit, percentiles=percentiles, **filters) if by else None,
+    })
+
+@app.route('/api/price_index', methods=['GET'])
+def api_price_index():
+    """
+    계약년월 기준 전용평당 월별 추이.
+    level(all/region/complex) 별 월별 건수/평균/중앙값, 3/6/12개월 이동 평균, 전년 동월 대비 변화율과
+    region/complex 로 좁힌 범위의 반복매매 지수를 반환한다.
+    그룹은 건수 순으로 offset 부터 limit 개씩 나눠 반환한다 (level=complex 는 단지 수만큼 그룹이 많다).
+    """
+    args = request.args
+    level = args.get('level', 'all')
+    try:
+        limit = int(args.get('limit', 20))
+        offset = int(args.get('offset', 0))
+    except ValueError as e:
+        return _api_error(str(e))
+    if level not in PRICE_INDEX_LEVELS:
+        return _api_error(f"level 은 {', '.join(PRICE_INDEX_LEVELS)} 중 하나여야 합니다.")
+    if not 1 <= limit <= app.config['API_MAX_PER_PAGE']:
+        return _api_error(f"limit 는 1~{app.config['API_MAX_PER_PAGE']} 이어야 합니다.")
+    if offset < 0:
+        return _api_error('offset 은 0 이상이어야 합니다.')
+
+    dataset_path = _api_dataset_path()
+    if dataset_path is None:
+        return _api_error('분석 데이터 파일을 찾을 수 없습니다.', 404)
+
+    region = (args.get('region') or '').strip() or None
+    complex_name = (args.get('complex') or '').strip() or None
+    trends = get_price_trends(dataset_path, lambda: load_dataset(dataset_path, columns=PRICE_INDEX_COLUMNS),
+                              level, region, complex_name)
+    return jsonify({
+        'dataset': os.path.basename(dataset_path),
+        'filters': {'region': region, 'complex': complex_name},
+        **trends.to_dict(limit=limit, offset=offset),
+    })
+
 if __name__ == '__main__':
     # 8001번 포트에서 실행
     app.run(debug=True, port=8004, host='0.0.0.0')
\ No newline at end of file
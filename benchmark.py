@@ -0,0 +1,495 @@
+"""
+성능 벤치마크 스크립트
+
+사용법:
+    python benchmark.py distance [--repeat 50] [--radius 5] [--geopy-sample 20000]
+    python benchmark.py spatial [--sizes 100000 1000000] [--radius 1]
+    python benchmark.py storage [--repeat 100]
+    python benchmark.py geocode [--addresses 200] [--latency 0.08] [--error-rate 0.05]
+    python benchmark.py matching [--rows 100000]
+    python benchmark.py formatting [--page-sizes 20 100 500 1000]
+    python benchmark.py hashing [--size-mb 50]
+    python benchmark.py address-keys [--sample 2000]
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+UPLOAD_FOLDER = 'uploads'
+
+
+def _timeit(func, repeat=3):
+    """func 를 repeat 회 실행하여 최소 소요 시간(초)과 마지막 결과를 반환"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _load_coord_samples():
+    """uploads/ 에서 위도/경도 컬럼이 있는 샘플 파일들을 읽어 하나로 합친다"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(UPLOAD_FOLDER, '*.csv'))):
+        try:
+            df = pd.read_csv(path, encoding='utf-8-sig', low_memory=False)
+        except Exception:
+            continue
+        if {'위도', '경도'}.issubset(df.columns):
+            print(f"[BENCH] 샘플 파일: {path} ({len(df):,}건)")
+            frames.append(df)
+    if not frames:
+        raise SystemExit('[BENCH] 위도/경도 컬럼이 있는 샘플 파일이 uploads/ 에 없습니다.')
+    return pd.concat(frames, ignore_index=True)
+
+
+def bench_distance(args):
+    """geopy 행 단위 geodesic vs 벡터화 haversine/vincenty 반경 필터 비교"""
+    from geopy.distance import geodesic
+    from geo_utils import filter_by_radius
+
+    base = _load_coord_samples()
+    df = pd.concat([base] * args.repeat, ignore_index=True)
+    center = df[['위도', '경도']].dropna().median()
+    center_lat, center_lon = float(center['위도']), float(center['경도'])
+    print(f"[BENCH] 데이터 {len(df):,}건, 중심점 ({center_lat:.5f}, {center_lon:.5f}), 반경 {args.radius}km")
+
+    # 기존 방식: 행마다 geopy 호출 (전체는 너무 느리므로 샘플 측정 후 선형 환산)
+    sample = df.dropna(subset=['위도', '경도']).head(args.geopy_sample)
+    geopy_time, geopy_dist = _timeit(lambda: sample.apply(
+        lambda row: geodesic((center_lat, center_lon), (row['위도'], row['경도'])).kilometers, axis=1), repeat=1)
+    geopy_full = geopy_time * len(df) / max(len(sample), 1)
+    print(f"[BENCH] geopy (행 단위, {len(sample):,}건 측정): {geopy_time:.3f}s → 전체 환산 {geopy_full:.2f}s")
+
+    for method in ('haversine', 'vincenty'):
+        elapsed, result = _timeit(lambda: filter_by_radius(df, center_lat, center_lon, args.radius, method=method))
+        print(f"[BENCH] {method:9s} (벡터화): {elapsed * 1000:.1f}ms, 반경 내 {len(result):,}건, "
+              f"속도 향상 약 {geopy_full / elapsed:,.0f}배")
+
+        # 정확도: 같은 샘플에서 geopy 대비 최대 오차
+        exact = filter_by_radius(sample, center_lat, center_lon, 1e6, method=method)['중심점과의거리']
+        reference = geopy_dist.loc[exact.index].to_numpy()
+        err = np.abs(exact.to_numpy() - reference)
+        rel = err / np.maximum(reference, 1e-9)
+        print(f"[BENCH]   geopy 대비 최대 오차: {err.max() * 1000:.3f}m (상대 오차 {rel.max() * 100:.3f}%)")
+
+    expected = (geopy_dist <= args.radius).sum()
+    print(f"[BENCH] geopy 기준 반경 내 건수 (샘플): {expected:,}건")
+
+
+def bench_spatial(args):
+    """데이터 크기별 전체 스캔 vs 격자 인덱스 반경 쿼리 지연시간 비교"""
+    from geo_utils import filter_by_radius
+    from spatial_index import GridIndex
+
+    base = _load_coord_samples()[['위도', '경도']].dropna()
+    center_lat, center_lon = float(base['위도'].median()), float(base['경도'].median())
+    rng = np.random.default_rng(0)
+
+    for size in args.sizes:
+        # 샘플 좌표를 반복하고 약 ±5km 흔들어 전국 규모 데이터처럼 분포를 넓힌다
+        picks = rng.integers(0, len(base), size)
+        df = pd.DataFrame({
+            '위도': base['위도'].to_numpy()[picks] + rng.normal(0, 0.05, size),
+            '경도': base['경도'].to_numpy()[picks] + rng.normal(0, 0.05, size),
+        })
+        build_time, index = _timeit(lambda: GridIndex.from_dataframe(df), repeat=1)
+        scan_time, scan = _timeit(lambda: filter_by_radius(df, center_lat, center_lon, args.radius))
+        query_time, indexed = _timeit(lambda: filter_by_radius(df, center_lat, center_lon, args.radius, index=index))
+        candidate_time, candidates = _timeit(
+            lambda: index.candidates((center_lat - 0.03, center_lat + 0.03, center_lon - 0.03, center_lon + 0.03)))
+        assert len(scan) == len(indexed)
+        print(f"[BENCH] {size:>10,}건 | 인덱스 생성 {build_time * 1000:8.1f}ms | 전체 스캔 {scan_time * 1000:8.2f}ms | "
+              f"인덱스 쿼리 {query_time * 1000:7.2f}ms (셀 조회 {candidate_time * 1000:.3f}ms) | 반경 내 {len(indexed):,}건")
+
+
+def bench_storage(args):
+    """분석 캐시 로드 시간: UTF-8-BOM CSV vs Parquet (전체 / 컬럼 projection)"""
+    import tempfile
+    from dataset_store import coerce_analyzed_dtypes, read_analyzed, write_analyzed
+    from data_processing import STATS_COLUMNS
+
+    df = coerce_analyzed_dtypes(pd.concat([_load_coord_samples()] * args.repeat, ignore_index=True))
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'bench_분석완료.csv')
+        parquet_path = os.path.join(tmp, 'bench_분석완료.parquet')
+        df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+        write_analyzed(df, parquet_path)
+        print(f"[BENCH] 데이터 {len(df):,}건 | CSV {os.path.getsize(csv_path) / 1024 / 1024:.1f}MB | "
+              f"Parquet {os.path.getsize(parquet_path) / 1024 / 1024:.1f}MB")
+
+        csv_time, _ = _timeit(lambda: pd.read_csv(csv_path, encoding='utf-8-sig'))
+        full_time, loaded = _timeit(lambda: read_analyzed(parquet_path))
+        proj_time, _ = _timeit(lambda: read_analyzed(parquet_path, columns=STATS_COLUMNS))
+        print(f"[BENCH] CSV 전체 로드       : {csv_time * 1000:8.1f}ms")
+        print(f"[BENCH] Parquet 전체 로드   : {full_time * 1000:8.1f}ms ({csv_time / full_time:.1f}배)")
+        print(f"[BENCH] Parquet 통계 컬럼만 : {proj_time * 1000:8.1f}ms ({csv_time / proj_time:.1f}배)")
+        print(f"[BENCH] Parquet 로드 후 타입: {dict(loaded.dtypes.astype(str))}")
+
+
+def _start_kakao_stub(latency, error_rate):
+    """카카오 주소 검색 API 를 흉내 내는 로컬 스텁 서버를 띄우고 (서버, 기본 URL) 을 반환"""
+    import json
+    import random
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class KakaoStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            if random.random() < error_rate:
+                self.send_response(429)
+                self.send_header('Retry-After', '0')
+                self.end_headers()
+                return
+            query = parse_qs(urlparse(self.path).query).get('query', [''])[0]
+            seed = sum(query.encode('utf-8')) % 1000
+            body = json.dumps({'documents': [{'y': str(37.4 + seed / 10000), 'x': str(127.0 + seed / 10000)}]})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body.encode('utf-8'))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KakaoStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def bench_geocode(args):
+    """로컬 카카오 스텁 서버 대상 순차 vs 동시 지오코딩 비교 (429 재시도 포함)"""
+    import contextlib
+    import io as _io
+    import tempfile
+    import map_utils
+    from geocode_store import GeocodeStore
+
+    server, base_url = _start_kakao_stub(args.latency, args.error_rate)
+    tmp_dir = tempfile.TemporaryDirectory()
+    map_utils.KAKAO_API_BASE_URL = base_url
+    map_utils._store = GeocodeStore(os.path.join(tmp_dir.name, 'geocode_cache.sqlite3'))
+    map_utils._rate_limiter = map_utils.TokenBucket(rate=args.rate, capacity=args.burst)
+    addresses = [f"서울특별시 서초구 서초동 {i}-{i % 7}" for i in range(args.addresses)]
+    print(f"[BENCH] 스텁 서버 {base_url} | 주소 {len(addresses)}건 | 지연 {args.latency}s | "
+          f"429 비율 {args.error_rate:.0%} | 레이트 {args.rate}/s")
+
+    try:
+        for workers in (1, args.workers):
+            map_utils.clear_cache()
+            progress = []
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(_io.StringIO()):
+                results = map_utils.geocode_addresses_concurrently(
+                    addresses, max_workers=workers, progress_callback=lambda done, total: progress.append(done))
+            elapsed = time.perf_counter() - start
+            success = sum(1 for lat, _ in results.values() if lat is not None)
+            print(f"[BENCH] 동시 {workers:2d}건: {elapsed:6.2f}s, 성공 {success}/{len(addresses)}, "
+                  f"진행 콜백 {len(progress)}회")
+
+        # 프로세스 재시작 상황: 메모리 캐시만 비우고 영구 캐시에서 bulk 조회
+        map_utils.clear_cache(persistent=False)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(_io.StringIO()):
+            results = map_utils.geocode_addresses_concurrently(addresses)
+        print(f"[BENCH] 영구 캐시 재조회: {(time.perf_counter() - start) * 1000:.1f}ms, "
+              f"{len(results)}건 | {map_utils.get_geocode_store().stats()['size']}건 저장")
+    finally:
+        server.shutdown()
+        tmp_dir.cleanup()
+
+
+def _legacy_assign_coordinates(df, geocoded):
+    """기존 match_with_supabase 1단계 방식 (iterrows 로 키 생성, df.at 으로 한 칸씩 기록)"""
+    unique_addresses = []
+    address_to_rows = {}
+    for idx, row in df.iterrows():
+        if row.get('시군구') and row.get('번지'):
+            addr_key = f"{row.get('시군구', '')} {row.get('번지', '')}".strip()
+            if addr_key not in address_to_rows:
+                unique_addresses.append(addr_key)
+                address_to_rows[addr_key] = []
+            address_to_rows[addr_key].append(idx)
+    for addr in unique_addresses:
+        lat, lon = geocoded.get(addr, (None, None))
+        if lat and lon:
+            for row_idx in address_to_rows[addr]:
+                df.at[row_idx, '위도'] = lat
+                df.at[row_idx, '경도'] = lon
+    return df
+
+
+def bench_matching(args):
+    """지오코딩 결과가 캐시된 상태에서 주소 키 생성 + 좌표 기록 단계: 기존 루프 vs 벡터화"""
+    from data_processing import apply_coordinates, build_address_keys, coordinate_table
+
+    base = _load_coord_samples()
+    picks = np.random.default_rng(0).integers(0, len(base), args.rows)
+    df = base.iloc[picks][['시군구', '번지', '단지명']].reset_index(drop=True)
+    df['번지'] = df['번지'].astype(str)
+    keys = (df['시군구'] + ' ' + df['번지']).str.strip()
+    geocoded = {key: (37.5 + i * 1e-5, 127.0 + i * 1e-5) for i, key in enumerate(keys.unique())}
+    print(f"[BENCH] 데이터 {len(df):,}건, 고유 주소 {len(geocoded):,}개")
+
+    def legacy():
+        frame = df.copy()
+        frame['위도'] = np.nan
+        frame['경도'] = np.nan
+        return _legacy_assign_coordinates(frame, geocoded)
+
+    def vectorized():
+        frame = df.copy()
+        frame['위도'] = np.nan
+        frame['경도'] = np.nan
+        address_keys = build_address_keys(frame)
+        address_keys.dropna().unique().tolist()
+        return apply_coordinates(frame, address_keys, coordinate_table(geocoded))
+
+    legacy_time, legacy_df = _timeit(legacy, repeat=1)
+    vector_time, vector_df = _timeit(vectorized)
+    same = np.allclose(legacy_df['위도'].to_numpy(), vector_df['위도'].to_numpy(), equal_nan=True)
+    print(f"[BENCH] iterrows + df.at : {legacy_time:8.3f}s")
+    print(f"[BENCH] 벡터화 map       : {vector_time:8.3f}s ({legacy_time / vector_time:,.0f}배, 결과 일치: {same})")
+
+
+def bench_formatting(args):
+    """결과 페이지 레코드 포맷: 셀 단위 루프 + clean_for_json vs 컬럼 단위 벡터화"""
+    from data_processing import clean_for_json
+    from dataset_store import coerce_analyzed_dtypes
+    from result_formatter import format_records, _format_cells
+
+    base = coerce_analyzed_dtypes(_load_coord_samples())
+    base['중심점과의거리'] = np.random.default_rng(0).uniform(0, 5, len(base))
+    columns = [col for col in base.columns if col != '중심점과의거리']
+
+    for page_size in args.page_sizes:
+        picks = np.random.default_rng(page_size).integers(0, len(base), page_size)
+        page = base.iloc[picks].reset_index(drop=True)
+        legacy_time, legacy = _timeit(
+            lambda: clean_for_json(_format_cells(page.to_dict(orient='records'), columns)), repeat=args.repeat)
+        vector_time, vectorized = _timeit(lambda: format_records(page, columns), repeat=args.repeat)
+        print(f"[BENCH] {page_size:>5,}건/페이지: 셀 루프 {legacy_time * 1000:8.2f}ms, "
+              f"벡터화 {vector_time * 1000:8.2f}ms ({legacy_time / vector_time:5.1f}배, 결과 일치: {legacy == vectorized})")
+
+
+def bench_hashing(args):
+    """업로드 저장 + 캐시 키 해시: 저장 후 전체 읽기 md5 vs 저장하면서 스트리밍 해시"""
+    import hashlib
+    import io
+    import tempfile
+    import tracemalloc
+    from upload_store import save_stream
+
+    rng = np.random.default_rng(0)
+    payload = rng.integers(0, 256, args.size_mb * 1024 * 1024, dtype=np.uint8).tobytes()
+
+    def legacy(path):
+        with open(path, 'wb') as out:
+            out.write(payload)
+        with open(path, 'rb') as f:
+            return hashlib.md5(f.read()).hexdigest()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'upload.csv')
+        cases = [('저장 후 md5(f.read())', lambda: legacy(path))]
+        for algorithm in ('md5', 'blake2b', 'xxhash'):
+            cases.append((f'스트리밍 {algorithm}',
+                          lambda algorithm=algorithm: save_stream(io.BytesIO(payload), path, algorithm)[0]))
+        for name, func in cases:
+            elapsed, _ = _timeit(func, repeat=args.repeat)
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"[BENCH] {name:<22} {elapsed * 1000:8.1f}ms, {args.size_mb / elapsed:7.1f}MB/s, "
+                  f"추가 메모리 최대 {peak / 1024 / 1024:6.1f}MB")
+
+
+def _load_address_samples():
+    """uploads/ 의 CSV(원본 실거래가 파일 포함)에서 시군구/번지 컬럼을 파일별로 읽는다"""
+    import io
+
+    samples = []
+    for path in sorted(glob.glob(os.path.join(UPLOAD_FOLDER, '*.csv'))):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        for encoding in ('utf-8-sig', 'cp949'):
+            try:
+                text = raw.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            continue
+        # 원본 파일은 헤더 위에 안내 문구가 있으므로 시군구/번지가 있는 첫 줄을 헤더로 사용
+        lines = text.splitlines()
+        header = next((i for i, line in enumerate(lines[:50]) if '시군구' in line and '번지' in line), None)
+        if header is None:
+            continue
+        df = pd.read_csv(io.StringIO('\n'.join(lines[header:])), usecols=['시군구', '번지'], dtype=str)
+        print(f"[BENCH] 샘플 파일: {path} ({len(df):,}건)")
+        samples.append((path, df))
+    if not samples:
+        raise SystemExit('[BENCH] 시군구/번지 컬럼이 있는 샘플 파일이 uploads/ 에 없습니다.')
+    return samples
+
+
+def _address_variants(address, rng):
+    """같은 주소를 사람이 / 다른 데이터 소스가 쓸 법한 표기들 {유형: 주소}"""
+    from address_canon import PROVINCE_ALIASES
+
+    tokens = address.split(' ')
+    short = {}
+    for alias, name in PROVINCE_ALIASES.items():
+        if name == tokens[0] and (name not in short or len(alias) < len(short[name])):
+            short[name] = alias
+    lot = tokens[-1]
+    main, _, sub = lot.partition('-')
+    variants = {
+        '시도 약칭': ' '.join([short.get(tokens[0], tokens[0])] + tokens[1:]),
+        '번지 접미사': f"{address}번지",
+        '띄어 쓴 번지': f"{address} 번지",
+        '연속/앞뒤 공백': '  ' + '  '.join(tokens) + ' ',
+    }
+    if main.isdigit():
+        variants['본번 0 채움'] = ' '.join(tokens[:-1] + [main.zfill(4) + (f"-{sub.zfill(4)}" if sub else '')])
+        if not sub:
+            variants['부번 0 표기'] = f"{address}-0"
+        variants['전각 숫자/대시'] = ' '.join(tokens[:-1] + [lot.translate(str.maketrans('0123456789-', '０１２３４５６７８９－'))])
+    if lot.startswith('산'):
+        variants['산 띄어쓰기'] = ' '.join(tokens[:-1] + ['산 ' + lot[1:]])
+    # 여러 표기가 섞인 경우 (약칭 + 번지 접미사 + 공백)
+    variants['혼합'] = variants['시도 약칭'].replace(' ', '  ', int(rng.integers(0, 3))) + ' 번지'
+    return variants
+
+
+def bench_address_keys(args):
+    """샘플 업로드 주소로 지오코딩 캐시 적중률 비교: 공백 정리 키 vs 정규화(canonical) 키"""
+    import re
+    from address_canon import canonicalize_address
+
+    def legacy_key(address):
+        return re.sub(r'\s+', ' ', address or '').strip()
+
+    key_funcs = {'기존 키': legacy_key, '정규화 키': canonicalize_address}
+    samples = _load_address_samples()
+    uploads = []
+    for path, df in samples:
+        sigungu = df['시군구'].fillna('').str.strip()
+        bunji = df['번지'].fillna('').str.strip()
+        valid = sigungu.ne('') & bunji.ne('')
+        uploads.append((path, (sigungu[valid] + ' ' + bunji[valid]).unique().tolist()))
+
+    # 1) 업로드 파이프라인: 파일 순서대로 고유 주소를 조회, 앞 파일에서 조회한 주소는 캐시 적중
+    for name, key in key_funcs.items():
+        cache = set()
+        lookups = hits = 0
+        for _, addresses in uploads:
+            for address in addresses:
+                k = key(address)
+                lookups += 1
+                hits += k in cache
+                cache.add(k)
+        print(f"[BENCH] 업로드 주소 {name:<5}: 조회 {lookups:,}건, 캐시 적중 {hits:,}건 ({hits / lookups:6.2%}), "
+              f"API 호출 {len(cache):,}건")
+
+    # 정규화가 서로 다른 주소를 합치지 않는지 확인 (기존 키가 다른데 정규화 키가 같은 쌍)
+    all_addresses = list(dict.fromkeys(a for _, addresses in uploads for a in addresses))
+    by_canonical = {}
+    for address in all_addresses:
+        by_canonical.setdefault(canonicalize_address(address), set()).add(legacy_key(address))
+    merged = {k: v for k, v in by_canonical.items() if len(v) > 1}
+    print(f"[BENCH] 고유 주소 {len(all_addresses):,}개 → 정규화 키 {len(by_canonical):,}개 "
+          f"(합쳐진 키 {len(merged):,}개)")
+    for k, v in list(merged.items())[:5]:
+        print(f"[BENCH]   {sorted(v)} → {k}")
+
+    # 2) 같은 주소를 다르게 쓴 조회 (필터 주소 입력, 다른 출처 데이터): 업로드 주소로 채운 캐시에 대한 적중률
+    #    엑셀이 날짜로 바꿔 버린 번지(Feb-11, 04월 01일 등)는 번지로 보지 않으므로 변형 대상에서 제외
+    lot_addresses = [a for a in all_addresses if re.fullmatch(r'산?\d+(-\d+)?', a.rsplit(' ', 1)[-1])]
+    print(f"[BENCH] 번지 형식이 아닌 주소 {len(all_addresses) - len(lot_addresses):,}개는 표기 변형 조회에서 제외")
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(lot_addresses), min(args.sample, len(lot_addresses)), replace=False)
+    queries = {}
+    for i in picks:
+        for kind, variant in _address_variants(lot_addresses[i], rng).items():
+            queries.setdefault(kind, []).append(variant)
+    caches = {name: {key(a) for a in all_addresses} for name, key in key_funcs.items()}
+    print(f"[BENCH] 표기 변형 조회 (주소 {len(picks):,}개 × 유형별 1건)")
+    totals = dict.fromkeys(key_funcs, 0)
+    count = 0
+    for kind, variants in queries.items():
+        rates = []
+        for name, key in key_funcs.items():
+            hits = sum(key(v) in caches[name] for v in variants)
+            totals[name] += hits
+            rates.append(f"{name} {hits / len(variants):7.2%}")
+        count += len(variants)
+        print(f"[BENCH]   {kind:<10} {len(variants):5,}건: " + ', '.join(rates))
+    print(f"[BENCH]   전체       {count:5,}건: " +
+          ', '.join(f"{name} {hits / count:7.2%}" for name, hits in totals.items()))
+    elapsed, _ = _timeit(lambda: [canonicalize_address(a) for a in all_addresses])
+    print(f"[BENCH] 정규화 비용: {len(all_addresses):,}개 {elapsed * 1000:.1f}ms "
+          f"({elapsed / len(all_addresses) * 1e6:.1f}us/주소)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='실거래가 분석 성능 벤치마크')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('distance', help='반경 필터 거리 계산 벤치마크')
+    p.add_argument('--repeat', type=int, default=50, help='샘플 데이터 반복 배수')
+    p.add_argument('--radius', type=float, default=5.0, help='반경 (km)')
+    p.add_argument('--geopy-sample', type=int, default=20000, help='geopy 측정 샘플 건수')
+    p.set_defaults(func=bench_distance)
+
+    p = sub.add_parser('spatial', help='공간 인덱스 반경 쿼리 벤치마크')
+    p.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 3_000_000], help='데이터 건수 목록')
+    p.add_argument('--radius', type=float, default=1.0, help='반경 (km)')
+    p.set_defaults(func=bench_spatial)
+
+    p = sub.add_parser('storage', help='분석 캐시 로드 시간 벤치마크 (CSV vs Parquet)')
+    p.add_argument('--repeat', type=int, default=100, help='샘플 데이터 반복 배수')
+    p.set_defaults(func=bench_storage)
+
+    p = sub.add_parser('geocode', help='로컬 스텁 서버 대상 동시 지오코딩 벤치마크')
+    p.add_argument('--addresses', type=int, default=200, help='지오코딩할 주소 수')
+    p.add_argument('--latency', type=float, default=0.08, help='스텁 응답 지연 (초)')
+    p.add_argument('--error-rate', type=float, default=0.05, help='429 응답 비율')
+    p.add_argument('--rate', type=float, default=50.0, help='초당 최대 요청 수 (토큰 버킷)')
+    p.add_argument('--burst', type=float, default=5.0, help='토큰 버킷 용량')
+    p.add_argument('--workers', type=int, default=8, help='동시 요청 수')
+    p.set_defaults(func=bench_geocode)
+
+    p = sub.add_parser('matching', help='주소 키 생성/좌표 기록 벡터화 벤치마크')
+    p.add_argument('--rows', type=int, default=100_000, help='데이터 건수')
+    p.set_defaults(func=bench_matching)
+
+    p = sub.add_parser('formatting', help='결과 페이지 레코드 포맷 벤치마크')
+    p.add_argument('--page-sizes', type=int, nargs='+', default=[20, 100, 500, 1000], help='페이지 크기 목록')
+    p.add_argument('--repeat', type=int, default=5, help='반복 측정 횟수')
+    p.set_defaults(func=bench_formatting)
+
+    p = sub.add_parser('hashing', help='업로드 저장 + 캐시 키 해시 벤치마크')
+    p.add_argument('--size-mb', type=int, default=50, help='업로드 파일 크기 (MB)')
+    p.add_argument('--repeat', type=int, default=3, help='반복 횟수')
+    p.set_defaults(func=bench_hashing)
+
+    p = sub.add_parser('address-keys', help='주소 정규화 전후 지오코딩 캐시 적중률')
+    p.add_argument('--sample', type=int, default=2000, help='표기 변형을 만들 주소 수')
+    p.set_defaults(func=bench_address_keys)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+지도 마커 클러스터링용 다중 해상도 격자 모듈
+
+분석 시점에 거래 좌표를 여러 크기의 격자로 미리 집계해 두고, 지도 범위(bbox)와 줌 레벨이 주어지면
+해당 해상도 격자에서 범위에 걸친 셀만 잘라 클러스터(건수, 좌표 중심, 평균 거래금액/전용평당)로 반환한다.
+브라우저는 수만 개 마커 대신 화면당 수백 개 이하의 클러스터만 받는다.
+
+- 격자는 위경도 (0, 0) 기준으로 정렬되어 있고 레벨 k 의 셀 크기는 BASE_CELL_DEG * 2^k 이다.
+  따라서 레벨 k+1 셀 번호는 레벨 k 셀 번호를 2 로 나눈 값이며, 상위 레벨은 하위 레벨 셀을 합쳐 만든다.
+- 셀 키는 (격자 행 << 32) + 격자 열 로 정렬되어 있어 bbox 조회는 격자 행마다 연속 구간 하나다 (spatial_index 와 같은 방식).
+- 중심 좌표와 평균은 셀별 합계/건수로 저장하므로 상위 레벨도 정확한 값이다.
+
+격자는 분석 캐시 파일 옆에 `{이름}.clusters.npz` 로 저장된다.
+"""
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sidecar_cache import get_or_build, sidecar_path
+
+GRID_VERSION = 1
+GRID_SUFFIX = '.clusters.npz'
+BASE_CELL_DEG = 0.0005  # 가장 촘촘한 레벨 (약 55m)
+LEVELS = 12             # 0.0005도 ~ 약 1도
+LAT_COLUMN = '위도'
+LON_COLUMN = '경도'
+PRICE_COLUMN = '거래금액'
+PPP_COLUMN = '전용평당'
+CLUSTER_COLUMNS = [LAT_COLUMN, LON_COLUMN, PRICE_COLUMN, PPP_COLUMN]
+# 레벨별 저장 배열 (keys 외에는 셀별 합계/건수)
+_FIELDS = ('keys', 'count', 'lat_sum', 'lon_sum', 'price_sum', 'price_count', 'ppp_sum', 'ppp_count')
+_COL_BITS = 32
+_COL_OFFSET = 1 << 31  # 음수 열 번호를 양수 키로
+
+
+def _cell_keys(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    return (rows << _COL_BITS) + (cols + _COL_OFFSET)
+
+
+def _split_keys(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return keys >> _COL_BITS, (keys & ((1 << _COL_BITS) - 1)) - _COL_OFFSET
+
+
+def _aggregate(keys: np.ndarray, values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """같은 셀 키끼리 합산 (keys 오름차순 결과)"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    level = {'keys': unique}
+    for name, array in values.items():
+        summed = np.bincount(inverse, weights=array, minlength=unique.size)
+        level[name] = summed.astype('int32') if name in ('count', 'price_count', 'ppp_count') else summed
+    return level
+
+
+class ClusterGrid:
+    """레벨별 셀 집계 배열 묶음 (levels[k] 는 _FIELDS 이름의 배열 dict)"""
+
+    def __init__(self, levels: List[Dict[str, np.ndarray]], base_cell_deg: float = BASE_CELL_DEG):
+        self.levels = levels
+        self.base_cell_deg = base_cell_deg
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, base_cell_deg: float = BASE_CELL_DEG,
+                       n_levels: int = LEVELS) -> 'ClusterGrid':
+        def column(col):
+            if col not in df.columns:
+                return np.full(len(df), np.nan)
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')
+
+        lat, lon = column(LAT_COLUMN), column(LON_COLUMN)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        lat, lon = lat[valid], lon[valid]
+        price, ppp = column(PRICE_COLUMN)[valid], column(PPP_COLUMN)[valid]
+        price_ok, ppp_ok = np.isfinite(price), np.isfinite(ppp)
+
+        rows = np.floor(lat / base_cell_deg).astype('int64')
+        cols = np.floor(lon / base_cell_deg).astype('int64')
+        level = _aggregate(_cell_keys(rows, cols), {
+            'count': np.ones(lat.size),
+            'lat_sum': lat,
+            'lon_sum': lon,
+            'price_sum': np.where(price_ok, price, 0.0),
+            'price_count': price_ok.astype('float64'),
+            'ppp_sum': np.where(ppp_ok, ppp, 0.0),
+            'ppp_count': ppp_ok.astype('float64'),
+        })
+        levels = [level]
+        # 상위 레벨: 셀 번호를 2 로 나눠(내림) 하위 레벨 셀을 합친다
+        for _ in range(1, n_levels):
+            rows, cols = _split_keys(level['keys'])
+            level = _aggregate(_cell_keys(rows >> 1, cols >> 1),
+                               {name: level[name] for name in _FIELDS if name != 'keys'})
+            levels.append(level)
+        return cls(levels, base_cell_deg)
+
+    @property
+    def point_count(self) -> int:
+        return int(self.levels[0]['count'].sum()) if self.levels else 0
+
+    def cell_deg(self, level: int) -> float:
+        return self.base_cell_deg * (1 << level)
+
+    def level_for_zoom(self, zoom: float, cluster_pixels: int) -> int:
+        """
+        웹 메르카토르 줌 레벨에서 클러스터 하나가 약 cluster_pixels 픽셀이 되는 가장 촘촘한 레벨.
+        줌 z 의 경도 1픽셀 = 360 / (256 * 2^z) 도.
+        """
+        target = 360.0 / (256 * 2 ** zoom) * cluster_pixels
+        for level in range(len(self.levels)):
+            if self.cell_deg(level) >= target:
+                return level
+        return len(self.levels) - 1
+
+    def _cells_in_bbox(self, level: int, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """bbox (lat_min, lat_max, lon_min, lon_max) 에 걸친 셀의 배열 위치"""
+        keys = self.levels[level]['keys']
+        if keys.size == 0:
+            return np.empty(0, dtype='int64')
+        lat_min, lat_max, lon_min, lon_max = bbox
+        cell_deg = self.cell_deg(level)
+        r0 = max(int(np.floor(lat_min / cell_deg)), int(keys[0] >> _COL_BITS))
+        r1 = min(int(np.floor(lat_max / cell_deg)), int(keys[-1] >> _COL_BITS))
+        c0, c1 = int(np.floor(lon_min / cell_deg)), int(np.floor(lon_max / cell_deg))
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype='int64')
+
+        # 격자 행마다 [c0, c1] 열 구간은 keys 의 연속 구간
+        grid_rows = np.arange(r0, r1 + 1, dtype='int64')
+        lo = np.searchsorted(keys, _cell_keys(grid_rows, np.full(grid_rows.size, c0)), side='left')
+        hi = np.searchsorted(keys, _cell_keys(grid_rows, np.full(grid_rows.size, c1)), side='right')
+        lengths = hi - lo
+        return np.repeat(lo - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+
+    def clusters(self, bbox: Tuple[float, float, float, float], zoom: float,
+                 cluster_pixels: int = 60, max_clusters: Optional[int] = None) -> Dict:
+        """
+        bbox 안의 클러스터 목록.
+        줌에 맞는 레벨에서 셀 수가 max_clusters 를 넘으면 한 단계씩 더 거친 레벨을 사용한다.
+        """
+        level = self.level_for_zoom(zoom, cluster_pixels)
+        cells = self._cells_in_bbox(level, bbox)
+        while max_clusters is not None and cells.size > max_clusters and level < len(self.levels) - 1:
+            level += 1
+            cells = self._cells_in_bbox(level, bbox)
+
+        data = self.levels[level]
+        count = data['count'][cells].astype('int64')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            lat = data['lat_sum'][cells] / count
+            lon = data['lon_sum'][cells] / count
+            price = data['price_sum'][cells] / data['price_count'][cells]
+            ppp = data['ppp_sum'][cells] / data['ppp_count'][cells]
+        frame = pd.DataFrame({
+            'lat': np.round(lat, 7), 'lon': np.round(lon, 7), 'count': count,
+            'price_mean': np.round(price, 2), 'ppp_mean': np.round(ppp, 2),
+        }).astype(object)
+        return {
+            'level': level,
+            'cell_deg': self.cell_deg(level),
+            'count': int(count.sum()),
+            'clusters': frame.where(pd.notna(frame), None).to_dict(orient='records'),
+        }
+
+    # --- 저장 ---
+
+    def save(self, path: str):
+        """npz 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        arrays = {f'{name}_{k}': level[name] for k, level in enumerate(self.levels) for name in _FIELDS}
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, version=GRID_VERSION, n_levels=len(self.levels),
+                 base_cell_deg=self.base_cell_deg, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['ClusterGrid']:
+        """저장된 격자를 읽는다. 버전이 다르면 None"""
+        with np.load(path) as data:
+            if int(data['version']) != GRID_VERSION:
+                return None
+            levels = [{name: data[f'{name}_{k}'] for name in _FIELDS} for k in range(int(data['n_levels']))]
+            return cls(levels, float(data['base_cell_deg']))
+
+
+def grid_path_for(dataset_path: str) -> str:
+    """분석 캐시 파일에 대응하는 클러스터 격자 파일 경로"""
+    return sidecar_path(dataset_path, GRID_SUFFIX)
+
+
+def build_and_save_clusters(dataset_path: str, df: pd.DataFrame) -> ClusterGrid:
+    """df 로 다중 해상도 격자를 만들고 dataset_path 옆에 저장"""
+    grid = ClusterGrid.from_dataframe(df)
+    path = grid_path_for(dataset_path)
+    try:
+        grid.save(path)
+        print(f"[CLUSTER] 클러스터 격자 저장: {path} (레벨 {len(grid.levels)}개, "
+              f"최소 셀 {grid.levels[0]['keys'].size:,}개, 좌표 {grid.point_count:,}건)")
+    except OSError as e:
+        print(f"[CLUSTER] 클러스터 격자 저장 실패: {path}, 오류: {e}")
+    return grid
+
+
+def get_cluster_grid(dataset_path: str, load: Callable[[], pd.DataFrame]) -> ClusterGrid:
+    """
+    dataset_path 에 대한 클러스터 격자를 반환.
+    메모리 → 디스크 순으로 찾고, 없거나 데이터보다 오래됐으면 load() 로 CLUSTER_COLUMNS 를 읽어 새로 만든다.
+    """
+    return get_or_build(dataset_path, GRID_SUFFIX,
+                        build=lambda: build_and_save_clusters(dataset_path, load()),
+                        load=ClusterGrid.load,
+                        label='[CLUSTER] 클러스터 격자')
@@ -21,8 +21,55 @@ class Config:
     
     # 성능 튜닝 설정
     PANDAS_LOW_MEMORY = False
+    CSV_CHUNK_SIZE = 50000  # 업로드 CSV 스트리밍 처리 chunk 크기 (행)
+    FILTER_LOG_MODE = os.getenv('FILTER_LOG_MODE', 'rows')  # rows(행 단위) | summary(건수만) | off
+    FILTER_LOG_MAX_ROWS = 100000  # 필터링 로그에 기록할 최대 행 수 (초과분은 요약 건수에만 반영)
     CACHE_SIZE = 1000
     API_RATE_LIMIT = 0.1  # 100ms 간격
+    GEOCODE_BURST = 5  # 토큰 버킷 최대 누적 요청 수
+    GEOCODE_MAX_WORKERS = 8  # 동시 지오코딩 요청 수
+    GEOCODE_MAX_RETRIES = 3  # 429/5xx 응답 재시도 횟수
+    GEOCODE_BACKOFF_BASE = 0.5  # 재시도 대기 시간 기준 (초, 지수 증가)
+    # 지오코딩 영구 캐시 (SQLite, 여러 워커가 공유)
+    GEOCODE_CACHE_PATH = os.environ.get('GEOCODE_CACHE_PATH', os.path.join('cache', 'geocode_cache.sqlite3'))
+    GEOCODE_NEGATIVE_TTL = 7 * 24 * 3600  # 좌표를 찾지 못한 주소를 다시 조회하기까지의 시간 (초)
+    
+    # Supabase in_ 쿼리 값 목록의 URL 인코딩 최대 길이 (PostgREST GET URL 길이 제한 대응)
+    SUPABASE_IN_QUERY_MAX_CHARS = 6000
+    # apt_master_info 로컬 스냅샷 (파일이 있으면 단지 좌표 조회에 DB 대신 사용, /sync_apt_master 로 갱신)
+    APT_MASTER_SNAPSHOT_PATH = os.environ.get('APT_MASTER_SNAPSHOT_PATH', os.path.join('cache', 'apt_master_info.parquet'))
+    # 신규 단지 일괄 저장 (upsert 충돌 키에는 유니크 인덱스가 필요 - DB_README.md 참고)
+    SUPABASE_UPSERT_CHUNK_SIZE = 500
+    APT_MASTER_CONFLICT_KEY = 'apt_nm,lnno_adres'
+    
+    # 반경 필터 거리 계산 방식 ('vincenty': 기존 geopy geodesic 과 같은 타원체 거리, 'haversine': 빠른 구면 근사)
+    # haversine 은 최대 약 0.5% 오차로 반경 경계 근처 거래의 포함 여부가 geopy 결과와 달라질 수 있다
+    DISTANCE_METHOD = os.environ.get('DISTANCE_METHOD', 'vincenty')
+    # 반경 쿼리용 공간 인덱스 격자 크기 (도 단위, 0.01도 ≈ 1.1km)
+    SPATIAL_INDEX_CELL_DEG = 0.01
+    # 분석 데이터셋 DataFrame 메모리 캐시 한도 (bytes)
+    DATAFRAME_CACHE_MAX_BYTES = int(os.environ.get('DATAFRAME_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    # /results, /download 필터 결과 캐시 항목 수 (데이터셋 + 필터 조건 단위)
+    QUERY_CACHE_SIZE = 64
+    # JSON API (/api/results) 제한
+    API_MAX_PER_PAGE = 1000
+    API_MAX_RADIUS_KM = 50
+    API_STREAM_CHUNK_ROWS = 1000  # NDJSON 스트리밍 시 한 번에 변환하는 행 수
+    # 필터 결과 집계 (전용평당 히스토그램 구간 수, 단지별 요약 최대 단지 수)
+    RESULT_HISTOGRAM_BINS = 20
+    RESULT_HISTOGRAM_MAX_BINS = 200
+    RESULT_COMPLEX_LIMIT = 200
+    # 지도 클러스터 (/api/clusters): 클러스터 한 개의 목표 크기(픽셀), 한 번에 반환하는 최대 클러스터 수
+    MAP_CLUSTER_PIXELS = 60
+    MAP_CLUSTER_MAX = 500
+    # /download 스트리밍 시 한 번에 직렬화하는 행 수 (메모리 사용량 상한)
+    DOWNLOAD_CHUNK_ROWS = 5000
+    # 업로드 분석 백그라운드 작업 (SQLite 작업 테이블 + 스레드 풀, 진행 상태는 여러 워커가 공유)
+    JOB_DB_PATH = os.environ.get('JOB_DB_PATH', os.path.join('cache', 'jobs.sqlite3'))
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_RETENTION_SECONDS = 7 * 24 * 3600  # 완료/실패 작업 기록 보관 기간
+    # 업로드 캐시 키 해시 (blake2b | xxhash | md5 - md5 는 기존 캐시 파일명과 호환)
+    UPLOAD_HASH_ALGORITHM = os.environ.get('UPLOAD_HASH_ALGORITHM', 'blake2b')
     
     @staticmethod
     def validate_config():
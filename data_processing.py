@@ -2,14 +2,18 @@ import pandas as pd
 import numpy as np
 import re
 import os
+import json
 from supabase import Client
 import tempfile
 from datetime import datetime
 import chardet
+from urllib.parse import quote
 import gc
 import atexit
 from typing import Optional, Tuple, List
 
+from address_canon import canonicalize_address
+
 # 임시 파일 추적을 위한 글로벌 변수
 _temp_files: List[str] = []
 
@@ -37,131 +41,276 @@ COL_RENAME = {
     '건축 년도': '건축년도',
     ' 도로명': '도로명',
 }
+def clean_col(x):
+    x = x.strip()
+    x = re.sub(r'[\s\(\)\u33A1,\-]', '', x)
+    # '전용면적'이 포함된 모든 컬럼명을 '전용면적(\u33A1)'로 통일
+    if '전용면적' in x:
+        return '전용면적(\u33A1)'
+    if '건축년도' in x:
+        return '건축년도'
+    return x
+
+def normalized_column_map(columns):
+    """원본 컬럼명 → 정규화된 컬럼명 매핑 (clean_col 후 COL_RENAME 적용)"""
+    mapping = {}
+    for col in columns:
+        cleaned = clean_col(col)
+        mapping[col] = COL_RENAME.get(cleaned, cleaned)
+    return mapping
+
 def normalize_columns(df):
-    def clean_col(x):
-        x = x.strip()
-        x = re.sub(r'[\s\(\)\u33A1,\-]', '', x)
-        # '전용면적'이 포함된 모든 컬럼명을 '전용면적(\u33A1)'로 통일
-        if '전용면적' in x:
-            return '전용면적(\u33A1)'
-        if '건축년도' in x:
-            return '건축년도'
-        return x
-    df = df.rename(columns=clean_col)
-    df = df.rename(columns=COL_RENAME)
+    df = df.rename(columns=normalized_column_map(df.columns))
     print('==== [DEBUG] 정규화된 컬럼명:', list(df.columns))
     return df
 
-def process_uploaded_csv(file_path, center_lat=None, center_lon=None):
+# 필요한 컬럼만 추출하여 메모리 사용량 감소
+OUTPUT_COL_MAP = {
+    '시군구': '시군구',
+    '번지': '번지',
+    '단지명': '단지명',
+    '전용면적(㎡)': '전용면적(㎡)',
+    '계약년월': '계약년월',
+    '거래금액': '거래금액',
+    '층': '층',
+    '건축년도': '건축년도',
+    '도로명': '도로명',
+}
+
+# 필터 사유 코드 → 로그 출력용 이름
+FILTER_REASONS = {
+    'direct_deal': '직거래',
+    'cancelled': '해제사유발생일',
+}
+
+class FilterAuditLog:
+    """
+    필터링으로 제거된 행을 `{원본파일명}_filter_log.jsonl` 에 chunk 단위로 이어 쓰는 감사 로그.
+    한 줄에 {"row": 원본 데이터 행 번호(0부터), "reason": 사유 코드} 하나씩 기록하고
+    마지막 줄에 사유별 건수 요약을 남긴다. 제거된 행이 없으면 파일을 만들지 않는다.
+
+    mode: 'rows'(행 단위 기록) | 'summary'(요약만 기록) | 'off'(기록 안 함)
+    max_rows: 'rows' 모드에서 기록할 최대 행 수 (초과분은 요약 건수에만 반영)
+    """
+
+    def __init__(self, path, mode='rows', max_rows=None):
+        self.path = path
+        self.mode = mode
+        self.max_rows = max_rows
+        self.counts = {reason: 0 for reason in FILTER_REASONS}
+        self.logged = 0
+        self._file = None
+
+    def record(self, reason, rows):
+        """reason 사유로 제거된 행 번호(Index) 기록"""
+        self.counts[reason] += len(rows)
+        if self.mode != 'rows':
+            return
+        if self.max_rows is not None:
+            rows = rows[:max(self.max_rows - self.logged, 0)]
+        if len(rows) == 0:
+            return
+        lines = ''.join(f'{{"row": {int(row)}, "reason": "{reason}"}}\n' for row in rows)
+        self._open().write(lines)
+        self.logged += len(rows)
+
+    def close(self, summary=True):
+        """요약 줄을 쓰고 파일을 닫는다 (summary=False 면 요약 없이 닫기만 함)"""
+        total = sum(self.counts.values())
+        if summary and self.mode != 'off' and total:
+            summary = {
+                'summary': self.counts,
+                'logged': self.logged,
+                'truncated': self.mode == 'rows' and self.logged < total,
+            }
+            try:
+                self._open().write(json.dumps(summary, ensure_ascii=False) + '\n')
+            except OSError as e:
+                print(f"[ERROR] 필터링 로그 파일 저장 실패: {e}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if summary:
+                print(f"[FILTER] 필터링 로그 파일이 생성되었습니다: {self.path}")
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        return self._file
+
+def _filter_deals(df, audit):
+    """
+    직거래 / 해제사유발생일이 있는 거래를 제거하고 남은 행을 반환.
+    제거된 행 번호는 audit(FilterAuditLog) 에 기록된다.
+    """
+    # 1. '거래유형'이 '직거래'인 행 삭제
+    if '거래유형' in df.columns:
+        is_direct = (df['거래유형'] == '직거래').fillna(False)
+        if is_direct.any():
+            audit.record('direct_deal', df.index[is_direct.to_numpy(dtype=bool)])
+            df = df[~is_direct]
+
+    # 2. '해제사유발생일'에 날짜값이 있는 행 삭제
+    if '해제사유발생일' in df.columns:
+        # 실제 날짜/숫자 데이터가 있는 행을 식별 (NaT/NaN이 아닌 값)
+        # pd.to_numeric은 숫자/날짜 형식의 문자열을 숫자로 변환하고, '-' 같은 문자는 NaN으로 만듭니다.
+        numeric_dates = pd.to_numeric(df['해제사유발생일'], errors='coerce')
+        is_cancelled = numeric_dates.notna()
+        if is_cancelled.any():
+            audit.record('cancelled', df.index[is_cancelled.to_numpy(dtype=bool)])
+            # 숫자/날짜 형식의 값이 없는 행만 유지합니다.
+            df = df[~is_cancelled]
+    return df
+
+def _select_and_derive(df):
+    """출력 컬럼만 선택하고 타입 변환 및 파생 컬럼(전용평/전용평당/공급평당)을 계산"""
+    # 메모리 효율적인 컬럼 선택 (선택과 동시에 사본 생성)
+    available_cols = {k: v for k, v in OUTPUT_COL_MAP.items() if v in df.columns}
+    result_df = df[list(available_cols.values())].rename(columns={v: k for k, v in available_cols.items()})
+    
+    # 데이터 타입 최적화
+    if '거래금액' in result_df.columns:
+        result_df['거래금액'] = result_df['거래금액'].astype(str).str.replace(',', '', regex=False)
+        result_df['거래금액'] = pd.to_numeric(result_df['거래금액'], errors='coerce').astype('float32')
+    
+    # 숫자형 변환 (메모리 효율적인 타입 사용)
+    for col in ['전용면적(㎡)', '계약년월', '층', '건축년도']:
+        if col in result_df.columns:
+            result_df[col] = pd.to_numeric(result_df[col], errors='coerce').astype('float32')
+    
+    # 파생 컬럼 생성 (벡터화 연산 사용)
+    if '전용면적(㎡)' in result_df.columns:
+        result_df['전용평'] = (result_df['전용면적(㎡)'] * 0.3025).round(2).astype('float32')
+    
+    if '거래금액' in result_df.columns and '전용평' in result_df.columns:
+        mask = (result_df['거래금액'].notna()) & (result_df['전용평'].notna()) & (result_df['전용평'] > 0)
+        result_df['전용평당'] = np.where(mask, 
+                                    (result_df['거래금액'] / result_df['전용평']).round(2), 
+                                    np.nan).astype('float32')
+    
+    if '전용평당' in result_df.columns:
+        result_df['공급평당'] = (result_df['전용평당'] * 0.75).round(2).astype('float32')
+    return result_df
+
+# 원본 CSV 에서 실제로 파싱하는 컬럼과 파싱 타입 (출력 컬럼 + 필터에만 쓰는 컬럼)
+# 거래금액은 '217,000' 처럼 쉼표가 있어 문자열로 읽은 뒤 _select_and_derive 에서 변환
+INGEST_COLUMN_TYPES = {
+    '시군구': 'string',
+    '번지': 'string',
+    '단지명': 'string',
+    '전용면적(㎡)': 'float64',
+    '계약년월': 'float64',
+    '거래금액': 'string',
+    '층': 'float64',
+    '건축년도': 'float64',
+    '도로명': 'string',
+    '거래유형': 'string',
+    '해제사유발생일': 'string',
+}
+MOLIT_HEADER_ROWS = 15  # 국토부 실거래가 CSV 상단 안내 문구 행 수
+
+def resolve_ingest_columns(file_path, encoding):
+    """
+    헤더만 읽어 원본 컬럼명 → 정규화된 컬럼명 매핑을 만들고, 파싱할 컬럼만 남긴다.
+    같은 이름으로 정규화되는 컬럼이 여러 개면 첫 번째 컬럼만 사용.
+    """
+    header = pd.read_csv(file_path, encoding=encoding, skiprows=MOLIT_HEADER_ROWS, nrows=0).columns.tolist()
+    print(f"[DEBUG] Original DataFrame columns: {header}")
+    column_map = normalized_column_map(header)
+    print('==== [DEBUG] 정규화된 컬럼명:', list(column_map.values()))
+    usecols = {}
+    for raw, canonical in column_map.items():
+        if canonical in INGEST_COLUMN_TYPES and canonical not in usecols.values():
+            usecols[raw] = canonical
+    return usecols
+
+def _iter_csv_chunks(file_path, encoding, usecols, chunksize, typed=True):
+    """
+    usecols({원본 컬럼명: 정규화된 컬럼명}) 컬럼만 파싱해 정규화된 컬럼명의 DataFrame 을 chunk 단위로 반환.
+    pyarrow 가 있으면 스트리밍 CSV 리더를, 없으면 pandas C 엔진을 사용한다.
+    typed=False 면 모든 컬럼을 문자열로 읽는다 (숫자 컬럼에 예외 값이 있는 파일용).
+    인덱스는 원본 데이터 행 번호(0부터)를 유지한다.
+    """
+    dtypes = {raw: (INGEST_COLUMN_TYPES[canonical] if typed else 'string') for raw, canonical in usecols.items()}
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        pa = None
+
+    if pa is None:
+        reader = pd.read_csv(file_path, encoding=encoding, skiprows=MOLIT_HEADER_ROWS, chunksize=chunksize,
+                             usecols=list(usecols),
+                             dtype={raw: (str if t == 'string' else t) for raw, t in dtypes.items()})
+        with reader:
+            for chunk in reader:
+                yield chunk.rename(columns=usecols)
+        return
+
+    reader = pa_csv.open_csv(
+        file_path,
+        # block_size 는 바이트 단위이므로 행 수를 대략적인 행 크기로 환산
+        read_options=pa_csv.ReadOptions(skip_rows=MOLIT_HEADER_ROWS, encoding=encoding,
+                                        block_size=max(chunksize * 256, 1 << 20)),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(usecols),
+            column_types={raw: (pa.string() if t == 'string' else pa.float64()) for raw, t in dtypes.items()},
+            strings_can_be_null=True,
+        ),
+    )
+    offset = 0
+    for batch in reader:
+        chunk = batch.to_pandas().rename(columns=usecols)
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+def _stream_to_csv(file_path, encoding, usecols, chunksize, temp_path, typed, audit, progress_callback=None):
+    """
+    chunk 별로 필터/파생 컬럼 계산 후 temp_path 에 이어 쓴다. (출력 컬럼, 원본 행 수, 출력 행 수) 반환
+    progress_callback(누적 원본 행 수) 는 chunk 마다 호출된다.
+    """
+    columns = None
+    total_rows = 0
+    written_rows = 0
+    for chunk_no, chunk in enumerate(_iter_csv_chunks(file_path, encoding, usecols, chunksize, typed), start=1):
+        total_rows += len(chunk)
+        chunk = _filter_deals(chunk, audit)
+        result_chunk = _select_and_derive(chunk)
+        del chunk
+        
+        result_chunk.to_csv(temp_path, index=False, encoding='utf-8-sig' if columns is None else 'utf-8',
+                            mode='w' if columns is None else 'a', header=columns is None)
+        if columns is None:
+            columns = result_chunk.columns.tolist()
+        written_rows += len(result_chunk)
+        print(f"[DEBUG] chunk {chunk_no}: 누적 원본 {total_rows:,}건 → 처리 {written_rows:,}건")
+        if progress_callback:
+            progress_callback(total_rows)
+    return columns, total_rows, written_rows
+
+def process_uploaded_csv(file_path, center_lat=None, center_lon=None, chunksize=None, progress_callback=None):
+    """
+    업로드된 국토부 실거래가 CSV 를 chunksize 행씩 스트리밍으로 읽어
+    컬럼 정규화 → 직거래/해제 거래 필터 → 컬럼 선택/파생 컬럼 계산 후 임시 CSV 에 이어 쓴다.
+    최대 메모리 사용량은 파일 크기가 아니라 chunk 크기에 비례하며,
+    헤더를 먼저 해석해 INGEST_COLUMN_TYPES 에 있는 컬럼만 파싱한다.
+    progress_callback(누적 원본 행 수) 로 진행 상황을 전달받을 수 있다.
+    """
     global _temp_files
+    from config import Config
+    chunksize = chunksize or Config.CSV_CHUNK_SIZE
     
     # 메모리 효율적인 인코딩 감지
     with open(file_path, 'rb') as f:
         raw = f.read(10000)
         encoding = chardet.detect(raw)['encoding'] or 'utf-8'
     
-    # 청크 단위로 읽기 (메모리 효율성)
     try:
-        df = pd.read_csv(file_path, encoding=encoding, skiprows=15, low_memory=False)
-        print(f"[DEBUG] Original DataFrame shape: {df.shape}")
-        print(f"[DEBUG] Original DataFrame columns: {df.columns.tolist()}")
-        
-        # 메모리 사용량 최적화: 필요한 컬럼만 미리 필터링
-        df = normalize_columns(df)
-        print(f"[DEBUG] Normalized DataFrame shape: {df.shape}")
-
-        # --- 로깅 및 필터링 로직 추가 ---
-        log_lines = []
-        original_filename = os.path.basename(file_path)
-        log_filename = f"{os.path.splitext(original_filename)[0]}_filter_log.txt"
         # 로그 파일은 원본과 같은 디렉터리에 저장
+        original_filename = os.path.basename(file_path)
+        log_filename = f"{os.path.splitext(original_filename)[0]}_filter_log.jsonl"
         log_path = os.path.join(os.path.dirname(file_path), log_filename)
-
-        # 1. '거래유형'이 '직거래'인 행 삭제 및 로깅
-        if '거래유형' in df.columns:
-            direct_deals = df[df['거래유형'] == '직거래']
-            if not direct_deals.empty:
-                log_lines.append(f"=== '거래유형'이 '직거래'여서 삭제된 데이터 ({len(direct_deals)}건) ===")
-                log_lines.append(direct_deals.to_string())
-                log_lines.append("\n")
-                df = df[df['거래유형'] != '직거래'].copy()
-                print(f"[FILTER] '직거래' 데이터 {len(direct_deals)}건 필터링 완료")
-
-        # 2. '해제사유발생일'에 날짜값이 있는 행 삭제 및 로깅 (수정된 로직)
-        if '해제사유발생일' in df.columns:
-            # 실제 날짜/숫자 데이터가 있는 행을 식별 (NaT/NaN이 아닌 값)
-            # pd.to_numeric은 숫자/날짜 형식의 문자열을 숫자로 변환하고, '-' 같은 문자는 NaN으로 만듭니다.
-            numeric_dates = pd.to_numeric(df['해제사유발생일'], errors='coerce')
-            cancelled_deals = df[numeric_dates.notna()]
-
-            if not cancelled_deals.empty:
-                log_lines.append(f"=== '해제사유발생일'이 존재하여 삭제된 데이터 ({len(cancelled_deals)}건) ===")
-                log_lines.append(cancelled_deals.to_string())
-                log_lines.append("\n")
-                # 숫자/날짜 형식의 값이 없는 행만 유지합니다.
-                df = df[numeric_dates.isna()].copy()
-                print(f"[FILTER] '해제사유발생일' 데이터 {len(cancelled_deals)}건 필터링 완료")
-
-        # 로그 파일이 생성될 경우에만 저장
-        if log_lines:
-            try:
-                with open(log_path, 'w', encoding='utf-8') as f:
-                    f.write("\n".join(log_lines))
-                print(f"[FILTER] 필터링 로그 파일이 생성되었습니다: {log_path}")
-            except Exception as e:
-                print(f"[ERROR] 필터링 로그 파일 저장 실패: {e}")
-        # --- 필터링 로직 종료 ---
-        
-        # 필요한 컬럼만 추출하여 메모리 사용량 감소
-        col_map = {
-            '시군구': '시군구',
-            '번지': '번지',
-            '단지명': '단지명',
-            '전용면적(㎡)': '전용면적(㎡)',
-            '계약년월': '계약년월',
-            '거래금액': '거래금액',
-            '층': '층',
-            '건축년도': '건축년도',
-            '도로명': '도로명',
-        }
-        
-        # 메모리 효율적인 컬럼 선택
-        available_cols = {k: v for k, v in col_map.items() if v in df.columns}
-        result_df = df[list(available_cols.values())].copy()
-        result_df = result_df.rename(columns={v: k for k, v in available_cols.items()})
-        
-        # 원본 DataFrame 메모리 해제
-        del df
-        gc.collect()
-        
-        print(f"[DEBUG] Result DataFrame shape: {result_df.shape}")
-        
-        # 데이터 타입 최적화
-        if '거래금액' in result_df.columns:
-            result_df['거래금액'] = result_df['거래금액'].astype(str).str.replace(',', '', regex=False)
-            result_df['거래금액'] = pd.to_numeric(result_df['거래금액'], errors='coerce').astype('float32')
-        
-        # 숫자형 변환 (메모리 효율적인 타입 사용)
-        for col in ['전용면적(㎡)', '계약년월', '층', '건축년도']:
-            if col in result_df.columns:
-                result_df[col] = pd.to_numeric(result_df[col], errors='coerce').astype('float32')
-        
-        # 파생 컬럼 생성 (벡터화 연산 사용)
-        if '전용면적(㎡)' in result_df.columns:
-            result_df['전용평'] = (result_df['전용면적(㎡)'] * 0.3025).round(2).astype('float32')
-        
-        if '거래금액' in result_df.columns and '전용평' in result_df.columns:
-            mask = (result_df['거래금액'].notna()) & (result_df['전용평'].notna()) & (result_df['전용평'] > 0)
-            result_df['전용평당'] = np.where(mask, 
-                                        (result_df['거래금액'] / result_df['전용평']).round(2), 
-                                        np.nan).astype('float32')
-        
-        if '전용평당' in result_df.columns:
-            result_df['공급평당'] = (result_df['전용평당'] * 0.75).round(2).astype('float32')
-        
-        # 인덱스 초기화
-        result_df = result_df.reset_index(drop=True)
-        columns = result_df.columns.tolist()
         
         # 임시 파일로 저장
         temp_dir = tempfile.gettempdir()
@@ -171,7 +320,36 @@ def process_uploaded_csv(file_path, center_lat=None, center_lon=None):
         # 임시 파일 추적 목록에 추가
         _temp_files.append(temp_path)
         
-        result_df.to_csv(temp_path, index=False, encoding='utf-8-sig')
+        # 헤더를 먼저 읽어 필요한 컬럼만 청크 단위로 파싱 (메모리 효율성)
+        usecols = resolve_ingest_columns(file_path, encoding)
+        audit = FilterAuditLog(log_path, Config.FILTER_LOG_MODE, Config.FILTER_LOG_MAX_ROWS)
+        try:
+            columns, total_rows, written_rows = _stream_to_csv(
+                file_path, encoding, usecols, chunksize, temp_path, typed=True, audit=audit,
+                progress_callback=progress_callback)
+        except (ValueError, TypeError) as e:
+            # 숫자 컬럼에 '-' 등 예외 값이 있으면 문자열로 다시 읽어 to_numeric(coerce) 로 변환
+            print(f"[DEBUG] 숫자 컬럼 직접 파싱 실패, 문자열로 다시 읽습니다: {e}")
+            audit.close(summary=False)
+            audit = FilterAuditLog(log_path, Config.FILTER_LOG_MODE, Config.FILTER_LOG_MAX_ROWS)
+            columns, total_rows, written_rows = _stream_to_csv(
+                file_path, encoding, usecols, chunksize, temp_path, typed=False, audit=audit,
+                progress_callback=progress_callback)
+        
+        # 데이터 행이 없는 파일은 헤더만 가진 결과 파일 생성
+        if columns is None:
+            header = pd.DataFrame(columns=list(usecols.values()))
+            result_df = _select_and_derive(header)
+            result_df.to_csv(temp_path, index=False, encoding='utf-8-sig')
+            columns = result_df.columns.tolist()
+        
+        for reason, label in FILTER_REASONS.items():
+            if audit.counts[reason]:
+                print(f"[FILTER] '{label}' 데이터 {audit.counts[reason]}건 필터링 완료")
+        audit.close()
+        gc.collect()
+        
+        print(f"[DEBUG] Result DataFrame shape: ({written_rows}, {len(columns)})")
         print(f"[DEBUG] Processed CSV saved to: {temp_path}")
         
         return temp_path, columns
@@ -180,6 +358,9 @@ def process_uploaded_csv(file_path, center_lat=None, center_lon=None):
         print(f"[ERROR] CSV 처리 중 오류 발생: {e}")
         raise
 
+# get_stats 에 필요한 컬럼 (분석 페이지에서 이 컬럼만 읽음)
+STATS_COLUMNS = ['전용면적(\u33A1)', '거래금액', '시군구', '단지명']
+
 def get_stats(df):
     return {
         'total_count': len(df),
@@ -210,11 +391,155 @@ def _decode_supabase_strings(df, columns_to_decode):
             df[col] = df[col].apply(lambda x: x.encode('latin1').decode('utf-8') if isinstance(x, str) else x)
     return df
 
-def match_with_supabase(df, supabase: Client):
+APT_MASTER_TABLE = 'apt_master_info'
+APT_MASTER_COLUMNS = ['apt_nm', 'la', 'lo', 'lnno_adres']
+
+def _chunk_names_for_url(names, max_chars):
+    """in_ 필터 값 목록을 URL 인코딩 길이 기준으로 나눈다 (PostgREST GET URL 길이 제한 대응)"""
+    chunks, current, length = [], [], 0
+    for name in names:
+        cost = len(quote(str(name), safe='')) + 9  # 따옴표("), 쉼표 인코딩 여유분
+        if current and length + cost > max_chars:
+            chunks.append(current)
+            current, length = [], 0
+        current.append(name)
+        length += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+def fetch_apt_master_coords(supabase: Client, complex_names, max_url_chars=None, page_size=1000):
+    """
+    apt_master_info 에서 complex_names 에 해당하는 단지 좌표를 in_ 쿼리 몇 번으로 일괄 조회.
+    반환: apt_nm, la, lo, lnno_adres 컬럼의 DataFrame
+    """
+    from config import Config
+    if max_url_chars is None:
+        max_url_chars = Config.SUPABASE_IN_QUERY_MAX_CHARS
+    
+    rows = []
+    request_count = 0
+    for chunk in _chunk_names_for_url(complex_names, max_url_chars):
+        offset = 0
+        while True:
+            response = supabase.table(APT_MASTER_TABLE) \
+                .select(', '.join(APT_MASTER_COLUMNS)) \
+                .in_('apt_nm', chunk) \
+                .range(offset, offset + page_size - 1) \
+                .execute()
+            request_count += 1
+            data = response.data or []
+            rows.extend(data)
+            if len(data) < page_size:
+                break
+            offset += page_size
+    print(f"[DEBUG] apt_master_info 일괄 조회: 단지명 {len(complex_names)}개, 요청 {request_count}회, 결과 {len(rows)}건")
+    return pd.DataFrame(rows, columns=APT_MASTER_COLUMNS)
+
+def sync_apt_master_snapshot(supabase: Client, path=None, page_size=1000):
+    """apt_master_info 전체 좌표를 페이지 단위로 받아 로컬 Parquet 스냅샷으로 저장"""
+    from config import Config
+    path = path or Config.APT_MASTER_SNAPSHOT_PATH
+    rows, offset = [], 0
+    while True:
+        data = supabase.table(APT_MASTER_TABLE) \
+            .select(', '.join(APT_MASTER_COLUMNS)) \
+            .range(offset, offset + page_size - 1) \
+            .execute().data or []
+        rows.extend(data)
+        if len(data) < page_size:
+            break
+        offset += page_size
+    snapshot = pd.DataFrame(rows, columns=APT_MASTER_COLUMNS)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    snapshot.to_parquet(path, index=False)
+    print(f"[DEBUG] apt_master_info 스냅샷 저장: {path} ({len(snapshot)}건)")
+    return path, len(snapshot)
+
+def load_apt_master_snapshot(path=None):
+    """로컬 스냅샷이 있으면 DataFrame 으로 반환, 없으면 None"""
+    from config import Config
+    path = path or Config.APT_MASTER_SNAPSHOT_PATH
+    if not path or not os.path.exists(path):
+        return None
+    return pd.read_parquet(path, columns=APT_MASTER_COLUMNS)
+
+def resolve_complex_coordinates(missing_df, master):
+    """
+    좌표 없는 행들을 apt_master_info 결과와 단지명 + 시(도) 기준으로 벡터화 조인.
+    시군구가 있으면 lnno_adres 가 같은 시(도)로 시작하는 단지만, 없으면 단지명만으로 매칭한다.
+    반환: missing_df 와 같은 인덱스의 위도/경도 DataFrame (매칭 실패는 NaN)
+    """
+    result = pd.DataFrame({'위도': np.nan, '경도': np.nan}, index=missing_df.index)
+    if master is None or master.empty or missing_df.empty:
+        return result
+    
+    master = master.copy()
+    master['la'] = pd.to_numeric(master['la'], errors='coerce')
+    master['lo'] = pd.to_numeric(master['lo'], errors='coerce')
+    master = master[master['la'].notna() & master['lo'].notna() & (master['la'] != 0) & (master['lo'] != 0)]
+    master['apt_nm'] = master['apt_nm'].astype(str)
+    master['city'] = master['lnno_adres'].fillna('').astype(str).str.split().str[0].fillna('')
+    by_city = master.drop_duplicates(['apt_nm', 'city'])[['apt_nm', 'city', 'la', 'lo']]
+    by_name = master.drop_duplicates('apt_nm')[['apt_nm', 'la', 'lo']]
+    
+    regions = missing_df['시군구'] if '시군구' in missing_df.columns else pd.Series('', index=missing_df.index)
+    keys = pd.DataFrame({
+        'apt_nm': missing_df['단지명'].astype(str).str[:50].to_numpy(),
+        'city': regions.fillna('').astype(str).str.split().str[0].fillna('').to_numpy(),
+    })
+    # left merge 는 왼쪽 행 순서를 유지하므로 결과 배열을 그대로 인덱스에 맞출 수 있다
+    city_match = keys.merge(by_city, on=['apt_nm', 'city'], how='left')
+    name_match = keys.merge(by_name, on='apt_nm', how='left')
+    use_city = (keys['city'] != '').to_numpy()
+    has_name = missing_df['단지명'].notna().to_numpy()
+    
+    result['위도'] = np.where(has_name, np.where(use_city, city_match['la'], name_match['la']), np.nan)
+    result['경도'] = np.where(has_name, np.where(use_city, city_match['lo'], name_match['lo']), np.nan)
+    return result
+
+# 같은 거래로 보는 컬럼 조합 (중복 제거, 증분 병합 기준)
+DEDUP_KEY_COLUMNS = ['시군구', '번지', '단지명', '전용면적(㎡)', '계약년월', '거래금액', '층', '건축년도']
+
+def build_address_keys(df):
+    """
+    행별 '시군구 번지' 주소 키 Series 를 반환 (시군구/번지가 비어 있으면 NA).
+    키는 지오코딩 캐시와 같은 정규 표기(address_canon.canonicalize_address)로 맞춘다.
+    """
+    if '시군구' not in df.columns or '번지' not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype='string')
+    sigungu = df['시군구'].astype('string').str.strip()
+    bunji = df['번지'].astype('string').str.strip()
+    valid = sigungu.fillna('').ne('') & bunji.fillna('').ne('')
+    keys = (sigungu + ' ' + bunji).str.strip().where(valid, pd.NA)
+    # 고유 키만 정규화해서 행에 매핑
+    unique_keys = keys.dropna().unique()
+    return keys.map(dict(zip(unique_keys, map(canonicalize_address, unique_keys)))).astype('string')
+
+def coordinate_table(geocoded):
+    """{키: (위도, 경도)} 결과에서 좌표가 있는 항목만 위도/경도 DataFrame (인덱스=키) 으로 변환"""
+    table = pd.DataFrame.from_dict(geocoded, orient='index', columns=['위도', '경도'], dtype='float64') \
+        if geocoded else pd.DataFrame(columns=['위도', '경도'], dtype='float64')
+    return table[table['위도'].notna() & table['경도'].notna() & (table['위도'] != 0) & (table['경도'] != 0)]
+
+def apply_coordinates(df, keys, table):
+    """keys(행별 키) 를 좌표 테이블에 map 하여 찾은 행에만 위도/경도를 기록 (in-place)"""
+    if table.empty:
+        return df
+    lat = keys.map(table['위도'])
+    lon = keys.map(table['경도'])
+    found = lat.notna().to_numpy()
+    df.loc[found, '위도'] = lat[found].to_numpy(dtype='float64')
+    df.loc[found, '경도'] = lon[found].to_numpy(dtype='float64')
+    return df
+
+def match_with_supabase(df, supabase: Client, progress_callback=None, known_locations=None):
     """
     Supabase에서 기존 좌표 조회 후, 없으면 Kakao API로 새로 획득
+    progress_callback(완료 건수, 전체 건수) 는 1단계 주소 지오코딩 진행 상황을 전달받는다.
+    known_locations(주소 키 인덱스의 위도/경도 DataFrame)가 있으면 해당 주소는 다시 지오코딩하지 않는다.
     """
-    from map_utils import get_latlon_from_address
+    from map_utils import geocode_addresses_concurrently
     
     print("[DEBUG] Supabase 매칭 재활성화")
     df['위도'] = np.nan
@@ -223,111 +548,68 @@ def match_with_supabase(df, supabase: Client):
     # 1단계: 시군구+번지 조합으로 효율적 좌표 조회
     print("[DEBUG] 1단계: 시군구+번지 기반 효율적 좌표 조회...")
     
-    # 고유한 시군구+번지 조합 생성 (최대 50개)
-    unique_addresses = []
-    address_to_rows = {}  # 주소 -> 해당하는 DataFrame 인덱스들
-    
-    for idx, row in df.iterrows():
-        if row.get('시군구') and row.get('번지'):
-            addr_key = f"{row.get('시군구', '')} {row.get('번지', '')}".strip()
-            if addr_key not in address_to_rows:
-                unique_addresses.append(addr_key)
-                address_to_rows[addr_key] = []
-            address_to_rows[addr_key].append(idx)
-    
-    # 최대 50개 주소만 처리 (너무 많으면 제한)
-    unique_addresses = unique_addresses[:50]
+    # 고유한 시군구+번지 조합 생성 (벡터화 문자열 결합)
+    address_keys = build_address_keys(df)
+    unique_addresses = address_keys.dropna().unique().tolist()
+    if known_locations is not None and not known_locations.empty:
+        # 기존 데이터셋에서 이미 좌표를 얻은 주소는 그대로 적용
+        apply_coordinates(df, address_keys, known_locations)
+        known = set(known_locations.index)
+        total_addresses = len(unique_addresses)
+        unique_addresses = [address for address in unique_addresses if address not in known]
+        print(f"[DEBUG] 기존 좌표 재사용 주소: {total_addresses - len(unique_addresses)}개")
     print(f"[DEBUG] 처리할 고유 주소: {len(unique_addresses)}개")
     
-    # Kakao API로 주소별 좌표 조회
-    location_cache = {}
-    for addr in unique_addresses:
-        if addr not in location_cache:
-            print(f"[DEBUG] Kakao API 조회: {addr}")
-            lat, lon = get_latlon_from_address(addr)
-            if lat and lon:
-                location_cache[addr] = (lat, lon)
-                print(f"[DEBUG] Kakao API 성공: {addr} -> {lat}, {lon}")
-                
-                # 같은 주소를 가진 모든 행에 좌표 적용
-                for row_idx in address_to_rows[addr]:
-                    df.at[row_idx, '위도'] = lat
-                    df.at[row_idx, '경도'] = lon
-            else:
-                print(f"[DEBUG] Kakao API 실패: {addr}")
+    # Kakao API로 주소별 좌표 동시 조회 (토큰 버킷으로 호출 속도 제한)
+    geocoded = geocode_addresses_concurrently(unique_addresses, progress_callback=progress_callback)
+    location_table = coordinate_table(geocoded)
+    # 같은 주소를 가진 모든 행에 좌표 적용
+    apply_coordinates(df, address_keys, location_table)
+    failed = len(unique_addresses) - len(location_table)
+    if failed:
+        print(f"[DEBUG] Kakao API 실패: {failed}개 주소")
     
-    print(f"[DEBUG] 1단계 완료: {len(location_cache)}개 주소 좌표 획득")
+    print(f"[DEBUG] 1단계 완료: {len(location_table)}개 주소 좌표 획득")
     
-    # 2단계: 좌표가 없는 데이터는 Supabase DB에서 단지명으로 조회
-    print("[DEBUG] 2단계: Supabase DB 단지명 조회 (백업)...")
+    # 2단계: 좌표가 없는 데이터는 Supabase DB에서 단지명으로 일괄 조회
+    print("[DEBUG] 2단계: Supabase DB 단지명 일괄 조회 (백업)...")
     missing_coords = df[df['위도'].isna()]
     
-    if not missing_coords.empty:
+    if not missing_coords.empty and '단지명' in df.columns:
         try:
-            unique_complexes = missing_coords['단지명'].dropna().unique()[:20]
+            unique_complexes = missing_coords['단지명'].dropna().astype(str).str[:50].unique().tolist()
+            master = load_apt_master_snapshot()
+            if master is None:
+                master = fetch_apt_master_coords(supabase, unique_complexes)
+            else:
+                print(f"[DEBUG] apt_master_info 로컬 스냅샷 사용: {len(master)}건")
             
-            for complex_name in unique_complexes:
-                try:
-                    # 해당 단지명을 가진 첫 번째 행에서 시군구 정보 추출
-                    sample_row = missing_coords[missing_coords['단지명'] == complex_name].iloc[0]
-                    region = sample_row.get('시군구', '')
-                    city_name = region.split()[0] if region else ''
-                    
-                    if city_name:
-                        response = supabase.table('apt_master_info') \
-                            .select('apt_nm, la, lo, lnno_adres') \
-                            .eq('apt_nm', str(complex_name)[:50]) \
-                            .ilike('lnno_adres', f'{city_name}%') \
-                            .limit(1) \
-                            .execute()
-                    else:
-                        response = supabase.table('apt_master_info') \
-                            .select('apt_nm, la, lo') \
-                            .eq('apt_nm', str(complex_name)[:50]) \
-                            .limit(1) \
-                            .execute()
-                    
-                    if response.data and response.data[0].get('la') and response.data[0].get('lo'):
-                        lat, lon = response.data[0]['la'], response.data[0]['lo']
-                        # 해당 단지명을 가진 모든 행에 좌표 적용
-                        mask = df['단지명'] == complex_name
-                        df.loc[mask, '위도'] = lat
-                        df.loc[mask, '경도'] = lon
-                        print(f"[DEBUG] Supabase 조회 성공: {complex_name} -> {lat}, {lon}")
-                        
-                except Exception as e:
-                    print(f"[DEBUG] Supabase 조회 오류: {e}")
-                    
+            resolved = resolve_complex_coordinates(missing_coords, master)
+            found = resolved['위도'].notna()
+            df.loc[resolved.index[found], '위도'] = resolved.loc[found, '위도']
+            df.loc[resolved.index[found], '경도'] = resolved.loc[found, '경도']
+            print(f"[DEBUG] Supabase 일괄 조회 결과: 단지 {len(unique_complexes)}개, 좌표 적용 {int(found.sum())}건")
         except Exception as e:
             print(f"[DEBUG] Supabase 연결 오류: {e}")
     
     # 3단계: 여전히 좌표가 없는 데이터는 시군구 중심 좌표 사용
     print("[DEBUG] 3단계: 시군구 중심 좌표 적용 (최종 백업)...")
-    final_missing = df[df['위도'].isna()]
+    final_missing = df['위도'].isna()
     
-    if not final_missing.empty:
-        district_cache = {}
-        for idx, row in final_missing.iterrows():
-            district = row.get('시군구', '').strip()
-            if district and district not in district_cache:
-                print(f"[DEBUG] 시군구 중심 좌표 조회: {district}")
-                lat, lon = get_latlon_from_address(district)
-                if lat and lon:
-                    district_cache[district] = (lat, lon)
-                    print(f"[DEBUG] 시군구 중심 좌표 성공: {district} -> {lat}, {lon}")
-            
-            if district in district_cache:
-                lat, lon = district_cache[district]
-                df.at[idx, '위도'] = lat
-                df.at[idx, '경도'] = lon
+    if final_missing.any() and '시군구' in df.columns:
+        districts = df['시군구'].where(final_missing).astype('string').str.strip().replace('', pd.NA)
+        unique_districts = districts.dropna().unique().tolist()
+        print(f"[DEBUG] 시군구 중심 좌표 조회: {len(unique_districts)}개")
+        district_table = coordinate_table(geocode_addresses_concurrently(unique_districts))
+        apply_coordinates(df, districts, district_table)
+        print(f"[DEBUG] 시군구 중심 좌표 성공: {len(district_table)}/{len(unique_districts)}개")
     
     print(f"[DEBUG] 좌표 조회 완료: 전체 {len(df)}건 중 {len(df.dropna(subset=['위도', '경도']))}건 좌표 보유")
     
     # 중복 제거
     print("[DEBUG] 중복 제거 시작...")
     original_count = len(df)
-    key_columns = ['시군구', '번지', '단지명', '전용면적(㎡)', '계약년월', '거래금액', '층', '건축년도']
-    available_key_columns = [col for col in key_columns if col in df.columns]
+    available_key_columns = [col for col in DEDUP_KEY_COLUMNS if col in df.columns]
     
     if available_key_columns:
         df = df.drop_duplicates(subset=available_key_columns, keep='first')
@@ -0,0 +1,153 @@
+"""
+분석 완료 데이터셋의 프로세스 내 DataFrame 캐시 모듈
+
+`{file_hash}_분석완료.parquet` 를 요청마다 다시 파싱하지 않도록
+파싱/타입 변환이 끝난 DataFrame 을 메모리 한도 내에서 LRU 로 보관한다.
+캐시 키는 (파일 해시, 읽은 컬럼 목록)이며, 파일 수정시각이 바뀌면 해당 파일의 항목은 모두 무효화된다.
+
+주의: 반환된 DataFrame 은 여러 요청이 공유하므로 직접 수정하지 말고
+필터링 결과(copy)나 새 컬럼이 필요한 경우 사본에서 작업해야 한다.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from dataset_store import read_analyzed, ANALYZED_SUFFIX
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512MB
+
+CacheKey = Tuple[str, Optional[Tuple[str, ...]]]
+
+
+def dataset_key(path: str) -> str:
+    """분석 파일 경로에서 캐시 키(파일 해시)를 추출. 규칙에 맞지 않으면 파일명 사용"""
+    name = os.path.basename(path)
+    if ANALYZED_SUFFIX in name:
+        return name.split(ANALYZED_SUFFIX)[0]
+    return name
+
+
+class DataFrameCache:
+    """바이트 단위 용량 한도를 갖는 스레드 안전 LRU DataFrame 캐시"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # (파일 해시, 컬럼) -> (파일 수정시각, 크기(bytes), DataFrame)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, pd.DataFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, path: str, columns: Optional[List[str]] = None, loader=read_analyzed) -> pd.DataFrame:
+        """
+        캐시에서 path 의 DataFrame 을 반환. 없거나 파일이 바뀌었으면 loader 로 읽어 저장.
+        columns 를 주면 해당 컬럼만 읽으며, 전체 컬럼이 이미 캐시되어 있으면 거기서 잘라 쓴다.
+        """
+        file_key = dataset_key(path)
+        key: CacheKey = (file_key, tuple(columns) if columns is not None else None)
+        full_key: CacheKey = (file_key, None)
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            for lookup in (key, full_key):
+                entry = self._entries.get(lookup)
+                if entry is None:
+                    continue
+                if entry[0] != mtime:
+                    self._remove_file(file_key)
+                    self.invalidations += 1
+                    break
+                self._entries.move_to_end(lookup)
+                self.hits += 1
+                if lookup == key:
+                    return entry[2]
+                return entry[2][[col for col in columns if col in entry[2].columns]]
+            self.misses += 1
+
+        # 파싱은 락 밖에서 수행 (같은 파일 동시 요청 시 중복 파싱될 수 있으나 결과는 동일)
+        df = loader(path, columns)
+        size = int(df.memory_usage(deep=True).sum())
+        print(f"[CACHE] 데이터셋 로드: {os.path.basename(path)} "
+              f"({len(df):,}건, {len(df.columns)}컬럼, {size / 1024 / 1024:.1f}MB)")
+
+        with self._lock:
+            if size > self.max_bytes:
+                print(f"[CACHE] 캐시 한도({self.max_bytes / 1024 / 1024:.0f}MB)보다 커서 캐시하지 않습니다.")
+                return df
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (mtime, size, df)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                self.evictions += 1
+                print(f"[CACHE] LRU 제거: {evicted_key[0]}")
+        return df
+
+    def invalidate(self, path: str) -> bool:
+        """path 에 해당하는 항목을 모두 제거. 제거했으면 True"""
+        with self._lock:
+            removed = self._remove_file(dataset_key(path))
+            if removed:
+                self.invalidations += 1
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def info(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'keys': [key[0] for key in self._entries],
+            }
+
+    def _remove(self, key: CacheKey):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _remove_file(self, file_key: str) -> bool:
+        keys = [key for key in self._entries if key[0] == file_key]
+        for key in keys:
+            self._remove(key)
+        return bool(keys)
+
+
+# 애플리케이션 공용 캐시 인스턴스
+_dataframe_cache = DataFrameCache()
+
+
+def configure(max_bytes: Optional[int] = None):
+    """공용 캐시의 용량 한도를 설정 (create_app 에서 호출)"""
+    if max_bytes is not None:
+        _dataframe_cache.max_bytes = max_bytes
+
+
+def load_dataset(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """공용 캐시를 통해 분석 완료 데이터셋을 읽는다 (반환값은 읽기 전용으로 사용)"""
+    return _dataframe_cache.get(path, columns)
+
+
+def invalidate_dataset(path: str) -> bool:
+    return _dataframe_cache.invalidate(path)
+
+
+def get_dataset_cache_info() -> Dict:
+    return _dataframe_cache.info()
@@ -0,0 +1,64 @@
+"""
+증분 업로드 병합 모듈
+
+새 월별 실거래 파일을 기존 분석 데이터셋에 추가할 때 사용한다.
+- 중복 키(DEDUP_KEY_COLUMNS) 해시로 기존 데이터셋에 없는 거래만 골라낸다.
+- 기존 데이터셋에서 이미 좌표를 얻은 주소는 재사용하므로 새 주소만 지오코딩한다.
+- 병합 결과는 기존 행 뒤에 새 행을 붙인 순서이므로 공간 인덱스/구간 비트맵을 증분 갱신할 수 있다.
+
+병합 결과는 `{md5(기존 데이터셋 키 + 새 파일 해시)}_분석완료.parquet` 로 저장되어
+같은 파일을 같은 데이터셋에 다시 병합하면 캐시를 그대로 사용한다.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from data_processing import DEDUP_KEY_COLUMNS, build_address_keys
+from dataset_store import coerce_analyzed_dtypes, STRING_COLUMNS
+
+
+def merged_dataset_hash(base_key: str, file_hash: str) -> str:
+    """기존 데이터셋 키와 새 업로드 파일 해시로 병합 결과 파일 해시를 만든다"""
+    return hashlib.md5(f'{base_key}+{file_hash}'.encode('utf-8')).hexdigest()
+
+
+def dedup_key_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    행별 중복 키 해시(uint64). 저장 타입이 달라도 같은 값이면 같은 해시가 되도록
+    문자열 컬럼은 공백 제거 문자열, 숫자 컬럼은 float32 로 맞춘 뒤 계산한다.
+    """
+    columns = [col for col in DEDUP_KEY_COLUMNS if col in df.columns]
+    keys = pd.DataFrame(index=df.index)
+    for col in columns:
+        if col in STRING_COLUMNS:
+            keys[col] = df[col].astype('string').str.strip().fillna('')
+        else:
+            keys[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def select_new_rows(existing: pd.DataFrame, incoming: pd.DataFrame) -> pd.DataFrame:
+    """incoming 중 기존 데이터셋에 없는 거래만 반환 (incoming 내부 중복은 첫 행만 유지)"""
+    incoming_keys = dedup_key_hashes(incoming)
+    is_new = ~np.isin(incoming_keys, dedup_key_hashes(existing))
+    is_new &= ~pd.Series(incoming_keys).duplicated().to_numpy()
+    return incoming[is_new]
+
+
+def known_location_table(existing: pd.DataFrame) -> pd.DataFrame:
+    """기존 데이터셋의 '시군구 번지' 주소 키 → 좌표 테이블 (match_with_supabase 의 known_locations)"""
+    if '위도' not in existing.columns or '경도' not in existing.columns:
+        return pd.DataFrame(columns=['위도', '경도'], dtype='float64')
+    table = pd.DataFrame({
+        'key': build_address_keys(existing),
+        '위도': pd.to_numeric(existing['위도'], errors='coerce'),
+        '경도': pd.to_numeric(existing['경도'], errors='coerce'),
+    }).dropna()
+    return table.drop_duplicates('key').set_index('key')[['위도', '경도']].astype('float64')
+
+
+def merge_datasets(existing: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """기존 행 뒤에 새 행을 붙인 분석 데이터셋 (저장 스키마 타입으로 정리)"""
+    new_rows = new_rows.reindex(columns=existing.columns)
+    return coerce_analyzed_dtypes(pd.concat([existing, new_rows], ignore_index=True))
@@ -0,0 +1,137 @@
+"""
+분석 완료 데이터셋 저장소 모듈 (Parquet)
+
+분석 캐시는 `{file_hash}_분석완료.parquet` 로 저장한다.
+텍스트 CSV 와 달리 float32 등 컬럼 타입이 그대로 보존되고,
+필요한 컬럼만 읽는 column projection 이 가능하다.
+CSV 는 /download 내보내기 용도로만 사용한다.
+
+기존 `_분석완료.csv` 캐시는 아래 명령으로 변환할 수 있다.
+    python dataset_store.py migrate [uploads] [--remove-csv]
+"""
+import argparse
+import glob
+import os
+from typing import List, Optional
+
+import pandas as pd
+
+ANALYZED_SUFFIX = '_분석완료'
+PARQUET_EXT = '.parquet'
+LEGACY_CSV_EXT = '.csv'
+
+# 문자열로 유지해야 하는 컬럼 (번지 '1487-63' 등이 숫자로 해석되지 않도록)
+STRING_COLUMNS = ['시군구', '번지', '단지명', '도로명']
+# process_uploaded_csv 가 float32 로 만드는 컬럼
+FLOAT32_COLUMNS = ['전용면적(㎡)', '계약년월', '거래금액', '층', '건축년도',
+                   '전용평', '전용평당', '공급평당']
+# 좌표는 float32 로 줄이면 약 1m 오차가 생기므로 float64 유지
+FLOAT64_COLUMNS = ['위도', '경도']
+
+
+def analyzed_path_for(upload_folder: str, file_hash: str) -> str:
+    """파일 해시에 대응하는 분석 캐시 경로"""
+    return os.path.join(upload_folder, f'{file_hash}{ANALYZED_SUFFIX}{PARQUET_EXT}')
+
+
+def legacy_csv_path_for(upload_folder: str, file_hash: str) -> str:
+    return os.path.join(upload_folder, f'{file_hash}{ANALYZED_SUFFIX}{LEGACY_CSV_EXT}')
+
+
+def list_analyzed_files(upload_folder: str) -> List[str]:
+    """업로드 폴더의 분석 캐시 파일 목록 (Parquet 와 변환되지 않은 CSV)"""
+    parquet_files = glob.glob(os.path.join(upload_folder, f'*{ANALYZED_SUFFIX}{PARQUET_EXT}'))
+    converted = {os.path.splitext(p)[0] for p in parquet_files}
+    legacy_files = [p for p in glob.glob(os.path.join(upload_folder, f'*{ANALYZED_SUFFIX}{LEGACY_CSV_EXT}'))
+                    if os.path.splitext(p)[0] not in converted]
+    return parquet_files + legacy_files
+
+
+def coerce_analyzed_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """분석 데이터셋 컬럼 타입을 저장 스키마에 맞게 정리 (새 DataFrame 반환)"""
+    df = df.copy()
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str)).astype(object)
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    for col in FLOAT64_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    return df
+
+
+def write_analyzed(df: pd.DataFrame, path: str):
+    """분석 데이터셋을 Parquet 로 저장 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = f"{path}.tmp"
+    coerce_analyzed_dtypes(df).to_parquet(tmp_path, index=False, engine='pyarrow', compression='snappy')
+    os.replace(tmp_path, path)
+
+
+def read_analyzed(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    분석 데이터셋을 읽는다. columns 를 주면 해당 컬럼만 읽는다 (없는 컬럼은 무시).
+    변환되지 않은 기존 CSV 캐시도 읽을 수 있다.
+    """
+    if path.endswith(PARQUET_EXT):
+        if columns is not None:
+            available = set(read_columns(path))
+            columns = [col for col in columns if col in available]
+        return pd.read_parquet(path, columns=columns, engine='pyarrow')
+
+    df = pd.read_csv(path, encoding='utf-8-sig',
+                     dtype={col: str for col in STRING_COLUMNS},
+                     usecols=(lambda col: col in columns) if columns is not None else None)
+    return coerce_analyzed_dtypes(df)
+
+
+def read_columns(path: str) -> List[str]:
+    """데이터를 읽지 않고 컬럼 목록만 반환"""
+    if path.endswith(PARQUET_EXT):
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    return pd.read_csv(path, encoding='utf-8-sig', nrows=0).columns.tolist()
+
+
+def migrate_csv_cache(csv_path: str, remove_csv: bool = False) -> str:
+    """기존 `_분석완료.csv` 하나를 Parquet 로 변환하고 새 경로를 반환"""
+    parquet_path = os.path.splitext(csv_path)[0] + PARQUET_EXT
+    df = read_analyzed(csv_path)
+    write_analyzed(df, parquet_path)
+    print(f"[STORE] 변환 완료: {csv_path} → {parquet_path} "
+          f"({os.path.getsize(csv_path):,} → {os.path.getsize(parquet_path):,} bytes)")
+    if remove_csv:
+        os.remove(csv_path)
+        print(f"[STORE] 기존 CSV 삭제: {csv_path}")
+    return parquet_path
+
+
+def migrate_folder(upload_folder: str, remove_csv: bool = False) -> List[str]:
+    """폴더 내 변환되지 않은 모든 `_분석완료.csv` 를 Parquet 로 변환"""
+    migrated = []
+    for path in list_analyzed_files(upload_folder):
+        if not path.endswith(LEGACY_CSV_EXT):
+            continue
+        try:
+            migrated.append(migrate_csv_cache(path, remove_csv=remove_csv))
+        except Exception as e:
+            print(f"[STORE] 변환 실패: {path}, 오류: {e}")
+    print(f"[STORE] 총 {len(migrated)}개 파일 변환")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='분석 캐시 저장소 관리')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('migrate', help='기존 _분석완료.csv 캐시를 Parquet 로 변환')
+    p.add_argument('folder', nargs='?', default='uploads')
+    p.add_argument('--remove-csv', action='store_true', help='변환 후 기존 CSV 삭제')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        migrate_folder(args.folder, remove_csv=args.remove_csv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+필터 결과 다운로드 스트리밍 모듈
+
+query_engine.QueryResult 의 행을 chunk_rows 단위로 직렬화해 바로 내보내는 generator 를 제공한다.
+전체 결과를 BytesIO 에 만들지 않으므로 내보내기 크기와 관계없이 메모리 사용량은 chunk 크기에 비례한다.
+
+- csv     : UTF-8 BOM + 헤더 후 행 chunk (기존 to_csv(encoding='utf-8-sig') 와 같은 내용)
+- parquet : chunk 마다 row group 하나씩 기록
+- gzip    : csv 출력을 스트리밍 gzip 으로 압축
+"""
+import zlib
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+UTF8_BOM = '\ufeff'
+
+
+def _chunks(result, df: pd.DataFrame, order: np.ndarray, distance_col: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(order), chunk_rows):
+        yield result.frame(df, order[start:start + chunk_rows], distance_col=distance_col)
+
+
+def iter_csv(result, df: pd.DataFrame, order: np.ndarray, distance_col: str, chunk_rows: int) -> Iterator[bytes]:
+    """CSV 바이트 chunk generator (첫 chunk 에 BOM 과 헤더 포함)"""
+    columns: List[str] = df.columns.tolist()
+    if distance_col not in columns:
+        columns.append(distance_col)
+    yield (UTF8_BOM + pd.DataFrame(columns=columns).to_csv(index=False)).encode('utf-8')
+    for frame in _chunks(result, df, order, distance_col, chunk_rows):
+        yield frame.to_csv(index=False, header=False).encode('utf-8')
+
+
+def gzip_stream(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """바이트 chunk 를 스트리밍 gzip 으로 압축"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip 헤더/트레일러
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _DrainSink:
+    """ParquetWriter 출력 바이트를 모아 두었다가 drain() 으로 꺼내는 쓰기 전용 파일 객체"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _arrow_schema(df: pd.DataFrame, distance_col: str):
+    """chunk 마다 타입이 달라지지 않도록 데이터셋 dtype 기준으로 고정한 스키마 (나머지는 문자열)"""
+    import pyarrow as pa
+
+    fields = []
+    for col in df.columns:
+        dtype = df[col].dtype
+        if col in ('위도', '경도') or dtype == 'float64':
+            fields.append(pa.field(col, pa.float64()))
+        elif dtype == 'float32':
+            fields.append(pa.field(col, pa.float32()))
+        elif pd.api.types.is_integer_dtype(dtype):
+            fields.append(pa.field(col, pa.int64()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    if distance_col not in df.columns:
+        fields.append(pa.field(distance_col, pa.float64()))
+    return pa.schema(fields)
+
+
+def iter_parquet(result, df: pd.DataFrame, order: np.ndarray, distance_col: str, chunk_rows: int) -> Iterator[bytes]:
+    """Parquet 바이트 chunk generator (chunk 마다 row group 하나)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(df, distance_col)
+    sink = _DrainSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='snappy') as writer:
+        for frame in _chunks(result, df, order, distance_col, chunk_rows):
+            for field in schema:
+                if pa.types.is_string(field.type) and not pd.api.types.is_string_dtype(frame[field.name]):
+                    # 숫자/혼합 타입으로 읽힌 컬럼은 문자열로 맞춘다 (결측은 null 유지)
+                    frame[field.name] = frame[field.name].astype('string')
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def export_stream(result, df: pd.DataFrame, fmt: str = 'csv', compress: bool = False,
+                  distance_col: str = '중심점과의거리(km)', chunk_rows: int = 5000, order=None):
+    """
+    (바이트 generator, 파일 확장자, mimetype) 반환.
+    order 는 결과 내 행 순서 (None 이면 데이터셋 순서), compress 는 csv 에만 적용된다.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 다운로드 형식입니다: {fmt} (지원: {', '.join(EXPORT_FORMATS)})")
+    if order is None:
+        order = np.arange(len(result))
+    if fmt == 'parquet':
+        return iter_parquet(result, df, order, distance_col, chunk_rows), 'parquet', MIMETYPES['parquet']
+    chunks = iter_csv(result, df, order, distance_col, chunk_rows)
+    if compress:
+        return gzip_stream(chunks), 'csv.gz', MIMETYPES['csv.gz']
+    return chunks, 'csv', MIMETYPES['csv']
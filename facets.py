@@ -0,0 +1,206 @@
+"""
+면적 구간 / 건축년도 구간 필터용 비트맵 인덱스 모듈
+
+분석 완료 시점에 각 구간(area_range: le60, gt60le85 ..., build_year: recent5 ...)에
+속하는 행을 행 위치별 1비트(np.packbits)로 계산해 두고,
+요청 시에는 선택된 구간 비트맵끼리 AND 한 번으로 필터 마스크를 만든다.
+구간별 건수(facet count)도 같은 비트맵으로 바로 계산된다.
+
+건축년도 구간은 '올해' 기준 상대 구간이므로 기준 연도가 바뀌면 다시 계산한다.
+인덱스는 분석 캐시 파일 옆에 `{이름}.facets.npz` 로 저장된다.
+"""
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from sidecar_cache import get_or_build, sidecar_path
+
+FACETS_VERSION = 1
+FACETS_SUFFIX = '.facets.npz'
+
+AREA_COLUMN = '전용면적(㎡)'
+BUILD_YEAR_COLUMN = '건축년도'
+FACET_COLUMNS = [AREA_COLUMN, BUILD_YEAR_COLUMN]
+
+# 면적 구간: (코드, 하한(초과), 상한(이하)) - None 은 제한 없음
+AREA_BUCKETS = [
+    ('le60', None, 60),
+    ('gt60le85', 60, 85),
+    ('gt85le102', 85, 102),
+    ('gt102le135', 102, 135),
+    ('gt135', 135, None),
+]
+# 건축년도 구간: (코드, 최근 N년 이내(>= 기준연도-N), N년 이전(< 기준연도-N))
+BUILD_YEAR_BUCKETS = [
+    ('recent5', 5, None),
+    ('recent10', 10, None),
+    ('recent15', 15, None),
+    ('over15', None, 15),
+]
+
+
+def _area_masks(area: np.ndarray) -> Dict[str, np.ndarray]:
+    masks = {}
+    for code, lower, upper in AREA_BUCKETS:
+        mask = np.isfinite(area)
+        if lower is not None:
+            mask &= area > lower
+        if upper is not None:
+            mask &= area <= upper
+        masks[code] = mask
+    return masks
+
+
+def _build_year_masks(year: np.ndarray, reference_year: int) -> Dict[str, np.ndarray]:
+    masks = {}
+    for code, recent, older in BUILD_YEAR_BUCKETS:
+        mask = np.isfinite(year)
+        if recent is not None:
+            mask &= year >= reference_year - recent
+        if older is not None:
+            mask &= year < reference_year - older
+        masks[code] = mask
+    return masks
+
+
+class FacetIndex:
+    """구간별 행 비트맵 묶음"""
+
+    def __init__(self, bitmaps: Dict[str, Dict[str, np.ndarray]], n_rows: int, reference_year: int):
+        self.bitmaps = bitmaps              # {facet: {구간 코드: packbits 된 uint8 배열}}
+        self.n_rows = n_rows
+        self.reference_year = reference_year
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, reference_year: Optional[int] = None) -> 'FacetIndex':
+        """df 의 면적/건축년도 컬럼으로 비트맵 생성. 컬럼이 없으면 해당 facet 은 만들지 않는다."""
+        reference_year = reference_year or datetime.now().year
+        bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        if AREA_COLUMN in df.columns:
+            # 필터 결과가 기존 비교식과 같도록 저장 타입(float32) 그대로 비교
+            area = pd.to_numeric(df[AREA_COLUMN], errors='coerce').to_numpy(dtype='float32')
+            bitmaps['area_range'] = {code: np.packbits(mask) for code, mask in _area_masks(area).items()}
+        if BUILD_YEAR_COLUMN in df.columns:
+            year = pd.to_numeric(df[BUILD_YEAR_COLUMN], errors='coerce').to_numpy(dtype='float32')
+            bitmaps['build_year'] = {code: np.packbits(mask)
+                                     for code, mask in _build_year_masks(year, reference_year).items()}
+        return cls(bitmaps, len(df), reference_year)
+
+    def extend(self, new_rows: pd.DataFrame) -> Optional['FacetIndex']:
+        """
+        기존 행 뒤에 new_rows 를 추가한 비트맵을 반환.
+        기준 연도가 바뀌었거나 facet 구성이 다르면 None (재생성 필요).
+        """
+        addition = FacetIndex.from_dataframe(new_rows, self.reference_year)
+        if self.reference_year != datetime.now().year or set(addition.bitmaps) != set(self.bitmaps):
+            return None
+        bitmaps = {}
+        for facet, buckets in self.bitmaps.items():
+            bitmaps[facet] = {}
+            for code, bitmap in buckets.items():
+                old_bits = np.unpackbits(bitmap, count=self.n_rows)
+                new_bits = np.unpackbits(addition.bitmaps[facet][code], count=addition.n_rows)
+                bitmaps[facet][code] = np.packbits(np.concatenate([old_bits, new_bits]))
+        return FacetIndex(bitmaps, self.n_rows + addition.n_rows, self.reference_year)
+
+    def mask(self, selections: Dict[str, str]) -> Optional[np.ndarray]:
+        """
+        {facet: 구간 코드} 조건을 모두 만족하는 행 위치의 bool 배열을 반환.
+        'all' 이거나 컬럼이 없는 facet 은 조건에서 제외하며, 조건이 없으면 None.
+        알 수 없는 구간 코드는 어떤 행과도 맞지 않으므로 모두 False 인 배열을 반환한다.
+        """
+        combined = None
+        for facet, code in selections.items():
+            buckets = self.bitmaps.get(facet)
+            if buckets is None or code in (None, '', 'all'):
+                continue
+            bitmap = buckets.get(code)
+            if bitmap is None:
+                return np.zeros(self.n_rows, dtype=bool)
+            combined = bitmap if combined is None else combined & bitmap
+        if combined is None:
+            return None
+        return np.unpackbits(combined, count=self.n_rows).astype(bool)
+
+    def counts(self, positions: Optional[np.ndarray] = None) -> Dict[str, Dict[str, int]]:
+        """구간별 행 수. positions(행 위치 배열)를 주면 그 행들 중에서만 센다."""
+        result = {}
+        for facet, buckets in self.bitmaps.items():
+            result[facet] = {}
+            for code, bitmap in buckets.items():
+                if positions is None:
+                    result[facet][code] = int(np.unpackbits(bitmap, count=self.n_rows).sum())
+                else:
+                    result[facet][code] = int(np.unpackbits(bitmap, count=self.n_rows)[positions].sum())
+        return result
+
+    def save(self, path: str):
+        """npz 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        tmp_path = f"{path}.tmp.npz"
+        arrays = {f'{facet}:{code}': bitmap
+                  for facet, buckets in self.bitmaps.items() for code, bitmap in buckets.items()}
+        np.savez(tmp_path, version=FACETS_VERSION,
+                 meta=np.array([self.n_rows, self.reference_year], dtype='int64'), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['FacetIndex']:
+        """저장된 비트맵을 읽는다. 버전이 다르면 None"""
+        with np.load(path) as data:
+            if int(data['version']) != FACETS_VERSION:
+                return None
+            n_rows, reference_year = (int(v) for v in data['meta'])
+            bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+            for name in data.files:
+                if ':' in name:
+                    facet, code = name.split(':', 1)
+                    bitmaps.setdefault(facet, {})[code] = data[name]
+            return cls(bitmaps, n_rows, reference_year)
+
+
+def facets_path_for(dataset_path: str) -> str:
+    """분석 캐시 파일에 대응하는 facet 파일 경로"""
+    return sidecar_path(dataset_path, FACETS_SUFFIX)
+
+
+def build_and_save_facets(dataset_path: str, df: pd.DataFrame) -> FacetIndex:
+    """df 로 facet 비트맵을 만들고 dataset_path 옆에 저장"""
+    facets = FacetIndex.from_dataframe(df)
+    path = facets_path_for(dataset_path)
+    try:
+        facets.save(path)
+        print(f"[FACET] 구간 비트맵 저장: {path} ({facets.n_rows:,}건, 기준연도 {facets.reference_year})")
+    except OSError as e:
+        print(f"[FACET] 구간 비트맵 저장 실패: {path}, 오류: {e}")
+    return facets
+
+
+def extend_and_save_facets(dataset_path: str, base: FacetIndex, new_rows: pd.DataFrame,
+                           merged_df: pd.DataFrame) -> FacetIndex:
+    """base 비트맵(merged_df 앞부분 행)에 new_rows 를 추가해 저장. 증분 반영이 안 되면 전체 재생성."""
+    facets = base.extend(new_rows) if base.n_rows + len(new_rows) == len(merged_df) else None
+    if facets is None:
+        return build_and_save_facets(dataset_path, merged_df)
+    path = facets_path_for(dataset_path)
+    try:
+        facets.save(path)
+        print(f"[FACET] 구간 비트맵 증분 저장: {path} (+{len(new_rows):,}건, 전체 {facets.n_rows:,}건)")
+    except OSError as e:
+        print(f"[FACET] 구간 비트맵 저장 실패: {path}, 오류: {e}")
+    return facets
+
+
+def get_facets(dataset_path: str, df: pd.DataFrame) -> FacetIndex:
+    """
+    dataset_path 에 대한 facet 비트맵을 반환.
+    메모리 → 디스크 순으로 찾고, 없거나 데이터보다 오래됐거나 기준 연도가 바뀌었으면 새로 만든다.
+    """
+    current_year = datetime.now().year
+    return get_or_build(dataset_path, FACETS_SUFFIX,
+                        build=lambda: build_and_save_facets(dataset_path, df),
+                        load=FacetIndex.load,
+                        is_usable=lambda facets: facets.n_rows == len(df) and facets.reference_year == current_year,
+                        label='[FACET] 구간 비트맵')
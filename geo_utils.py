@@ -0,0 +1,181 @@
+"""
+좌표 거리 계산 모듈 (NumPy 벡터화)
+
+행 단위 geopy 호출 대신 전체 좌표 배열을 한 번에 계산한다.
+- haversine: 구면 근사 (빠름, 오차 최대 약 0.5%)
+- vincenty: WGS-84 타원체 역산 (geopy geodesic 과 mm 단위로 일치)
+"""
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# 지구 평균 반경 (IUGG, km)
+EARTH_RADIUS_KM = 6371.0088
+
+# WGS-84 타원체 상수
+WGS84_A = 6378.137  # 장반경 (km)
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+# 위도 1도당 최소 거리 (적도 기준, km) - 바운딩 박스가 항상 원을 포함하도록 최소값 사용
+KM_PER_DEG_LAT_MIN = 110.574
+KM_PER_DEG_LON_EQUATOR = 111.320
+# 구면/타원체 오차를 흡수하기 위한 바운딩 박스 여유율
+BBOX_MARGIN = 1.01
+
+DISTANCE_METHODS = ('haversine', 'vincenty')
+
+
+def haversine_km(lat, lon, center_lat: float, center_lon: float) -> np.ndarray:
+    """중심점과 좌표 배열 사이의 구면 거리(km)를 계산"""
+    lat = np.radians(np.asarray(lat, dtype='float64'))
+    lon = np.radians(np.asarray(lon, dtype='float64'))
+    c_lat = np.radians(center_lat)
+    c_lon = np.radians(center_lon)
+
+    dlat = lat - c_lat
+    dlon = lon - c_lon
+    a = np.sin(dlat / 2) ** 2 + np.cos(c_lat) * np.cos(lat) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def vincenty_km(lat, lon, center_lat: float, center_lon: float,
+                max_iter: int = 200, tol: float = 1e-12) -> np.ndarray:
+    """
+    Vincenty 역산 공식으로 WGS-84 타원체 거리(km)를 계산.
+    수렴하지 않는 대척점 근처 좌표는 haversine 값으로 대체한다.
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    if lat.size == 0:
+        return np.empty(0, dtype='float64')
+
+    f = WGS84_F
+    U1 = np.arctan((1 - f) * np.tan(np.radians(center_lat)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat)))
+    L = np.radians(lon - center_lon)
+    sin_U1, cos_U1 = np.sin(U1), np.cos(U1)
+    sin_U2, cos_U2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    converged = np.zeros(lat.shape, dtype=bool)
+    sin_sigma = cos_sigma = sigma = cos_sq_alpha = cos_2sigma_m = None
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.sqrt((cos_U2 * sin_lam) ** 2 +
+                                (cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lam) ** 2)
+            cos_sigma = sin_U1 * sin_U2 + cos_U1 * cos_U2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_U1 * cos_U2 * sin_lam / sin_sigma)
+            cos_sq_alpha = 1 - sin_alpha ** 2
+            # 적도선 위의 두 점(cos²α = 0)은 cos2σm = 0
+            cos_2sigma_m = np.where(cos_sq_alpha == 0, 0.0,
+                                    cos_sigma - 2 * sin_U1 * sin_U2 / cos_sq_alpha)
+            C = f / 16 * cos_sq_alpha * (4 + f * (4 - 3 * cos_sq_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            converged = np.abs(lam - lam_prev) < tol
+            if converged.all():
+                break
+
+        u_sq = cos_sq_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+            B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        dist = WGS84_B * A * (sigma - delta_sigma)
+
+    dist = np.where(sin_sigma == 0, 0.0, dist)
+    fallback = ~converged | ~np.isfinite(dist)
+    if fallback.any():
+        dist[fallback] = haversine_km(lat[fallback], lon[fallback], center_lat, center_lon)
+    return dist
+
+
+def distance_km(lat, lon, center_lat: float, center_lon: float, method: str = 'haversine') -> np.ndarray:
+    """method 에 따라 haversine 또는 vincenty 거리(km)를 반환"""
+    if method == 'vincenty':
+        return vincenty_km(lat, lon, center_lat, center_lon)
+    if method == 'haversine':
+        return haversine_km(lat, lon, center_lat, center_lon)
+    raise ValueError(f"지원하지 않는 거리 계산 방식입니다: {method} (지원: {', '.join(DISTANCE_METHODS)})")
+
+
+def bounding_box(center_lat: float, center_lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    반경 원을 반드시 포함하는 위경도 사각형 (lat_min, lat_max, lon_min, lon_max) 을 반환.
+    정확한 거리 계산 전 후보를 줄이는 용도이므로 약간 넉넉하게 잡는다.
+    """
+    dlat = radius_km / KM_PER_DEG_LAT_MIN * BBOX_MARGIN
+    lat_min = max(center_lat - dlat, -90.0)
+    lat_max = min(center_lat + dlat, 90.0)
+
+    # 경도 1도의 거리는 고위도일수록 짧으므로 박스 내 최대 위도 기준으로 계산
+    extreme_lat = max(abs(lat_min), abs(lat_max))
+    cos_lat = np.cos(np.radians(extreme_lat))
+    if cos_lat <= 1e-9:
+        return lat_min, lat_max, -180.0, 180.0
+    dlon = radius_km / (KM_PER_DEG_LON_EQUATOR * cos_lat) * BBOX_MARGIN
+    if dlon >= 180.0:
+        return lat_min, lat_max, -180.0, 180.0
+    return lat_min, lat_max, center_lon - dlon, center_lon + dlon
+
+
+def bbox_mask(lat, lon, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+    """좌표 배열이 바운딩 박스 안에 있는지 여부 (NaN 은 False)"""
+    lat_min, lat_max, lon_min, lon_max = bbox
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    return (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+
+
+def radius_positions(df: pd.DataFrame, center_lat: float, center_lon: float, radius_km: float,
+                     method: str = 'haversine', lat_col: str = '위도', lon_col: str = '경도',
+                     index=None, row_mask=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    중심점 반경 radius_km 이내 행의 (행 위치, 위도, 경도, 거리(km)) 배열을 반환 (행 위치 오름차순).
+    1) 바운딩 박스 사전 필터 → 2) 후보 행만 위경도 숫자 변환 및 정확한 거리 계산
+
+    index 로 spatial_index.GridIndex 를 넘기면 전체 행 대신 박스와 겹치는 격자 셀의 행만 검사한다.
+    row_mask(전체 행 길이의 bool 배열)를 주면 True 인 행만 후보로 사용한다 (facets 구간 필터 등).
+    """
+    bbox = bounding_box(center_lat, center_lon, radius_km)
+    if index is not None:
+        candidates = index.candidates(bbox)
+        if row_mask is not None:
+            candidates = candidates[row_mask[candidates]]
+        lat = pd.to_numeric(df[lat_col].iloc[candidates], errors='coerce').to_numpy(dtype='float64')
+        lon = pd.to_numeric(df[lon_col].iloc[candidates], errors='coerce').to_numpy(dtype='float64')
+    else:
+        lat = pd.to_numeric(df[lat_col], errors='coerce').to_numpy(dtype='float64')
+        lon = pd.to_numeric(df[lon_col], errors='coerce').to_numpy(dtype='float64')
+        in_box = bbox_mask(lat, lon, bbox)
+        if row_mask is not None:
+            in_box &= row_mask
+        candidates = np.flatnonzero(in_box)
+        lat, lon = lat[candidates], lon[candidates]
+
+    dist = distance_km(lat, lon, center_lat, center_lon, method=method)
+    inside = dist <= radius_km
+    return candidates[inside], lat[inside], lon[inside], dist[inside]
+
+
+def filter_by_radius(df: pd.DataFrame, center_lat: float, center_lon: float, radius_km: float,
+                     distance_col: str = '중심점과의거리', method: str = 'haversine',
+                     lat_col: str = '위도', lon_col: str = '경도', index=None,
+                     row_mask=None) -> pd.DataFrame:
+    """
+    중심점 반경 radius_km 이내의 행만 남기고 거리(km) 컬럼을 추가한 DataFrame 을 반환.
+    후보 선택 방식(index, row_mask)은 radius_positions 와 같다.
+    """
+    positions, lat, lon, dist = radius_positions(df, center_lat, center_lon, radius_km, method=method,
+                                                 lat_col=lat_col, lon_col=lon_col,
+                                                 index=index, row_mask=row_mask)
+    result = df.iloc[positions].copy()
+    result[lat_col] = lat
+    result[lon_col] = lon
+    result[distance_col] = dist
+    return result
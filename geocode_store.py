@@ -0,0 +1,178 @@
+"""
+SQLite 기반 영구 지오코딩 캐시 모듈
+
+프로세스 재시작이나 gunicorn 워커가 여러 개여도 한 번 조회한 주소는 다시 API 를 호출하지 않도록
+정규화된 주소를 키로 좌표를 저장한다.
+- WAL 모드 + busy_timeout 으로 여러 프로세스/스레드의 동시 읽기·쓰기를 허용
+- 좌표를 찾지 못한 결과(negative)는 TTL 이 지나면 다시 조회
+- 여러 주소를 한 번의 쿼리로 조회하는 bulk lookup 지원
+- 키는 address_canon.canonicalize_address 로 정규화한 주소 (시도 약칭, 번지 표기 차이를 같은 키로)
+  키 규칙이 바뀌면 PRAGMA user_version 으로 감지해 기존 행의 키를 한 번 다시 계산한다
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from address_canon import canonicalize_address
+
+# SQLite 한 쿼리당 바인딩 변수 제한(기본 999)보다 작게 유지
+_BULK_CHUNK_SIZE = 900
+# 주소 키 규칙 버전 (PRAGMA user_version). 0: 공백 정리만 한 키
+KEY_VERSION = 1
+
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+
+def normalize_address_key(address: str) -> str:
+    """캐시 키로 사용할 주소 정규화 (address_canon.canonicalize_address)"""
+    return canonicalize_address(address)
+
+
+class GeocodeStore:
+    """주소 → 좌표 영구 저장소"""
+
+    def __init__(self, path: str, negative_ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS geocode (
+                    address    TEXT PRIMARY KEY,
+                    lat        REAL,
+                    lon        REAL,
+                    found      INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+        self._migrate_keys()
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드별 연결 (sqlite3 연결은 스레드/fork 된 프로세스 간 공유하지 않는다)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _migrate_keys(self):
+        """
+        이전 키 규칙으로 저장된 행을 현재 정규화 키로 다시 저장.
+        같은 키로 합쳐지는 행은 좌표를 찾은 결과, 그중 최근 결과를 남긴다.
+        """
+        conn = self._connect()
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= KEY_VERSION:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 다른 프로세스가 먼저 옮겼으면 건너뜀
+            if conn.execute('PRAGMA user_version').fetchone()[0] < KEY_VERSION:
+                best: Dict[str, Tuple] = {}
+                for address, lat, lon, found, updated_at in conn.execute(
+                        'SELECT address, lat, lon, found, updated_at FROM geocode'):
+                    key = normalize_address_key(address)
+                    current = best.get(key)
+                    if current is None or (found, updated_at) > (current[3], current[4]):
+                        best[key] = (key, lat, lon, found, updated_at)
+                conn.execute('DELETE FROM geocode')
+                conn.executemany('INSERT INTO geocode (address, lat, lon, found, updated_at) VALUES (?, ?, ?, ?, ?)',
+                                 list(best.values()))
+                conn.execute(f'PRAGMA user_version = {KEY_VERSION}')
+                if best:
+                    print(f"[캐시] 주소 키 정규화 규칙 갱신: {len(best):,}개 키로 재저장 ({self.path})")
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _is_valid(self, found: int, updated_at: float, now: float) -> bool:
+        return bool(found) or now - updated_at < self.negative_ttl
+
+    def get(self, address: str) -> Optional[Coordinates]:
+        """저장된 좌표를 반환. 없거나 만료된 negative 결과면 None, 유효한 negative 면 (None, None)"""
+        key = normalize_address_key(address)
+        row = self._connect().execute(
+            'SELECT lat, lon, found, updated_at FROM geocode WHERE address = ?', (key,)).fetchone()
+        if row is None or not self._is_valid(row[2], row[3], time.time()):
+            return None
+        return (row[0], row[1]) if row[2] else (None, None)
+
+    def get_many(self, addresses: Iterable[str]) -> Dict[str, Coordinates]:
+        """여러 주소를 묶어서 조회. 유효한 결과가 있는 주소만 {입력 주소: 좌표} 로 반환"""
+        by_key: Dict[str, List[str]] = {}
+        for address in addresses:
+            by_key.setdefault(normalize_address_key(address), []).append(address)
+        keys = list(by_key)
+        now = time.time()
+        results: Dict[str, Coordinates] = {}
+        conn = self._connect()
+        for start in range(0, len(keys), _BULK_CHUNK_SIZE):
+            chunk = keys[start:start + _BULK_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT address, lat, lon, found, updated_at FROM geocode WHERE address IN ({placeholders})',
+                chunk).fetchall()
+            for key, lat, lon, found, updated_at in rows:
+                if not self._is_valid(found, updated_at, now):
+                    continue
+                for address in by_key[key]:
+                    results[address] = (lat, lon) if found else (None, None)
+        return results
+
+    def put(self, address: str, lat: Optional[float], lon: Optional[float]):
+        self.put_many([(address, lat, lon)])
+
+    def put_many(self, items: Iterable[Tuple[str, Optional[float], Optional[float]]]):
+        """(주소, 위도, 경도) 목록을 저장. 위도/경도가 None 이면 negative 결과로 저장"""
+        now = time.time()
+        rows = [(normalize_address_key(address), lat, lon,
+                 int(lat is not None and lon is not None), now)
+                for address, lat, lon in items]
+        if not rows:
+            return
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('''
+                INSERT INTO geocode (address, lat, lon, found, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(address) DO UPDATE SET
+                    lat = excluded.lat, lon = excluded.lon,
+                    found = excluded.found, updated_at = excluded.updated_at
+            ''', rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def purge_expired(self) -> int:
+        """만료된 negative 결과 삭제"""
+        cur = self._connect().execute(
+            'DELETE FROM geocode WHERE found = 0 AND updated_at < ?', (time.time() - self.negative_ttl,))
+        return cur.rowcount
+
+    def clear(self) -> int:
+        cur = self._connect().execute('DELETE FROM geocode')
+        return cur.rowcount
+
+    def stats(self) -> Dict:
+        conn = self._connect()
+        total, found = conn.execute('SELECT COUNT(*), COALESCE(SUM(found), 0) FROM geocode').fetchone()
+        expired = conn.execute('SELECT COUNT(*) FROM geocode WHERE found = 0 AND updated_at < ?',
+                               (time.time() - self.negative_ttl,)).fetchone()[0]
+        return {
+            'path': self.path,
+            'size': total,
+            'found': found,
+            'not_found': total - found,
+            'expired_not_found': expired,
+            'negative_ttl': self.negative_ttl,
+            'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
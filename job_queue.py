@@ -0,0 +1,311 @@
+"""
+백그라운드 작업 큐 모듈 (SQLite 작업 테이블 + 스레드 풀)
+
+외부 브로커 없이 오래 걸리는 업로드 분석 파이프라인을 HTTP 요청 밖에서 실행한다.
+- submit() 은 작업 행을 만든 뒤 작업 스레드 풀에 넘기고 바로 job id 를 반환
+- 멀티스레드 웹 서버에서 fork 하면 다른 스레드가 잡고 있던 락(로깅, sqlite, 레이트 리미터,
+  pandas/pyarrow 스레드 풀) 때문에 자식 프로세스가 멈출 수 있어 같은 프로세스의 스레드로 실행한다.
+  무거운 단계(pandas/pyarrow 파싱, 지오코딩·Supabase HTTP)는 GIL 을 놓으므로 웹 요청 처리를 막지 않는다
+- 작업 함수는 첫 인자로 받은 JobProgress 로 현재 단계와 처리 건수를 기록
+- 진행 조회는 같은 SQLite 파일을 읽으므로 어느 gunicorn 워커에서든 가능 (WAL 모드)
+- 진행률은 단계별 가중치와 단계 내 처리 건수로 계산하고, 경과 시간으로 남은 시간(ETA)을 추정
+- 작업 행에는 등록한 프로세스 pid 와 configure() 마다 새로 만드는 실행기 id(runner)를 기록한다.
+  configure() 는 다른 실행기가 남긴 대기/실행 중 작업 중 pid 가 자기 자신(재시작 후 같은 pid, 컨테이너의 pid 1)이거나
+  이미 사라진 프로세스의 것을 실패로 표시한다. 살아 있는 다른 워커의 작업은 건드리지 않는다
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_WORKERS = 2
+# 진행 건수 갱신은 이 간격(초)보다 자주 DB 에 쓰지 않는다 (단계 변경은 즉시 기록)
+PROGRESS_WRITE_INTERVAL = 0.5
+
+Stages = Sequence[Tuple[str, float]]  # (단계 이름, 가중치)
+
+
+class JobStore:
+    """작업 상태 테이블"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.runner_id = uuid.uuid4().hex  # 이 저장소 객체(= configure() 한 번)가 등록/실행한 작업 표시
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect().execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id          TEXT PRIMARY KEY,
+                kind        TEXT NOT NULL,
+                status      TEXT NOT NULL,
+                stages      TEXT NOT NULL,
+                pid         INTEGER,
+                runner      TEXT,
+                stage       INTEGER NOT NULL DEFAULT 0,
+                rows_done   INTEGER NOT NULL DEFAULT 0,
+                rows_total  INTEGER,
+                result      TEXT,
+                error       TEXT,
+                created_at  REAL NOT NULL,
+                started_at  REAL,
+                updated_at  REAL NOT NULL,
+                finished_at REAL
+            )
+        ''')
+        columns = {row[1] for row in self._connect().execute('PRAGMA table_info(jobs)')}
+        if 'runner' not in columns:
+            # runner 컬럼이 없던 이전 버전 DB
+            self._connect().execute('ALTER TABLE jobs ADD COLUMN runner TEXT')
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드/프로세스별 연결 (sqlite3 연결은 스레드 간 공유하지 않는다)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, job_id: str, kind: str, stages: Stages):
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO jobs (id, kind, status, stages, pid, runner, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, 'queued', json.dumps([list(stage) for stage in stages], ensure_ascii=False),
+             os.getpid(), self.runner_id, now, now))
+
+    def start(self, job_id: str):
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = 'running', pid = ?, runner = ?, started_at = ?, updated_at = ? WHERE id = ?",
+            (os.getpid(), self.runner_id, now, now, job_id))
+
+    def progress(self, job_id: str, stage: int, rows_done: int, rows_total: Optional[int]):
+        self._connect().execute(
+            'UPDATE jobs SET stage = ?, rows_done = ?, rows_total = ?, updated_at = ? WHERE id = ?',
+            (stage, rows_done, rows_total, time.time(), job_id))
+
+    def finish(self, job_id: str, result):
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = 'done', result = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+            (json.dumps(result, ensure_ascii=False, default=str), now, now, job_id))
+
+    def fail(self, job_id: str, error: str):
+        """아직 끝나지 않은 작업만 실패로 표시"""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, finished_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            (error, now, now, job_id))
+
+    def fail_orphaned(self, error: str) -> int:
+        """
+        대기/실행 중인데 담당 실행기가 없는 작업을 실패로 표시.
+        작업은 등록한 프로세스의 스레드에서 실행되므로, 다른 실행기의 작업 중 pid 가 현재 프로세스와 같거나
+        (재시작 후 같은 pid 를 다시 받은 경우) 프로세스가 사라진 작업이 대상이다.
+        다른 워커가 실행 중인 작업은 건드리지 않는다.
+        """
+        current_pid = os.getpid()
+        rows = self._connect().execute(
+            "SELECT id, pid, runner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        orphaned = [job_id for job_id, pid, runner in rows
+                    if runner != self.runner_id and (pid == current_pid or not _pid_alive(pid))]
+        for job_id in orphaned:
+            self.fail(job_id, error)
+        return len(orphaned)
+
+    def purge_finished(self, older_than: float) -> int:
+        """완료/실패 후 older_than 초가 지난 작업 삭제"""
+        cur = self._connect().execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (time.time() - older_than,))
+        return cur.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """작업 상태 (진행률, ETA 포함). 없으면 None"""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        finally:
+            conn.row_factory = None
+        if row is None:
+            return None
+        return _describe(dict(row), time.time())
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _describe(row: Dict, now: float) -> Dict:
+    stages: List[List] = json.loads(row['stages'])
+    stage = row['stage']
+    status = row['status']
+    weights = [float(weight) for _, weight in stages]
+    total_weight = sum(weights) or 1.0
+
+    if status == 'done':
+        fraction = 1.0
+    elif 0 < stage <= len(stages):
+        within = min(row['rows_done'] / row['rows_total'], 1.0) if row['rows_total'] else 0.0
+        fraction = (sum(weights[:stage - 1]) + weights[stage - 1] * within) / total_weight
+    else:
+        fraction = 0.0
+
+    started_at = row['started_at']
+    elapsed = ((row['finished_at'] or now) - started_at) if started_at else 0.0
+    eta = None
+    if status == 'running' and fraction > 0:
+        eta = round(elapsed * (1 - fraction) / fraction, 1)
+
+    return {
+        'id': row['id'],
+        'kind': row['kind'],
+        'status': status,
+        'stage': stage,
+        'stage_count': len(stages),
+        'stage_name': stages[stage - 1][0] if 0 < stage <= len(stages) else None,
+        'rows_done': row['rows_done'],
+        'rows_total': row['rows_total'],
+        'progress': round(fraction, 4),
+        'elapsed_seconds': round(elapsed, 1),
+        'eta_seconds': eta,
+        'result': json.loads(row['result']) if row['result'] else None,
+        'error': row['error'],
+    }
+
+
+class JobProgress:
+    """작업 함수가 단계/처리 건수를 기록하는 객체"""
+
+    def __init__(self, store: Optional[JobStore], job_id: Optional[str]):
+        self.store = store
+        self.job_id = job_id
+        self._stage = 0
+        self._last_write = 0.0
+
+    def stage(self, number: int):
+        """number 번째 단계(1부터) 시작"""
+        self._stage = number
+        self._write(0, None, force=True)
+
+    def rows(self, done: int, total: Optional[int] = None):
+        """현재 단계의 처리 건수 (total 을 모르면 None)"""
+        self._write(done, total, force=total is not None and done >= total)
+
+    def _write(self, done: int, total: Optional[int], force: bool):
+        if self.store is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_WRITE_INTERVAL:
+            return
+        self._last_write = now
+        self.store.progress(self.job_id, self._stage, int(done), total)
+
+
+# 요청 안에서 파이프라인을 바로 실행할 때 쓰는 기록하지 않는 진행 객체
+NULL_PROGRESS = JobProgress(None, None)
+
+
+def _execute(store: JobStore, job_id: str, func: Callable, args: tuple):
+    """작업 스레드에서 실행: 상태 기록 후 func(progress, *args) 호출"""
+    store.start(job_id)
+    try:
+        result = func(JobProgress(store, job_id), *args)
+    except Exception as e:
+        traceback.print_exc()
+        store.fail(job_id, str(e) or e.__class__.__name__)
+        return
+    store.finish(job_id, result)
+    print(f"[JOB] 작업 완료: {job_id}")
+
+
+class JobRunner:
+    """스레드 풀에 작업을 넘기고 상태를 JobStore 에 기록"""
+
+    def __init__(self, store: JobStore, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.store = store
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            return self._executor
+
+    def submit(self, func: Callable, *args, kind: str = 'job', stages: Stages = ()) -> str:
+        """작업을 등록하고 job id 를 반환. func(progress, *args) 는 작업 스레드에서 실행된다."""
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, kind, stages)
+        future = self._pool().submit(_execute, self.store, job_id, func, args)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        print(f"[JOB] 작업 등록: {job_id} ({kind})")
+        return job_id
+
+    def _on_done(self, job_id: str, future):
+        # _execute 밖에서 난 오류(상태 기록 실패 등)는 상태가 남지 않으므로 여기서 실패 처리
+        if future.cancelled():
+            self.store.fail(job_id, '작업이 취소되었습니다.')
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"[JOB] 작업 실행 오류: {job_id}, 오류: {error}")
+            self.store.fail(job_id, str(error) or error.__class__.__name__)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# 애플리케이션 공용 작업 실행기
+_runner: Optional[JobRunner] = None
+
+
+def configure(path: str, max_workers: int = DEFAULT_MAX_WORKERS, retention: Optional[float] = None):
+    """공용 작업 실행기 설정 (create_app 에서 호출). 중단된 작업 정리, 오래된 작업 삭제"""
+    global _runner
+    if _runner is not None:
+        _runner.shutdown()
+    store = JobStore(path)
+    interrupted = store.fail_orphaned('서버 재시작으로 작업이 중단되었습니다.')
+    if interrupted:
+        print(f"[JOB] 중단된 작업 {interrupted}건 실패 처리")
+    if retention:
+        store.purge_finished(retention)
+    _runner = JobRunner(store, max_workers)
+
+
+def _get_runner() -> JobRunner:
+    if _runner is None:
+        raise RuntimeError('job_queue.configure() 가 호출되지 않았습니다.')
+    return _runner
+
+
+def submit_job(func: Callable, *args, kind: str = 'job', stages: Stages = ()) -> str:
+    return _get_runner().submit(func, *args, kind=kind, stages=stages)
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    return _get_runner().store.get(job_id)
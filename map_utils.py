@@ -2,71 +2,159 @@ import requests
 from urllib.parse import quote
 import os
 import time
-from functools import lru_cache
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple, Optional
 import threading
 
+from config import Config
+from geocode_store import GeocodeStore, normalize_address_key
+
 KAKAO_REST_API_KEY = os.environ.get('KAKAO_REST_API_KEY')
+# 로컬 스텁 서버로 교체할 수 있도록 API 주소를 환경변수로 분리
+KAKAO_API_BASE_URL = os.environ.get('KAKAO_API_BASE_URL', 'https://dapi.kakao.com')
+
+# 재시도 대상 HTTP 상태 코드 (요청 한도 초과 / 서버 오류)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 
-# 캐시 및 레이트 제한을 위한 글로벌 변수
+# 캐시 및 레이트 제한을 위한 글로벌 변수 (_cache 는 프로세스 내 좌표 캐시, 좌표를 찾은 주소만 보관)
 _cache: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
-_last_request_time = 0
-_rate_limit_lock = threading.Lock()
+
+# 프로세스/워커 간 공유되는 SQLite 영구 캐시 (처음 사용할 때 생성)
+_store: Optional[GeocodeStore] = None
+_store_lock = threading.Lock()
+
+
+def get_geocode_store() -> GeocodeStore:
+    """공용 영구 지오코딩 캐시를 반환"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = GeocodeStore(Config.GEOCODE_CACHE_PATH, negative_ttl=Config.GEOCODE_NEGATIVE_TTL)
+    return _store
+
+
+def configure_geocode_store(path: str, negative_ttl: float) -> GeocodeStore:
+    """공용 영구 지오코딩 캐시 설정 (create_app 에서 호출). 만료된 negative 결과를 정리한다"""
+    global _store
+    with _store_lock:
+        _store = GeocodeStore(path, negative_ttl=negative_ttl)
+    purged = _store.purge_expired()
+    if purged:
+        print(f"[GEOCODE] 만료된 좌표 없음 결과 {purged}건 삭제")
+    return _store
+
+
+class TokenBucket:
+    """
+    스레드 안전 토큰 버킷 레이트 리미터.
+    초당 rate 개의 토큰이 채워지고 최대 capacity 개까지 모아 둘 수 있다.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            # 락을 놓고 대기해야 다른 스레드도 토큰 계산을 할 수 있다
+            time.sleep(wait)
+
+
+# 모든 카카오 API 호출이 공유하는 레이트 리미터 (Config.API_RATE_LIMIT 초당 1회 기준)
+_rate_limiter = TokenBucket(rate=1.0 / Config.API_RATE_LIMIT, capacity=Config.GEOCODE_BURST)
+
 
 def _rate_limit_wait():
-    """레이트 제한을 위한 대기 함수 (초당 최대 10회 요청)"""
-    global _last_request_time
-    with _rate_limit_lock:
-        current_time = time.time()
-        time_since_last = current_time - _last_request_time
-        min_interval = 0.1  # 100ms 간격
-        
-        if time_since_last < min_interval:
-            time.sleep(min_interval - time_since_last)
-        
-        _last_request_time = time.time()
+    """레이트 제한을 위한 대기 함수 (공용 토큰 버킷에서 토큰 획득)"""
+    _rate_limiter.acquire()
+
+
+def _kakao_address_search(query: str, max_retries: Optional[int] = None) -> dict:
+    """
+    카카오 주소 검색 API 호출. 429/5xx 응답과 네트워크 오류는 지수 백오프로 재시도한다.
+    재시도 후에도 실패하면 requests.exceptions.RequestException 을 발생시킨다.
+    """
+    if max_retries is None:
+        max_retries = Config.GEOCODE_MAX_RETRIES
+    url = f"{KAKAO_API_BASE_URL}/v2/local/search/address.json?query={quote(query)}"
+    headers = {"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
+
+    for attempt in range(max_retries + 1):
+        _rate_limit_wait()
+        try:
+            resp = requests.get(url, headers=headers, timeout=10)
+            if resp.status_code not in RETRY_STATUS_CODES:
+                resp.raise_for_status()
+                return resp.json()
+            if attempt == max_retries:
+                resp.raise_for_status()
+            retry_after = resp.headers.get('Retry-After')
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else Config.GEOCODE_BACKOFF_BASE * (2 ** attempt)
+            print(f'[카카오맵 REST API] {resp.status_code} 응답, {delay:.2f}초 후 재시도 ({attempt + 1}/{max_retries}): {query}')
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = Config.GEOCODE_BACKOFF_BASE * (2 ** attempt)
+            print(f'[카카오맵 REST API] 연결 오류, {delay:.2f}초 후 재시도 ({attempt + 1}/{max_retries}): {query} ({e})')
+        time.sleep(delay)
+    raise requests.exceptions.RequestException(f'재시도 횟수 초과: {query}')
 
-@lru_cache(maxsize=1000)
 def get_latlon_from_address(address: str) -> Tuple[Optional[float], Optional[float]]:
     """
     주소 문자열을 받아 카카오 API를 통해 위도, 경도를 반환하는 함수.
-    캐싱과 레이트 제한이 적용됨.
+    메모리 캐시 → SQLite 영구 캐시 → 카카오 API 순으로 조회하며 레이트 제한이 적용됨.
     """
     if not address or not address.strip():
         print(f'[get_latlon_from_address] 빈 주소 입력')
         return None, None
     
-    original_address = address.strip()
+    original_address = normalize_address_key(address)
+    if original_address in _cache:
+        return _cache[original_address]
     
-    # 여러 주소 형식 시도
-    address_variants = [
+    stored = get_geocode_store().get(original_address)
+    if stored is not None:
+        print(f'[get_latlon_from_address] 영구 캐시에서 발견: {original_address} -> {stored}')
+        if stored[0] is not None:
+            _cache[original_address] = stored
+        return stored
+    
+    # 여러 주소 형식 시도. 캐시 키와 같은 정규 표기로 맞춘 뒤 정규화 후 같아진 형식은 한 번만 요청
+    address_variants = list(dict.fromkeys(normalize_address_key(variant) for variant in [
         original_address,
         # "서울 강남구 삼성동" 형식
         original_address.replace('시 ', ' ').replace('구 ', ' ').replace('동 ', ' '),
         # "서울특별시 강남구 삼성동" 형식
         original_address + "동" if not original_address.endswith(('동', '읍', '면', '리')) else original_address,
-    ]
+    ]))
     
+    request_failed = False
     for i, address in enumerate(address_variants):
         print(f'[get_latlon_from_address] 주소 변환 시도 #{i+1}: {address}')
         
-        # 캐시 확인
-        if address in _cache:
+        # 다른 형식이 이미 좌표를 얻은 주소인지 캐시 확인 (원래 주소는 위에서 확인)
+        if i > 0 and address in _cache:
             result = _cache[address]
             print(f'[get_latlon_from_address] 캐시에서 발견: {result}')
+            _cache[original_address] = result
             return result
         
-        # 레이트 제한 적용
-        _rate_limit_wait()
-        
         try:
-            url = f"https://dapi.kakao.com/v2/local/search/address.json?query={quote(address)}"
-            headers = {"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
-            print(f'[get_latlon_from_address] API 요청 URL: {url}')
-            resp = requests.get(url, headers=headers, timeout=10)
-            resp.raise_for_status()
-            
-            result = resp.json()
+            # 레이트 제한 및 재시도는 _kakao_address_search 에서 처리
+            result = _kakao_address_search(address)
             print(f'[get_latlon_from_address] API 응답: {result}')
             
             if result['documents']:
@@ -74,50 +162,94 @@ def get_latlon_from_address(address: str) -> Tuple[Optional[float], Optional[flo
                 lon = float(result['documents'][0]['x'])
                 print(f"[카카오맵 REST API 성공] {address} -> lat: {lat}, lon: {lon}")
                 _cache[original_address] = (lat, lon)  # 원래 주소로 캐시
+                get_geocode_store().put(original_address, lat, lon)
                 return lat, lon
             else:
                 print(f"[카카오맵 REST API] 주소 '{address}'에 해당하는 좌표를 찾지 못했습니다.")
                 
         except requests.exceptions.RequestException as e:
+            request_failed = True
             print(f'[카카오맵 REST API 실패] 요청 오류 for {address}: {e}')
         except Exception as e:
+            request_failed = True
             print(f'[카카오맵 REST API 실패] 기타 오류 for {address}: {e}')
     
-    # 모든 시도 실패
+    # 모든 시도 실패 - API 가 정상 응답했는데 결과가 없을 때만 negative 결과로 저장 (TTL 후 재조회)
     print(f'[get_latlon_from_address] 모든 주소 형식 시도 실패: {original_address}')
-    _cache[original_address] = (None, None)
+    if not request_failed:
+        get_geocode_store().put(original_address, None, None)
     return None, None
 
 def batch_get_latlon_from_addresses(addresses: List[str]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
     """
     여러 주소를 배치로 처리하여 위도/경도를 반환하는 함수.
     """
-    results = {}
-    unique_addresses = list(set(addr.strip() for addr in addresses if addr and addr.strip()))
-    
-    print(f'[batch_get_latlon_from_addresses] {len(unique_addresses)}개의 고유 주소 배치 처리 시작')
-    
-    for i, address in enumerate(unique_addresses):
-        if i % 10 == 0:
-            print(f'[batch_get_latlon_from_addresses] 진행상황: {i}/{len(unique_addresses)}')
-        
-        lat, lon = get_latlon_from_address(address)
-        results[address] = (lat, lon)
-    
-    print(f'[batch_get_latlon_from_addresses] 배치 처리 완료: {len(results)}개 주소')
+    return geocode_addresses_concurrently(addresses)
+
+def geocode_addresses_concurrently(
+    addresses: List[str],
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """
+    여러 주소를 스레드 풀로 동시에 지오코딩하여 {주소: (위도, 경도)} 를 반환.
+    영구 캐시에 있는 주소는 한 번의 bulk 조회로 처리하고, 나머지만 API 로 조회한다.
+    표기만 다른 주소(시도 약칭, 번지 표기 등)는 정규화 키가 같으므로 키마다 한 번만 조회해 결과를 나눠 준다.
+    동시 요청 수는 max_workers 로 제한되고, 실제 API 호출 속도는 공용 토큰 버킷이 제한한다.
+    progress_callback(완료 건수, 전체 건수) 는 주소 하나가 끝날 때마다 호출된다.
+    """
+    if max_workers is None:
+        max_workers = Config.GEOCODE_MAX_WORKERS
+    unique_addresses = list(dict.fromkeys(addr.strip() for addr in addresses if addr and addr.strip()))
+    total = len(unique_addresses)
+    results: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+    if not total:
+        return results
+
+    started = time.time()
+    results.update(get_geocode_store().get_many(unique_addresses))
+    pending: Dict[str, List[str]] = {}
+    for addr in unique_addresses:
+        if addr not in results:
+            pending.setdefault(normalize_address_key(addr), []).append(addr)
+    cached_count = total - sum(len(group) for group in pending.values())
+    print(f'[geocode_addresses_concurrently] {total}개의 고유 주소 중 영구 캐시 {cached_count}건, '
+          f'API 조회 {len(pending)}건 시작 (동시 {max_workers}건)')
+    if progress_callback is not None and cached_count:
+        progress_callback(cached_count, total)
+
+    done = cached_count
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='geocode') as executor:
+        futures = {executor.submit(get_latlon_from_address, key): key for key in pending}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                coords = future.result()
+            except Exception as e:
+                print(f'[geocode_addresses_concurrently] 지오코딩 오류 for {key}: {e}')
+                coords = (None, None)
+            for addr in pending[key]:
+                results[addr] = coords
+            done += len(pending[key])
+            if progress_callback is not None:
+                progress_callback(done, total)
+
+    success = sum(1 for lat, lon in results.values() if lat is not None and lon is not None)
+    print(f'[geocode_addresses_concurrently] 완료: {success}/{total}건 성공, {time.time() - started:.1f}초')
     return results
 
-def clear_cache():
-    """캐시를 초기화하는 함수"""
+def clear_cache(persistent: bool = True):
+    """캐시를 초기화하는 함수 (persistent=True 면 SQLite 영구 캐시도 비움)"""
     global _cache
     cache_size = len(_cache)
     _cache.clear()
-    get_latlon_from_address.cache_clear()
-    print(f'[캐시] 주소 변환 캐시를 초기화했습니다. (삭제된 항목: {cache_size}개)')
+    stored_size = get_geocode_store().clear() if persistent else 0
+    print(f'[캐시] 주소 변환 캐시를 초기화했습니다. (삭제된 항목: 메모리 {cache_size}개, 영구 캐시 {stored_size}개)')
 
 def get_cache_info():
-    """캐시 정보 반환"""
+    """캐시 정보 반환 (메모리 캐시 + 영구 캐시 통계)"""
     return {
         'size': len(_cache),
-        'items': dict(_cache)
+        'items': dict(_cache),
+        'store': get_geocode_store().stats()
     }
\ No newline at end of file
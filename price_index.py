@@ -0,0 +1,346 @@
+"""
+계약년월 기준 시계열 가격 지수 모듈
+
+분석 데이터셋의 전용평당 가격으로 월별 추이를 계산한다.
+- 전체 / 시군구별 / 단지별 월별 건수, 평균, 중앙값 (그룹 × 월 groupby 한 번)
+- 3/6/12개월 이동 평균: (그룹, 월) 순 누적 합계/건수 차이로 계산하므로 거래 단위 가중 평균이다
+  거래가 있는 (그룹, 월)만 다루므로 메모리는 그룹 수 × 월 수가 아니라 집계 행 수에 비례한다
+- 전년 동월 대비(YoY) 중앙값 변화율
+- 반복매매 지수: 같은 시군구 + 단지명 + 전용면적 거래의 연속 매매 쌍으로 월별 지수를 추정
+  (log(후 가격 / 전 가격) = 지수(후 월) - 지수(전 월) 최소제곱, 첫 월 = 100)
+  조건 없는 전체 지수는 업로드 때 분석 캐시 옆 `{이름}.repeat.npz` 로 저장하고,
+  시군구/단지 조건별 지수는 level 과 무관하므로 (데이터셋 경로, 수정시각, 조건) 키로 따로 보관한다
+
+월별 추이 계산 결과는 (데이터셋 경로, 수정시각, 조건) 키로 프로세스 내 LRU 에 보관한다.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sidecar_cache import get_or_build, sidecar_path
+
+REGION_COLUMN = '시군구'
+COMPLEX_COLUMN = '단지명'
+MONTH_COLUMN = '계약년월'
+AREA_COLUMN = '전용면적(㎡)'
+PRICE_COLUMN = '전용평당'
+PRICE_INDEX_COLUMNS = [REGION_COLUMN, COMPLEX_COLUMN, MONTH_COLUMN, AREA_COLUMN, PRICE_COLUMN]
+
+LEVELS = ('all', 'region', 'complex')
+ROLLING_WINDOWS = (3, 6, 12)
+
+_MAX_CACHED_TRENDS = 32
+_cached_trends: "OrderedDict[Tuple, PriceTrends]" = OrderedDict()
+_cached_lock = threading.Lock()
+
+REPEAT_SALES_VERSION = 1
+REPEAT_SALES_SUFFIX = '.repeat.npz'
+_MAX_CACHED_REPEAT_SALES = 32
+_cached_repeat_sales: "OrderedDict[Tuple, Dict]" = OrderedDict()
+
+
+def month_ordinals(values) -> np.ndarray:
+    """계약년월(YYYYMM) → 연속 월 번호 (년*12 + 월-1). 올바르지 않은 값은 -1"""
+    yyyymm = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype='float64')
+    year, month = np.floor(yyyymm / 100), np.mod(yyyymm, 100)
+    valid = np.isfinite(yyyymm) & (month >= 1) & (month <= 12)
+    return np.where(valid, year * 12 + month - 1, -1).astype('int64')
+
+
+def month_labels(ordinals: np.ndarray) -> np.ndarray:
+    """연속 월 번호 → 계약년월(YYYYMM) 정수"""
+    ordinals = np.asarray(ordinals, dtype='int64')
+    return (ordinals // 12) * 100 + ordinals % 12 + 1
+
+
+def _filter_rows(df: pd.DataFrame, region: Optional[str], complex: Optional[str]) -> pd.DataFrame:
+    mask = np.ones(len(df), dtype=bool)
+    if region:
+        mask &= (df[REGION_COLUMN] == region).to_numpy(dtype=bool, na_value=False)
+    if complex:
+        mask &= (df[COMPLEX_COLUMN] == complex).to_numpy(dtype=bool, na_value=False)
+    return df if mask.all() else df[mask]
+
+
+def _group_codes(df: pd.DataFrame, level: str) -> Tuple[np.ndarray, pd.DataFrame]:
+    """(행별 그룹 코드, 그룹 라벨 표). 단지명은 지역마다 겹치므로 단지는 시군구 + 단지명으로 구분"""
+    if level == 'all':
+        return np.zeros(len(df), dtype='int64'), pd.DataFrame({'region': [None], 'complex': [None]})
+    if level == 'region':
+        codes, uniques = pd.factorize(df[REGION_COLUMN], sort=True)
+        return codes, pd.DataFrame({'region': np.asarray(uniques, dtype=object), 'complex': None})
+    codes, uniques = pd.MultiIndex.from_arrays([df[REGION_COLUMN], df[COMPLEX_COLUMN]]).factorize(sort=True)
+    return codes, pd.DataFrame({'region': uniques.get_level_values(0).astype(object),
+                                'complex': uniques.get_level_values(1).astype(object)})
+
+
+def monthly_series(df: pd.DataFrame, level: str = 'all',
+                   windows=ROLLING_WINDOWS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    그룹별 월별 통계.
+    반환: (points, groups)
+    - points: group, month(YYYYMM), count, mean, median, rolling_{w}, yoy (거래가 있는 월만)
+    - groups: 그룹 코드 순서의 region, complex 라벨과 전체 건수
+    """
+    codes, groups = _group_codes(df, level)
+    months = month_ordinals(df[MONTH_COLUMN])
+    prices = pd.to_numeric(df[PRICE_COLUMN], errors='coerce').to_numpy(dtype='float64')
+    valid = (codes >= 0) & (months >= 0) & np.isfinite(prices)
+    groups['count'] = np.bincount(codes[valid], minlength=len(groups)).astype('int64')
+    if not valid.any():
+        return pd.DataFrame(columns=['group', 'month', 'count', 'mean', 'median']), groups
+
+    first_month = int(months[valid].min())
+    month_pos = months[valid] - first_month
+    n_months = int(month_pos.max()) + 1
+
+    # 그룹 × 월 집계 (groupby 한 번, 거래가 있는 (그룹, 월)만). sort=True 라 그룹별로 월 오름차순 연속 구간
+    agg = pd.DataFrame({'g': codes[valid], 'm': month_pos, 'v': prices[valid]}) \
+        .groupby(['g', 'm'], sort=True)['v'].agg(['count', 'sum', 'median'])
+    g = agg.index.get_level_values('g').to_numpy().astype('int64')
+    m = agg.index.get_level_values('m').to_numpy().astype('int64')
+    count = agg['count'].to_numpy(dtype='float64')
+    total = agg['sum'].to_numpy(dtype='float64')
+    median = agg['median'].to_numpy(dtype='float64')
+
+    # (그룹, 월) 키는 오름차순이므로 구간 합계/같은 그룹의 12개월 전 행은 searchsorted 로 찾는다
+    keys = g * n_months + m
+    count_cum = np.concatenate([[0.0], count.cumsum()])
+    total_cum = np.concatenate([[0.0], total.cumsum()])
+    end = np.arange(1, len(keys) + 1)
+    columns = {
+        'group': g,
+        'month': month_labels(m + first_month),
+        'count': count.astype('int64'),
+        'mean': total / count,
+        'median': median,
+    }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for w in windows:
+            # w개월 구간 [m-w+1, m] 의 첫 행 (그룹 경계를 넘지 않도록 월 0 에서 자름)
+            start = np.searchsorted(keys, g * n_months + np.maximum(m - w + 1, 0), side='left')
+            columns[f'rolling_{w}'] = (total_cum[end] - total_cum[start]) / (count_cum[end] - count_cum[start])
+        previous_key = g * n_months + m - 12
+        previous_at = np.minimum(np.searchsorted(keys, previous_key, side='left'), len(keys) - 1)
+        has_previous = (m >= 12) & (keys[previous_at] == previous_key)
+        columns['yoy'] = np.where(has_previous, median / median[previous_at] - 1, np.nan)
+
+    points = pd.DataFrame(columns)
+    return points, groups
+
+
+def repeat_sales_index(df: pd.DataFrame) -> Dict:
+    """
+    반복매매 지수. 같은 시군구 + 단지명 + 전용면적을 한 주택형으로 보고
+    주택형의 월별 중앙 가격을 시간순으로 이은 연속 쌍으로 월별 로그 지수를 최소제곱 추정한다.
+    반환: {'pairs': 매매 쌍 수, 'base_month': 기준 월, 'points': [{'month', 'index'}]}
+    """
+    months = month_ordinals(df[MONTH_COLUMN])
+    prices = pd.to_numeric(df[PRICE_COLUMN], errors='coerce').to_numpy(dtype='float64')
+    area = pd.to_numeric(df[AREA_COLUMN], errors='coerce').round(2).to_numpy()
+    valid = (months >= 0) & np.isfinite(prices) & (prices > 0) & np.isfinite(area)
+    empty = {'pairs': 0, 'base_month': None, 'points': []}
+    if not valid.any():
+        return empty
+
+    unit, _ = pd.MultiIndex.from_arrays([
+        df[REGION_COLUMN].to_numpy()[valid], df[COMPLEX_COLUMN].to_numpy()[valid], area[valid],
+    ]).factorize()
+    # 같은 주택형의 같은 월 거래는 중앙값 하나로 묶은 뒤 월 순서로 이웃한 거래끼리 쌍을 만든다
+    per_month = pd.DataFrame({'u': unit, 'm': months[valid], 'p': np.log(prices[valid])}) \
+        .groupby(['u', 'm'], sort=True)['p'].median()
+    u = per_month.index.get_level_values('u').to_numpy()
+    m = per_month.index.get_level_values('m').to_numpy()
+    log_price = per_month.to_numpy()
+    same_unit = u[1:] == u[:-1]
+    before, after = m[:-1][same_unit], m[1:][same_unit]
+    diff = (log_price[1:] - log_price[:-1])[same_unit]
+    if diff.size == 0:
+        return empty
+
+    # 정규방정식 (월 수 × 월 수): 쌍마다 후 월 +1, 전 월 -1 인 설계 행렬의 X'X, X'y
+    first_month = int(min(before.min(), after.min()))
+    n_months = int(max(before.max(), after.max())) - first_month + 1
+    b, a = before - first_month, after - first_month
+    # 대각(a,a)/(b,b) +1, 비대각(a,b)/(b,a) -1 을 평탄화한 셀 번호의 bincount 로 한 번에 누적
+    cells = np.concatenate([a * n_months + a, b * n_months + b, a * n_months + b, b * n_months + a])
+    weights = np.repeat([1.0, 1.0, -1.0, -1.0], a.size)
+    xtx = np.bincount(cells, weights=weights, minlength=n_months * n_months).reshape(n_months, n_months)
+    xty = np.bincount(a, weights=diff, minlength=n_months) - np.bincount(b, weights=diff, minlength=n_months)
+
+    # 기준 월(첫 월) 지수를 0 으로 고정하고 나머지를 푼다. 쌍이 없는 월은 결측
+    observed = np.bincount(np.concatenate([a, b]), minlength=n_months) > 0
+    solution, *_ = np.linalg.lstsq(xtx[1:, 1:], xty[1:], rcond=None)
+    log_index = np.concatenate([[0.0], solution])
+    points = [
+        {'month': int(label), 'index': float(100 * np.exp(value))}
+        for label, value, seen in zip(month_labels(np.arange(n_months) + first_month), log_index, observed)
+        if seen
+    ]
+    return {'pairs': int(diff.size), 'base_month': int(month_labels(np.array([first_month]))[0]), 'points': points}
+
+
+def repeat_sales_path_for(dataset_path: str) -> str:
+    """분석 캐시 파일에 대응하는 반복매매 지수 파일 경로"""
+    return sidecar_path(dataset_path, REPEAT_SALES_SUFFIX)
+
+
+def save_repeat_sales(result: Dict, path: str):
+    """반복매매 지수를 npz 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = f"{path}.tmp.npz"
+    base_month = result['base_month']
+    np.savez(tmp_path,
+             version=REPEAT_SALES_VERSION,
+             months=np.array([point['month'] for point in result['points']], dtype='int64'),
+             index=np.array([point['index'] for point in result['points']], dtype='float64'),
+             meta=np.array([result['pairs'], -1 if base_month is None else base_month], dtype='int64'))
+    os.replace(tmp_path, path)
+
+
+def load_repeat_sales(path: str) -> Optional[Dict]:
+    """저장된 반복매매 지수를 읽는다. 버전이 다르면 None"""
+    with np.load(path) as data:
+        if int(data['version']) != REPEAT_SALES_VERSION:
+            return None
+        pairs, base_month = (int(v) for v in data['meta'])
+        return {'pairs': pairs, 'base_month': None if base_month < 0 else base_month,
+                'points': [{'month': int(month), 'index': float(value)}
+                           for month, value in zip(data['months'], data['index'])]}
+
+
+def _with_price_columns(df: pd.DataFrame) -> pd.DataFrame:
+    missing = [col for col in PRICE_INDEX_COLUMNS if col not in df.columns]
+    if missing:
+        # 필요한 컬럼이 없는 데이터셋은 빈 결과
+        df = df.assign(**{col: np.nan for col in missing})
+    return df
+
+
+def build_and_save_repeat_sales(dataset_path: str, df: pd.DataFrame) -> Dict:
+    """df 전체의 반복매매 지수를 계산해 dataset_path 옆에 저장"""
+    result = repeat_sales_index(_with_price_columns(df))
+    path = repeat_sales_path_for(dataset_path)
+    try:
+        save_repeat_sales(result, path)
+        print(f"[PRICE] 반복매매 지수 저장: {path} (쌍 {result['pairs']:,}개, 월 {len(result['points']):,}개)")
+    except OSError as e:
+        print(f"[PRICE] 반복매매 지수 저장 실패: {path}, 오류: {e}")
+    return result
+
+
+def get_repeat_sales(dataset_path: str, load: Callable[[], pd.DataFrame],
+                     region: Optional[str] = None, complex: Optional[str] = None) -> Dict:
+    """
+    dataset_path 의 반복매매 지수.
+    조건이 없으면 업로드 때 저장한 sidecar 를 쓰고(없거나 오래됐으면 새로 만들어 저장),
+    시군구/단지 조건이 있으면 조건별로 한 번만 계산해 메모리에 보관한다.
+    """
+    if not region and not complex:
+        return get_or_build(dataset_path, REPEAT_SALES_SUFFIX,
+                            build=lambda: build_and_save_repeat_sales(dataset_path, load()),
+                            load=load_repeat_sales,
+                            label='[PRICE] 반복매매 지수')
+
+    key = (os.path.abspath(dataset_path), os.path.getmtime(dataset_path), region or None, complex or None)
+    with _cached_lock:
+        result = _cached_repeat_sales.get(key)
+        if result is not None:
+            _cached_repeat_sales.move_to_end(key)
+            return result
+
+    result = repeat_sales_index(_filter_rows(_with_price_columns(load()), region, complex))
+
+    with _cached_lock:
+        _cached_repeat_sales[key] = result
+        while len(_cached_repeat_sales) > _MAX_CACHED_REPEAT_SALES:
+            _cached_repeat_sales.popitem(last=False)
+    return result
+
+
+class PriceTrends:
+    """월별 추이 계산 결과. to_dict(limit, offset) 으로 건수 순 그룹을 페이지 단위로 직렬화"""
+
+    def __init__(self, level: str, windows, points: pd.DataFrame, groups: pd.DataFrame, repeat_sales: Dict):
+        self.level = level
+        self.windows = list(windows)
+        self.points = points
+        self.groups = groups
+        self.repeat_sales = repeat_sales
+
+    def to_dict(self, limit: Optional[int] = None, offset: int = 0) -> Dict:
+        counts = self.groups['count'].to_numpy()
+        top = np.flatnonzero(counts)
+        top = top[np.argsort(-counts[top], kind='stable')]
+        top = top[offset:offset + limit if limit is not None else None]
+        group_codes = self.points['group'].to_numpy()
+        starts = np.searchsorted(group_codes, top, side='left')
+        ends = np.searchsorted(group_codes, top, side='right')
+        # 선택된 그룹의 행을 한 번에 레코드로 변환한 뒤 그룹별 구간으로 나눈다
+        lengths = ends - starts
+        rows = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+        frame = self.points.iloc[rows].drop(columns='group').astype(object)
+        records = frame.where(pd.notna(frame), None).to_dict(orient='records')
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        series: List[Dict] = []
+        for i, code in enumerate(top):
+            label = self.groups.iloc[code]
+            series.append({'region': label['region'], 'complex': label['complex'],
+                           'count': int(label['count']), 'points': records[bounds[i]:bounds[i + 1]]})
+        return {
+            'level': self.level,
+            'windows': self.windows,
+            'group_count': int(np.count_nonzero(counts)),
+            'offset': offset,
+            'series': series,
+            'repeat_sales': self.repeat_sales,
+        }
+
+    def recent_table(self, months: int = 12) -> List[Dict]:
+        """첫 그룹(건수 최다)의 최근 months 개월 행에 반복매매 지수를 붙인 표 (분석 페이지용)"""
+        data = self.to_dict(limit=1)
+        if not data['series']:
+            return []
+        index_by_month = {point['month']: point['index'] for point in self.repeat_sales['points']}
+        return [dict(point, repeat_index=index_by_month.get(point['month']))
+                for point in data['series'][0]['points'][-months:]]
+
+
+def price_trends(df: pd.DataFrame, level: str = 'all', region: Optional[str] = None,
+                 complex: Optional[str] = None, windows=ROLLING_WINDOWS,
+                 repeat_sales: Optional[Dict] = None) -> PriceTrends:
+    """
+    region/complex 로 좁힌 행의 level 별 월별 추이 + 반복매매 지수.
+    repeat_sales 를 주면(미리 계산/저장된 지수) 다시 풀지 않는다.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"level 은 {', '.join(LEVELS)} 중 하나여야 합니다.")
+    rows = _filter_rows(_with_price_columns(df), region, complex)
+    points, groups = monthly_series(rows, level, windows)
+    if repeat_sales is None:
+        repeat_sales = repeat_sales_index(rows)
+    return PriceTrends(level, windows, points, groups, repeat_sales)
+
+
+def get_price_trends(dataset_path: str, load: Callable[[], pd.DataFrame], level: str = 'all',
+                     region: Optional[str] = None, complex: Optional[str] = None) -> PriceTrends:
+    """dataset_path 의 월별 추이 (load() 는 PRICE_INDEX_COLUMNS 를 포함한 DataFrame 을 반환)"""
+    key = (os.path.abspath(dataset_path), os.path.getmtime(dataset_path), level, region or None, complex or None)
+    with _cached_lock:
+        trends = _cached_trends.get(key)
+        if trends is not None:
+            _cached_trends.move_to_end(key)
+            return trends
+
+    df = load()
+    repeat_sales = get_repeat_sales(dataset_path, lambda: df, region, complex)
+    trends = price_trends(df, level, region, complex, repeat_sales=repeat_sales)
+
+    with _cached_lock:
+        _cached_trends[key] = trends
+        while len(_cached_trends) > _MAX_CACHED_TRENDS:
+            _cached_trends.popitem(last=False)
+    return trends
@@ -0,0 +1,247 @@
+"""
+/results 와 /download 가 공유하는 필터 쿼리 엔진
+
+세션의 filter_params(주소 또는 좌표, 반경, 면적 구간, 건축년도 구간)를 정규화한 값과 데이터셋 해시를 키로
+필터 결과(행 위치 + 좌표/거리 배열)를 LRU 로 보관한다. 결과를 바꾸는 설정(거리 계산 방식, 격자 크기,
+건축년도 구간의 기준연도)도 키에 포함하므로 설정이 바뀌거나 해가 바뀌면 새로 계산한다.
+페이지 이동, 정렬 변경, 다운로드, 결과 집계는 같은 결과를 재사용하며 정렬 순서와 집계도 결과 안에 캐시된다.
+
+주소 → 좌표 변환 → 구간 비트맵(facets) → 공간 인덱스 반경 필터 순으로 계산한다.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import dataset_key
+from facets import get_facets
+from geo_utils import radius_positions
+from geocode_store import normalize_address_key
+from result_aggregates import aggregate_result
+from spatial_index import get_index, DEFAULT_CELL_DEG
+
+DEFAULT_MAX_ENTRIES = 64
+
+QueryKey = Tuple[str, float, Tuple, Tuple]
+
+
+def normalize_params(filter_params: Dict) -> Tuple:
+    """
+    필터 파라미터에서 결과 집합을 결정하는 값만 정규화해 캐시 키로 사용 (정렬 조건 제외).
+    lat/lon 이 있으면 주소 대신 좌표를 중심점으로 사용한다.
+    """
+    lat, lon = filter_params.get('lat'), filter_params.get('lon')
+    center = None
+    if lat not in (None, '') and lon not in (None, ''):
+        center = (round(float(lat), 7), round(float(lon), 7))
+    return (
+        '' if center else normalize_address_key(filter_params.get('address') or ''),
+        center,
+        float(filter_params.get('radius', 10) or 10),
+        filter_params.get('area_range') or 'all',
+        filter_params.get('build_year') or 'all',
+    )
+
+
+def settings_key(method: str, cell_deg: float) -> Tuple:
+    """필터 결과에 영향을 주는 설정: 거리 계산 방식, 공간 인덱스 격자 크기, 건축년도 구간 기준연도"""
+    return method, float(cell_deg), datetime.now().year
+
+
+def query_etag(dataset_path: str, filter_params: Dict, *extra,
+               method: str = 'haversine', cell_deg: float = DEFAULT_CELL_DEG) -> str:
+    """
+    데이터셋 버전(해시, 수정시각)과 정규화된 필터/정렬/페이지 조건, 결과 설정으로 만든 ETag.
+    같은 데이터셋과 조건이면 항상 같은 값이므로 결과를 계산하기 전에 304 여부를 판단할 수 있다.
+    """
+    source = repr((dataset_key(dataset_path), os.path.getmtime(dataset_path), normalize_params(filter_params),
+                   settings_key(method, cell_deg), extra))
+    return hashlib.md5(source.encode('utf-8')).hexdigest()
+
+
+def _normalize_bunji(values: pd.Series) -> pd.Series:
+    """번지 표시 정규화: 숫자+하이픈만 남긴 문자열"""
+    return values.astype(str).str.replace(r'[^0-9\-]', '', regex=True)
+
+
+class QueryResult:
+    """
+    필터 결과 집합. positions 는 데이터셋의 행 위치(오름차순)이고
+    lat / lon / distance 는 positions 와 같은 순서의 배열이다.
+    """
+
+    def __init__(self, positions, lat, lon, distance, center_lat, center_lon):
+        self.positions = positions
+        self.lat = lat
+        self.lon = lon
+        self.distance = distance
+        self.center_lat = center_lat
+        self.center_lon = center_lon
+        self._orders: Dict[Tuple[str, str], np.ndarray] = {}
+        self._avg_price: Optional[float] = None
+        self._aggregates: Dict[Tuple[int, Optional[int]], Dict] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def order(self, df: pd.DataFrame, sort_col: Optional[str] = None, sort_order: str = 'desc',
+              distance_col: str = '중심점과의거리') -> np.ndarray:
+        """
+        결과 행의 정렬 순서(0..len-1 순열)를 반환. 정렬 컬럼이 없으면 데이터셋 순서.
+        정렬 규칙은 기존 sort_values(na_position='last') 와 같다.
+        """
+        if not sort_col or (sort_col not in df.columns and sort_col != distance_col):
+            return np.arange(len(self.positions))
+        key = (sort_col, sort_order)
+        with self._lock:
+            cached = self._orders.get(key)
+        if cached is not None:
+            return cached
+
+        if sort_col == distance_col:
+            values = pd.Series(self.distance)
+        elif sort_col in ('위도', '경도'):
+            values = pd.Series(self.lat if sort_col == '위도' else self.lon)
+        else:
+            values = df[sort_col].iloc[self.positions].reset_index(drop=True)
+            if sort_col == '번지':
+                values = _normalize_bunji(values)
+        order = values.sort_values(ascending=(sort_order == 'asc'), na_position='last').index.to_numpy()
+        with self._lock:
+            self._orders[key] = order
+        return order
+
+    def frame(self, df: pd.DataFrame, rows: Optional[np.ndarray] = None,
+              distance_col: str = '중심점과의거리', lat_col: str = '위도', lon_col: str = '경도') -> pd.DataFrame:
+        """
+        결과 행(rows: order() 의 일부 등 결과 내 위치, None 이면 전체)을 DataFrame 으로 만든다.
+        위도/경도는 숫자로 변환된 값, distance_col 에 거리(km)가 들어간다.
+        """
+        if rows is None:
+            rows = np.arange(len(self.positions))
+        result = df.iloc[self.positions[rows]].copy()
+        result[lat_col] = self.lat[rows]
+        result[lon_col] = self.lon[rows]
+        result[distance_col] = self.distance[rows]
+        return result
+
+    def avg_price(self, df: pd.DataFrame) -> float:
+        """결과 전체의 평균 거래금액 (값이 없으면 0)"""
+        if self._avg_price is None:
+            if len(self.positions) == 0 or '거래금액' not in df.columns:
+                self._avg_price = 0.0
+            else:
+                price = pd.to_numeric(df['거래금액'].iloc[self.positions], errors='coerce')
+                self._avg_price = float(price.mean()) if not price.isna().all() else 0.0
+        return self._avg_price
+
+    def aggregates(self, df: pd.DataFrame, bins: int, complex_limit: Optional[int] = None) -> Dict:
+        """결과 전체의 전용평당 히스토그램 / 단지별 요약 / 백분위수 구간 (구간 수, 단지 수 조건별 캐시)"""
+        key = (bins, complex_limit)
+        with self._lock:
+            cached = self._aggregates.get(key)
+        if cached is not None:
+            return cached
+        aggregates = aggregate_result(df, self.positions, self.lat, self.lon, bins, complex_limit)
+        with self._lock:
+            self._aggregates[key] = aggregates
+        return aggregates
+
+
+class QueryEngine:
+    """(데이터셋 해시, 수정시각, 정규화된 파라미터, 결과 설정) 단위로 QueryResult 를 보관하는 LRU"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[QueryKey, QueryResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, dataset_path: str, df: pd.DataFrame, filter_params: Dict,
+            geocode: Callable[[str], Tuple[Optional[float], Optional[float]]],
+            method: str = 'haversine', cell_deg: float = DEFAULT_CELL_DEG) -> Optional[QueryResult]:
+        """
+        필터 결과를 반환. 캐시에 없으면 계산 후 저장한다.
+        주소 좌표를 찾지 못하면 None (캐시하지 않음).
+        """
+        params = normalize_params(filter_params)
+        key: QueryKey = (dataset_key(dataset_path), os.path.getmtime(dataset_path), params,
+                         settings_key(method, cell_deg))
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        address, center, radius_km, area_range, build_year = params
+        center_lat, center_lon = center if center else geocode(address)
+        if center_lat is None or center_lon is None:
+            return None
+
+        # 면적/건축년도 구간 필터 (미리 계산된 구간 비트맵 AND)
+        facet_mask = get_facets(dataset_path, df).mask({'area_range': area_range, 'build_year': build_year})
+        # 반경 필터 (공간 인덱스로 후보 셀만 조회 후 벡터화 거리 계산, km 단위)
+        spatial_index = get_index(dataset_path, df, cell_deg=cell_deg)
+        positions, lat, lon, dist = radius_positions(df, center_lat, center_lon, radius_km, method=method,
+                                                     index=spatial_index, row_mask=facet_mask)
+        result = QueryResult(positions, lat, lon, dist, center_lat, center_lon)
+        print(f"[QUERY] 필터 결과 계산: {os.path.basename(dataset_path)} {params} → {len(result):,}건")
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, dataset_path: str) -> int:
+        """dataset_path 에 대한 결과를 모두 제거하고 제거한 수를 반환"""
+        file_key = dataset_key(dataset_path)
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == file_key]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def info(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# 애플리케이션 공용 쿼리 엔진
+_query_engine = QueryEngine()
+
+
+def configure(max_entries: Optional[int] = None):
+    """공용 쿼리 엔진의 캐시 크기를 설정 (create_app 에서 호출)"""
+    if max_entries is not None:
+        _query_engine.max_entries = max_entries
+
+
+def run_query(dataset_path: str, df: pd.DataFrame, filter_params: Dict, geocode,
+              method: str = 'haversine', cell_deg: float = DEFAULT_CELL_DEG) -> Optional[QueryResult]:
+    return _query_engine.run(dataset_path, df, filter_params, geocode, method=method, cell_deg=cell_deg)
+
+
+def invalidate_query_results(dataset_path: str) -> int:
+    return _query_engine.invalidate(dataset_path)
+
+
+def get_query_cache_info() -> Dict:
+    return _query_engine.info()
@@ -0,0 +1,105 @@
+"""
+필터 결과 집계 모듈
+
+반경 쿼리 결과 전체(QueryResult.positions)에 대해 지도 UI 용 요약을 계산한다.
+행을 내려보내지 않고 몇 KB 의 집계만 응답하기 위한 것으로, 모두 결과 행 위치 배열 기준의 벡터 연산이다.
+- 전용평당 히스토그램 (구간 수 지정)
+- 단지별 요약: 건수, 거래금액 중앙값, 전용평당 중앙값, 최근 계약년월, 좌표 중심
+- 거래금액 / 전용평당 백분위수 구간
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from stats_cube import PERCENTILES
+
+REGION_COLUMN = '시군구'
+COMPLEX_COLUMN = '단지명'
+MONTH_COLUMN = '계약년월'
+PRICE_COLUMN = '거래금액'
+PPP_COLUMN = '전용평당'
+BAND_COLUMNS = {'price': PRICE_COLUMN, 'ppp': PPP_COLUMN}
+# 응답 크기를 줄이기 위해 금액은 소수점 둘째 자리, 좌표는 7자리까지만 내보낸다 (float32 저장값의 잡음 제거)
+VALUE_DECIMALS = 2
+COORD_DECIMALS = 7
+
+
+def _numeric(df: pd.DataFrame, col: str, positions: np.ndarray) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(positions), np.nan)
+    return pd.to_numeric(df[col].iloc[positions], errors='coerce').to_numpy(dtype='float64')
+
+
+def price_histogram(values: np.ndarray, bins: int) -> Dict:
+    """유효한 값의 등간격 히스토그램 (edges 는 bins + 1 개)"""
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {'bins': bins, 'edges': [], 'counts': []}
+    counts, edges = np.histogram(values, bins=bins)
+    return {'bins': bins, 'edges': np.round(edges, VALUE_DECIMALS).tolist(), 'counts': counts.tolist()}
+
+
+def percentile_bands(values: np.ndarray) -> Dict:
+    """건수, 평균, 최소/최대, 백분위수 (값이 없으면 None)"""
+    values = values[np.isfinite(values)]
+    band = {'count': int(values.size), 'mean': None, 'min': None, 'max': None}
+    band.update({f'p{q}': None for q in PERCENTILES})
+    if values.size:
+        stats = np.round([values.mean(), values.min(), values.max(), *np.percentile(values, PERCENTILES)], VALUE_DECIMALS)
+        band.update(zip(['mean', 'min', 'max'] + [f'p{q}' for q in PERCENTILES], stats.tolist()))
+    return band
+
+
+def complex_summary(df: pd.DataFrame, positions: np.ndarray, lat: np.ndarray, lon: np.ndarray,
+                    limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+    """
+    결과 행의 시군구 + 단지명별 요약 (건수 내림차순, 동률은 결과 내 첫 등장 순) 상위 limit 개와 전체 단지 수.
+    lat / lon 은 좌표가 있는 거래의 평균 위도/경도 (단지 중심).
+    """
+    if len(positions) == 0 or COMPLEX_COLUMN not in df.columns:
+        return [], 0
+    rows = pd.DataFrame({
+        'region': df[REGION_COLUMN].iloc[positions].to_numpy() if REGION_COLUMN in df.columns else None,
+        'complex': df[COMPLEX_COLUMN].iloc[positions].to_numpy(),
+        'price': _numeric(df, PRICE_COLUMN, positions),
+        'ppp': _numeric(df, PPP_COLUMN, positions),
+        'month': _numeric(df, MONTH_COLUMN, positions),
+        'lat': np.asarray(lat, dtype='float64'),
+        'lon': np.asarray(lon, dtype='float64'),
+    })
+    grouped = rows.groupby(['region', 'complex'], sort=False, dropna=False).agg(
+        count=('complex', 'size'),
+        price_median=('price', 'median'),
+        ppp_median=('ppp', 'median'),
+        latest_month=('month', 'max'),
+        lat=('lat', 'mean'),
+        lon=('lon', 'mean'),
+    )
+    total = len(grouped)
+    grouped = grouped.iloc[np.argsort(-grouped['count'].to_numpy(), kind='stable')[:limit]]
+    grouped = grouped.round({'price_median': VALUE_DECIMALS, 'ppp_median': VALUE_DECIMALS,
+                             'lat': COORD_DECIMALS, 'lon': COORD_DECIMALS})
+    grouped = grouped.reset_index().astype(object)
+    grouped = grouped.where(pd.notna(grouped), None)
+    summary = grouped.to_dict(orient='records')
+    for item in summary:
+        item['count'] = int(item['count'])
+        if item['latest_month'] is not None:
+            item['latest_month'] = int(item['latest_month'])
+    return summary, total
+
+
+def aggregate_result(df: pd.DataFrame, positions: np.ndarray, lat: np.ndarray, lon: np.ndarray,
+                     bins: int, complex_limit: Optional[int] = None) -> Dict:
+    """필터 결과 전체의 히스토그램 / 단지별 요약 / 백분위수 구간"""
+    ppp = _numeric(df, PPP_COLUMN, positions)
+    complexes, complex_count = complex_summary(df, positions, lat, lon, complex_limit)
+    return {
+        'count': int(len(positions)),
+        'histogram': {'column': PPP_COLUMN, **price_histogram(ppp, bins)},
+        'bands': {name: percentile_bands(ppp if col == PPP_COLUMN else _numeric(df, col, positions))
+                  for name, col in BAND_COLUMNS.items()},
+        'complex_count': complex_count,
+        'complexes': complexes,
+    }
@@ -0,0 +1,131 @@
+"""
+결과 페이지 표시용 값 포맷터
+
+/results 페이지의 레코드를 컬럼 단위 포맷 규칙으로 한 번에 변환한다.
+셀마다 if/elif 분기와 float()/int() 를 호출하던 기존 /results 루프 + clean_for_json 과
+출력이 같도록 규칙을 맞췄으며(tests/test_result_formatter.py), 숫자 컬럼은 컬럼 전체를 NumPy 배열로 한 번에 변환한다.
+
+포맷 규칙
+- 'comma_int' : 정수로 버림 후 천 단위 쉼표 (금액/보증금/월세 컬럼, 결측은 '')
+- 'int'       : 정수로 버림 (계약년월, 층, 건축년도, 결측은 '')
+- 'fixed2'    : 소수점 둘째 자리 (전용면적, 전용평)
+- 'comma2'    : 천 단위 쉼표 + 소수점 둘째 자리 (전용평당, 공급평당)
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_processing import clean_for_json
+
+COLUMN_FORMATS = {
+    '계약년월': 'int',
+    '전용면적(㎡)': 'fixed2',
+    '전용평': 'fixed2',
+    '층': 'int',
+    '건축년도': 'int',
+    '전용평당': 'comma2',
+    '공급평당': 'comma2',
+}
+
+
+def column_format(col: str) -> Optional[str]:
+    """컬럼명에 해당하는 포맷 규칙 (없으면 None)"""
+    if '금액' in col or '보증금' in col or '월세' in col:
+        return 'comma_int'
+    return COLUMN_FORMATS.get(col)
+
+
+def _format_numeric(values: np.ndarray, fmt: str) -> list:
+    """float64 배열을 규칙에 맞게 변환한 값 목록 (기존 방식과 같은 결측/무한대 처리)"""
+    if fmt == 'fixed2':
+        # float('nan') 을 그대로 포맷하던 기존 동작에 맞춰 결측도 'nan' 문자열이 된다
+        return [f'{v:.2f}' for v in values.tolist()]
+    if fmt == 'comma2':
+        return [f'{v:,.2f}' for v in values.tolist()]
+
+    # 정수 변환: 결측은 '', 무한대는 int() 변환 실패로 원래 값 유지
+    result = np.array(values.tolist(), dtype=object)
+    result[np.isnan(values)] = ''
+    finite = np.isfinite(values)
+    integers = np.trunc(values[finite]).astype('int64')
+    if fmt == 'comma_int':
+        result[finite] = [f'{v:,}' for v in integers.tolist()]
+    else:
+        result[finite] = integers.astype(str).tolist()
+    return result.tolist()
+
+
+def _plain_values(series: pd.Series) -> list:
+    """포맷 규칙이 없는 컬럼: 값 그대로, 결측만 ''"""
+    values = series.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    if missing.any():
+        values = values.copy()
+        values[missing] = ''
+    return values.tolist()
+
+
+def format_records(df: pd.DataFrame, columns: List[str]) -> List[Dict]:
+    """
+    페이지 DataFrame 을 템플릿용 레코드 목록으로 변환 (기존 셀 단위 루프 + clean_for_json 과 같은 결과).
+    columns 에 있는 컬럼만 포맷 규칙을 적용하고, 모든 결측값은 '' 로 바꾼다.
+    컬럼별로 한 번에 변환한 뒤 행 단위 dict 로 묶으므로 셀마다 분기하지 않는다.
+    """
+    keys = df.columns.tolist()
+    column_values = []
+    legacy_columns = []
+    for col in keys:
+        fmt = column_format(col) if col in columns else None
+        series = df[col]
+        if fmt is None:
+            column_values.append(_plain_values(series))
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            column_values.append(_format_numeric(series.to_numpy(dtype='float64', na_value=np.nan), fmt))
+        else:
+            # 문자열로 저장된 숫자 등 예외 타입은 셀 단위 규칙으로 처리
+            legacy_columns.append(col)
+            column_values.append(series.to_numpy(dtype=object).tolist())
+
+    records = [dict(zip(keys, row)) for row in zip(*column_values)]
+    if legacy_columns:
+        records = clean_for_json(_format_cells(records, legacy_columns))
+    return records
+
+
+def _legacy_format_number(val):
+    try:
+        if val is None or val == '' or (isinstance(val, float) and pd.isna(val)):
+            return ''
+        if isinstance(val, (int, float)):
+            return '{:,}'.format(int(val))
+        if isinstance(val, str) and val.replace(',', '').replace('.', '', 1).isdigit():
+            return '{:,}'.format(int(float(val)))
+        return val
+    except Exception:
+        return val
+
+
+def _format_cells(data_records: List[Dict], columns: List[str]) -> List[Dict]:
+    """셀 단위 포맷 (숫자 dtype 이 아닌 컬럼용, 기존 /results 규칙 그대로)"""
+    for row in data_records:
+        for col in columns:
+            if col not in row:
+                continue
+            val = row[col]
+            fmt = column_format(col)
+            if fmt == 'comma_int':
+                # 금액, 보증금, 월세 등 '금액'이 포함된 모든 숫자 컬럼에 쉼표 추가
+                if isinstance(val, (int, float)) or (isinstance(val, str) and val.replace(',', '').replace('.', '', 1).isdigit()):
+                    row[col] = _legacy_format_number(val)
+            elif fmt is not None and val is not None and val != '':
+                try:
+                    if fmt == 'int':
+                        row[col] = str(int(float(val)))
+                    elif fmt == 'fixed2':
+                        row[col] = f"{float(val):.2f}"
+                    elif fmt == 'comma2':
+                        row[col] = f"{float(val):,.2f}"
+                except Exception:
+                    pass
+    return data_records
@@ -0,0 +1,69 @@
+"""
+분석 캐시 sidecar 파일 공용 캐시 모듈
+
+공간 인덱스(.grid.npz), 구간 비트맵(.facets.npz), 통계 큐브(.cube.npz), 클러스터 격자(.clusters.npz) 처럼
+분석 캐시 파일 옆에 `{이름}{suffix}` 로 저장되는 파생 데이터를 같은 규칙으로 찾는다.
+- 프로세스 안에서는 suffix 별 LRU (데이터셋 경로, 수정시각) 키로 보관
+- 메모리에 없으면 데이터셋보다 새로운 디스크 파일을 load() 로 읽고,
+  없거나 오래됐거나 읽지 못했거나(버전 불일치 시 load() 는 None) is_usable() 이 거짓이면 build() 로 새로 만든다
+- build() 는 결과를 파일로 저장까지 하는 각 모듈의 build_and_save_* 함수
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+MAX_LOADED = 8
+
+# suffix → {(데이터셋 절대경로, 수정시각): 로드된 sidecar}
+_loaded: Dict[str, OrderedDict] = {}
+_loaded_lock = threading.Lock()
+
+
+def sidecar_path(dataset_path: str, suffix: str) -> str:
+    """분석 캐시 파일에 대응하는 sidecar 파일 경로"""
+    return os.path.splitext(dataset_path)[0] + suffix
+
+
+def get_or_build(dataset_path: str, suffix: str, build: Callable[[], T], load: Callable[[str], Optional[T]],
+                 is_usable: Optional[Callable[[T], bool]] = None, label: str = '[SIDECAR]',
+                 max_loaded: int = MAX_LOADED) -> T:
+    """
+    dataset_path 의 sidecar 를 메모리 → 디스크 → build() 순으로 찾아 반환.
+    label 은 로드 실패 로그 앞에 붙는 이름 (예: '[INDEX] 공간 인덱스').
+    """
+    path = sidecar_path(dataset_path, suffix)
+    dataset_mtime = os.path.getmtime(dataset_path)
+    key = (os.path.abspath(dataset_path), dataset_mtime)
+
+    def usable(value) -> bool:
+        return value is not None and (is_usable is None or is_usable(value))
+
+    with _loaded_lock:
+        cache = _loaded.setdefault(suffix, OrderedDict())
+        value = cache.get(key)
+        if usable(value):
+            cache.move_to_end(key)
+            return value
+
+    value = None
+    if os.path.exists(path) and os.path.getmtime(path) >= dataset_mtime:
+        try:
+            value = load(path)
+        except Exception as e:
+            print(f"{label} 로드 실패, 재생성합니다: {path}, 오류: {e}")
+        if not usable(value):
+            value = None
+
+    if value is None:
+        value = build()
+
+    with _loaded_lock:
+        cache = _loaded.setdefault(suffix, OrderedDict())
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_loaded:
+            cache.popitem(last=False)
+    return value
@@ -0,0 +1,212 @@
+"""
+분석 데이터 좌표에 대한 격자(grid) 공간 인덱스 모듈
+
+위경도를 cell_deg 크기의 격자로 나누고, 행 위치를 셀 번호(row * n_cols + col) 순으로 정렬해 둔다.
+같은 격자 행에서 연속된 셀들은 정렬 배열에서도 연속 구간이므로,
+반경 쿼리는 바운딩 박스가 걸치는 격자 행 수만큼의 구간만 읽으면 된다.
+
+인덱스는 분석 캐시 파일 옆에 `{이름}.grid.npz` 로 저장된다.
+"""
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sidecar_cache import get_or_build, sidecar_path
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.grid.npz'
+DEFAULT_CELL_DEG = 0.01  # 약 1.1km (위도 기준)
+
+
+class GridIndex:
+    """위경도 격자 버킷 인덱스"""
+
+    def __init__(self, order, cell_ids, starts, lat0, lon0, cell_deg, n_cols, n_rows):
+        self.order = order          # 셀 번호 순으로 정렬된 원본 행 위치 (int32)
+        self.cell_ids = cell_ids    # 비어있지 않은 셀 번호 (오름차순, int64)
+        self.starts = starts        # cell_ids[i] 의 order 내 시작 위치, 마지막 원소는 len(order)
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.cell_deg = cell_deg
+        self.n_cols = n_cols
+        self.n_rows = n_rows        # 인덱스를 만든 DataFrame 의 행 수 (좌표 없는 행 포함)
+
+    @classmethod
+    def build(cls, lat, lon, cell_deg: float = DEFAULT_CELL_DEG) -> 'GridIndex':
+        """위도/경도 배열로 인덱스를 생성. 좌표가 없는(NaN) 행은 인덱스에서 제외된다."""
+        lat = np.asarray(lat, dtype='float64')
+        lon = np.asarray(lon, dtype='float64')
+        valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+
+        if valid.size == 0:
+            return cls(np.empty(0, dtype='int32'), np.empty(0, dtype='int64'),
+                       np.zeros(1, dtype='int64'), 0.0, 0.0, cell_deg, 1, len(lat))
+
+        lat0 = float(np.floor(lat[valid].min() / cell_deg) * cell_deg)
+        lon0 = float(np.floor(lon[valid].min() / cell_deg) * cell_deg)
+        # 최솟값 근처 좌표는 부동소수점 반올림으로 -1 이 나올 수 있어 0 으로 맞춘다
+        rows = np.clip(np.floor((lat[valid] - lat0) / cell_deg).astype('int64'), 0, None)
+        cols = np.clip(np.floor((lon[valid] - lon0) / cell_deg).astype('int64'), 0, None)
+        n_cols = int(cols.max()) + 1
+
+        cell = rows * n_cols + cols
+        sort = np.argsort(cell, kind='stable')
+        sorted_cells = cell[sort]
+        cell_ids, starts = np.unique(sorted_cells, return_index=True)
+        starts = np.append(starts, sorted_cells.size).astype('int64')
+
+        return cls(valid[sort].astype('int32'), cell_ids.astype('int64'), starts,
+                   lat0, lon0, cell_deg, n_cols, len(lat))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, cell_deg: float = DEFAULT_CELL_DEG,
+                       lat_col: str = '위도', lon_col: str = '경도') -> 'GridIndex':
+        lat = pd.to_numeric(df[lat_col], errors='coerce').to_numpy(dtype='float64')
+        lon = pd.to_numeric(df[lon_col], errors='coerce').to_numpy(dtype='float64')
+        return cls.build(lat, lon, cell_deg)
+
+    def extend(self, lat, lon) -> Optional['GridIndex']:
+        """
+        기존 행 뒤에 추가된 행(위도/경도 배열)을 반영한 새 인덱스를 반환.
+        새 좌표가 격자 원점보다 아래/왼쪽이거나 열 범위를 벗어나 셀 번호 체계가 바뀌어야 하면 None (재생성 필요).
+        추가된 행 위치는 기존 행보다 크므로 각 셀 구간의 끝에 삽입하면 build() 결과와 같은 순서가 된다.
+        """
+        lat = np.asarray(lat, dtype='float64')
+        lon = np.asarray(lon, dtype='float64')
+        n_new = len(lat)
+        valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        if valid.size == 0:
+            return GridIndex(self.order, self.cell_ids, self.starts, self.lat0, self.lon0,
+                             self.cell_deg, self.n_cols, self.n_rows + n_new)
+        if self.cell_ids.size == 0:
+            return None
+
+        # build() 와 같은 방식으로 구한 원점이 기존 원점보다 작을 때만 셀 번호 체계가 바뀐다
+        # (원점과 같은 셀의 좌표가 반올림으로 원점보다 조금 작아도 그대로 반영)
+        if np.floor(lat[valid].min() / self.cell_deg) * self.cell_deg < self.lat0 or \
+                np.floor(lon[valid].min() / self.cell_deg) * self.cell_deg < self.lon0:
+            return None
+        # 원점 바로 위 좌표의 반올림 오차(-1)는 build() 와 같이 0 으로 맞춘다
+        rows = np.clip(np.floor((lat[valid] - self.lat0) / self.cell_deg).astype('int64'), 0, None)
+        cols = np.clip(np.floor((lon[valid] - self.lon0) / self.cell_deg).astype('int64'), 0, None)
+        if cols.max() >= self.n_cols:
+            return None
+
+        cell = rows * self.n_cols + cols
+        sort = np.argsort(cell, kind='stable')
+        new_cells = cell[sort]
+        new_positions = (valid[sort] + self.n_rows).astype('int32')
+
+        # 기존 정렬 배열의 셀 번호를 펼친 뒤, 같은 셀의 끝(side='right')에 새 행을 삽입
+        old_cells = np.repeat(self.cell_ids, np.diff(self.starts))
+        insert_at = np.searchsorted(old_cells, new_cells, side='right')
+        order = np.insert(self.order, insert_at, new_positions)
+        sorted_cells = np.insert(old_cells, insert_at, new_cells)
+        cell_ids, starts = np.unique(sorted_cells, return_index=True)
+        starts = np.append(starts, sorted_cells.size).astype('int64')
+
+        return GridIndex(order.astype('int32'), cell_ids.astype('int64'), starts,
+                         self.lat0, self.lon0, self.cell_deg, self.n_cols, self.n_rows + n_new)
+
+    def candidates(self, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """
+        바운딩 박스 (lat_min, lat_max, lon_min, lon_max) 와 겹치는 셀에 속한 행 위치를 반환.
+        결과는 원본 행 순서(오름차순)로 정렬된다.
+        """
+        if self.cell_ids.size == 0:
+            return np.empty(0, dtype='int64')
+
+        lat_min, lat_max, lon_min, lon_max = bbox
+        max_row = int(self.cell_ids[-1] // self.n_cols)
+        r0 = max(int(np.floor((lat_min - self.lat0) / self.cell_deg)), 0)
+        r1 = min(int(np.floor((lat_max - self.lat0) / self.cell_deg)), max_row)
+        c0 = max(int(np.floor((lon_min - self.lon0) / self.cell_deg)), 0)
+        c1 = min(int(np.floor((lon_max - self.lon0) / self.cell_deg)), self.n_cols - 1)
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype='int64')
+
+        # 격자 행마다 [row*n_cols+c0, row*n_cols+c1] 셀 구간은 order 배열에서 연속 구간
+        grid_rows = np.arange(r0, r1 + 1, dtype='int64')
+        lo = np.searchsorted(self.cell_ids, grid_rows * self.n_cols + c0, side='left')
+        hi = np.searchsorted(self.cell_ids, grid_rows * self.n_cols + c1, side='right')
+        slices = [self.order[self.starts[a]:self.starts[b]] for a, b in zip(lo, hi) if b > a]
+        if not slices:
+            return np.empty(0, dtype='int64')
+        return np.sort(np.concatenate(slices)).astype('int64')
+
+    def save(self, path: str):
+        """인덱스를 npz 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path,
+                 version=INDEX_VERSION,
+                 order=self.order, cell_ids=self.cell_ids, starts=self.starts,
+                 meta=np.array([self.lat0, self.lon0, self.cell_deg], dtype='float64'),
+                 shape=np.array([self.n_cols, self.n_rows], dtype='int64'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['GridIndex']:
+        """저장된 인덱스를 읽는다. 버전이 다르면 None"""
+        with np.load(path) as data:
+            if int(data['version']) != INDEX_VERSION:
+                return None
+            lat0, lon0, cell_deg = (float(v) for v in data['meta'])
+            n_cols, n_rows = (int(v) for v in data['shape'])
+            return cls(data['order'], data['cell_ids'], data['starts'],
+                       lat0, lon0, cell_deg, n_cols, n_rows)
+
+
+def index_path_for(dataset_path: str) -> str:
+    """분석 캐시 파일에 대응하는 인덱스 파일 경로"""
+    return sidecar_path(dataset_path, INDEX_SUFFIX)
+
+
+def build_and_save_index(dataset_path: str, df: pd.DataFrame,
+                         cell_deg: float = DEFAULT_CELL_DEG) -> GridIndex:
+    """df 로 인덱스를 만들고 dataset_path 옆에 저장"""
+    index = GridIndex.from_dataframe(df, cell_deg)
+    path = index_path_for(dataset_path)
+    try:
+        index.save(path)
+        print(f"[INDEX] 공간 인덱스 저장: {path} (셀 {index.cell_ids.size:,}개, 좌표 {index.order.size:,}건)")
+    except OSError as e:
+        print(f"[INDEX] 공간 인덱스 저장 실패: {path}, 오류: {e}")
+    return index
+
+
+def extend_and_save_index(dataset_path: str, base: GridIndex, new_rows: pd.DataFrame,
+                          merged_df: pd.DataFrame, cell_deg: float = DEFAULT_CELL_DEG,
+                          lat_col: str = '위도', lon_col: str = '경도') -> GridIndex:
+    """
+    base 인덱스(merged_df 앞부분 행에 대한 인덱스)에 new_rows 를 추가해 dataset_path 옆에 저장.
+    격자 범위를 벗어나 증분 반영이 안 되면 merged_df 전체로 다시 만든다.
+    """
+    index = None
+    if base.cell_deg == cell_deg and base.n_rows + len(new_rows) == len(merged_df):
+        index = base.extend(pd.to_numeric(new_rows[lat_col], errors='coerce').to_numpy(dtype='float64'),
+                            pd.to_numeric(new_rows[lon_col], errors='coerce').to_numpy(dtype='float64'))
+    if index is None:
+        print("[INDEX] 증분 반영 불가(격자 범위 변경), 전체 재생성")
+        return build_and_save_index(dataset_path, merged_df, cell_deg)
+
+    path = index_path_for(dataset_path)
+    try:
+        index.save(path)
+        print(f"[INDEX] 공간 인덱스 증분 저장: {path} (+{len(new_rows):,}건, 좌표 {index.order.size:,}건)")
+    except OSError as e:
+        print(f"[INDEX] 공간 인덱스 저장 실패: {path}, 오류: {e}")
+    return index
+
+
+def get_index(dataset_path: str, df: pd.DataFrame, cell_deg: float = DEFAULT_CELL_DEG) -> GridIndex:
+    """
+    dataset_path 에 대한 인덱스를 반환.
+    메모리 → 디스크 순으로 찾고, 없거나 데이터보다 오래된 경우 새로 만들어 저장한다.
+    """
+    return get_or_build(dataset_path, INDEX_SUFFIX,
+                        build=lambda: build_and_save_index(dataset_path, df, cell_deg),
+                        load=GridIndex.load,
+                        is_usable=lambda index: index.n_rows == len(df) and index.cell_deg == cell_deg,
+                        label='[INDEX] 공간 인덱스')
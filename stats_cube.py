@@ -0,0 +1,299 @@
+"""
+분석 데이터셋 통계 큐브 모듈
+
+분석 완료 시점에 시군구 × 단지명 × 계약년월 × 면적 구간 셀 단위로 집계해 두고,
+분석 페이지 통계와 지역/단지 drill-down 을 행 스캔 없이 집계 배열에서 계산한다.
+
+- 셀별 건수, 전용면적 합계/건수, 거래금액·전용평당 합계/건수 (더할 수 있는 값)
+- 중앙값/백분위수처럼 더할 수 없는 값은 셀 순서로 정렬한 측정값 배열(셀 안에서는 오름차순)에서 계산
+  셀은 (시군구, 단지명, 계약년월, 면적 구간) 사전순이므로 한 지역/단지의 값은 연속 구간이다.
+  값 배열을 읽어야 하므로 percentiles=True 로 요청한 drill-down 에서만 계산하고,
+  분석 페이지 통계(overview)는 셀별 합계/건수만 써서 큐브마다 한 번 계산해 둔다.
+- 지역/단지 건수의 동률 순서는 value_counts() 와 같도록 데이터셋 내 첫 등장 위치를 함께 저장
+
+큐브는 분석 캐시 파일 옆에 `{이름}.cube.npz` 로 저장된다.
+"""
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from facets import AREA_BUCKETS, AREA_COLUMN
+from sidecar_cache import get_or_build, sidecar_path
+
+CUBE_VERSION = 1
+CUBE_SUFFIX = '.cube.npz'
+
+REGION_COLUMN = '시군구'
+COMPLEX_COLUMN = '단지명'
+MONTH_COLUMN = '계약년월'
+# 큐브 차원 (area_range 는 facets.AREA_BUCKETS 구간 코드)
+DIMENSIONS = ['region', 'complex', 'month', 'area_range']
+# 측정값: 이름 -> 컬럼
+MEASURES = {'price': '거래금액', 'ppp': '전용평당'}
+CUBE_COLUMNS = [REGION_COLUMN, COMPLEX_COLUMN, MONTH_COLUMN, AREA_COLUMN] + list(MEASURES.values())
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _factorize(values: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(코드, 정렬된 라벨, 라벨별 첫 등장 행 위치). 결측은 코드 -1"""
+    codes, labels = pd.factorize(values, sort=True)
+    first_seen = np.full(len(labels), len(values), dtype='int64')
+    valid = codes >= 0
+    np.minimum.at(first_seen, codes[valid], np.flatnonzero(valid))
+    return codes.astype('int32'), np.asarray(labels), first_seen
+
+
+def _area_codes(area: np.ndarray) -> np.ndarray:
+    """면적 구간 코드 (AREA_BUCKETS 순서, 결측은 -1). facets 와 같은 float32 비교"""
+    codes = np.full(len(area), -1, dtype='int32')
+    for i, (_, lower, upper) in enumerate(AREA_BUCKETS):
+        mask = np.isfinite(area)
+        if lower is not None:
+            mask &= area > lower
+        if upper is not None:
+            mask &= area <= upper
+        codes[mask & (codes < 0)] = i
+    return codes
+
+
+class StatsCube:
+    """셀 단위 집계 배열 묶음"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], n_rows: int):
+        self.arrays = arrays
+        self.n_rows = n_rows
+        self._overview: Optional[Dict] = None
+        self.cells = arrays['cells']            # (셀 수, 4) 차원별 코드, 사전순 정렬
+        self.counts = arrays['counts']          # 셀별 행 수
+        self.labels = {
+            'region': arrays['region_labels'],
+            'complex': arrays['complex_labels'],
+            'month': arrays['month_labels'],
+            'area_range': np.array([code for code, _, _ in AREA_BUCKETS]),
+        }
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'StatsCube':
+        n_rows = len(df)
+
+        def column(col, numeric=False):
+            if col not in df.columns:
+                return pd.Series(np.nan if numeric else None, index=df.index, dtype='float32' if numeric else object)
+            return pd.to_numeric(df[col], errors='coerce').astype('float32') if numeric else df[col]
+
+        region, region_labels, region_first = _factorize(column(REGION_COLUMN))
+        complex_, complex_labels, complex_first = _factorize(column(COMPLEX_COLUMN))
+        month, month_labels, _ = _factorize(column(MONTH_COLUMN, numeric=True))
+        area = column(AREA_COLUMN, numeric=True).to_numpy()
+        area_range = _area_codes(area)
+
+        # 행을 셀 순서로 정렬한 뒤 셀 경계 계산
+        keys = np.column_stack([region, complex_, month, area_range])
+        order = np.lexsort((area_range, month, complex_, region))
+        sorted_keys = keys[order]
+        boundary = np.ones(n_rows, dtype=bool)
+        if n_rows:
+            boundary[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+        cell_of_sorted = np.cumsum(boundary) - 1
+        n_cells = int(boundary.sum())
+        cell_of_row = np.empty(n_rows, dtype='int64')
+        cell_of_row[order] = cell_of_sorted
+
+        arrays = {
+            'cells': sorted_keys[boundary].astype('int32').reshape(n_cells, 4),
+            'counts': np.bincount(cell_of_row, minlength=n_cells).astype('int64'),
+            'region_labels': region_labels.astype(str),
+            'region_first': region_first,
+            'complex_labels': complex_labels.astype(str),
+            'complex_first': complex_first,
+            'month_labels': month_labels.astype('float64'),
+        }
+        finite_area = np.isfinite(area)
+        arrays['area_count'] = np.bincount(cell_of_row[finite_area], minlength=n_cells).astype('int64')
+        arrays['area_sum'] = np.bincount(cell_of_row[finite_area], weights=area[finite_area], minlength=n_cells)
+
+        for name, col in MEASURES.items():
+            values = column(col, numeric=True).to_numpy()
+            finite = np.isfinite(values)
+            cells, values = cell_of_row[finite], values[finite]
+            sort = np.lexsort((values, cells))
+            per_cell = np.bincount(cells, minlength=n_cells)
+            arrays[f'{name}_offsets'] = np.concatenate([[0], np.cumsum(per_cell)]).astype('int64')
+            arrays[f'{name}_values'] = values[sort]
+            arrays[f'{name}_sum'] = np.bincount(cells, weights=values, minlength=n_cells)
+        return cls(arrays, n_rows)
+
+    # --- 조회 ---
+
+    def _code(self, dimension: str, label) -> Optional[int]:
+        labels = self.labels[dimension]
+        if dimension == 'month':
+            label = float(label)
+        matches = np.flatnonzero(labels == label)
+        return int(matches[0]) if matches.size else None
+
+    def select(self, region: Optional[str] = None, complex: Optional[str] = None,
+               month_from: Optional[int] = None, month_to: Optional[int] = None,
+               area_range: Optional[str] = None) -> np.ndarray:
+        """조건에 맞는 셀 위치 배열. 없는 라벨을 지정하면 빈 배열"""
+        mask = np.ones(len(self.counts), dtype=bool)
+        for dimension, label in (('region', region), ('complex', complex), ('area_range', area_range)):
+            if label in (None, '', 'all'):
+                continue
+            code = self._code(dimension, label)
+            if code is None:
+                return np.empty(0, dtype='int64')
+            mask &= self.cells[:, DIMENSIONS.index(dimension)] == code
+        if month_from is not None or month_to is not None:
+            months = self.labels['month']
+            month_codes = self.cells[:, DIMENSIONS.index('month')]
+            month_values = np.where(month_codes >= 0, months[np.maximum(month_codes, 0)], np.nan)
+            if month_from is not None:
+                mask &= month_values >= float(month_from)
+            if month_to is not None:
+                mask &= month_values <= float(month_to)
+        return np.flatnonzero(mask)
+
+    def _values(self, name: str, cells: np.ndarray) -> np.ndarray:
+        """선택된 셀들의 측정값 (연속 구간이면 복사 없이 slice)"""
+        offsets = self.arrays[f'{name}_offsets']
+        values = self.arrays[f'{name}_values']
+        if cells.size == 0:
+            return values[:0]
+        if cells[-1] - cells[0] + 1 == cells.size:
+            return values[offsets[cells[0]]:offsets[cells[-1] + 1]]
+        starts, ends = offsets[cells], offsets[cells + 1]
+        lengths = ends - starts
+        index = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+        return values[index]
+
+    def measure_summary(self, name: str, cells: np.ndarray, percentiles: bool = False) -> Dict:
+        """
+        측정값 건수/합계/평균 (셀별 합계/건수로 계산).
+        percentiles=True 면 값 배열에서 최소/최대/백분위수도 계산한다 (아니면 None).
+        """
+        count = int(np.diff(self.arrays[f'{name}_offsets'])[cells].sum()) if cells.size else 0
+        result = {'count': count, 'sum': None, 'mean': None, 'min': None, 'max': None}
+        result.update({f'p{q}': None for q in PERCENTILES})
+        if count == 0:
+            return result
+        total = float(self.arrays[f'{name}_sum'][cells].sum())
+        result.update({'sum': total, 'mean': total / count})
+        if not percentiles:
+            return result
+        values = self._values(name, cells).astype('float64')
+        result.update({'min': float(values.min()), 'max': float(values.max())})
+        for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            result[f'p{q}'] = float(value)
+        return result
+
+    def summary(self, percentiles: bool = False, **filters) -> Dict:
+        """조건에 맞는 거래 건수와 측정값 요약 (filters 는 select() 인자)"""
+        cells = self.select(**filters)
+        area_count = int(self.arrays['area_count'][cells].sum())
+        return {
+            'count': int(self.counts[cells].sum()),
+            'area_avg': float(self.arrays['area_sum'][cells].sum() / area_count) if area_count else None,
+            **{name: self.measure_summary(name, cells, percentiles) for name in MEASURES},
+        }
+
+    def _grouped_counts(self, dimension: str, cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        codes = self.cells[cells, DIMENSIONS.index(dimension)]
+        valid = codes >= 0
+        counts = np.bincount(codes[valid], weights=self.counts[cells][valid],
+                             minlength=len(self.labels[dimension])).astype('int64')
+        return counts, np.flatnonzero(counts)
+
+    def value_counts(self, dimension: str, cells: Optional[np.ndarray] = None) -> Dict:
+        """차원 라벨별 건수 (건수 내림차순, 동률은 데이터셋 첫 등장 순 - value_counts() 와 같은 순서)"""
+        cells = np.arange(len(self.counts)) if cells is None else cells
+        counts, present = self._grouped_counts(dimension, cells)
+        first = self.arrays.get(f'{dimension}_first')
+        tie_break = first[present] if first is not None else present
+        order = present[np.lexsort((tie_break, -counts[present]))]
+        labels = self.labels[dimension]
+        return {_label_value(labels[i]): int(counts[i]) for i in order}
+
+    def breakdown(self, dimension: str, limit: Optional[int] = None, percentiles: bool = False,
+                  **filters) -> List[Dict]:
+        """조건 안에서 dimension 라벨별 건수/평균/중앙값 목록 (건수 내림차순, 중앙값은 percentiles=True 일 때만)"""
+        cells = self.select(**filters)
+        codes = self.cells[cells, DIMENSIONS.index(dimension)]
+        rows = []
+        for label, count in list(self.value_counts(dimension, cells).items())[:limit]:
+            group = cells[codes == self._code(dimension, label)]
+            price = self.measure_summary('price', group, percentiles)
+            ppp = self.measure_summary('ppp', group, percentiles)
+            rows.append({'label': label, 'count': count,
+                         'price_mean': price['mean'], 'price_median': price['p50'],
+                         'ppp_mean': ppp['mean'], 'ppp_median': ppp['p50']})
+        return rows
+
+    def overview(self) -> Dict:
+        """분석 페이지 통계 (data_processing.get_stats 와 같은 키). 합계/건수로 한 번만 계산해 재사용"""
+        if self._overview is None:
+            cells = np.arange(len(self.counts))
+            summary = self.summary()
+            price = summary['price']
+            self._overview = {
+                'total_count': self.n_rows,
+                'area_avg': summary['area_avg'] if summary['area_avg'] is not None else float('nan'),
+                'price_avg': price['mean'] if price['mean'] is not None else float('nan'),
+                'regions': self.value_counts('region', cells),
+                'complexes': self.value_counts('complex', cells),
+            }
+        return self._overview
+
+    # --- 저장 ---
+
+    def save(self, path: str):
+        """npz 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, version=CUBE_VERSION, n_rows=self.n_rows, **self.arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['StatsCube']:
+        """저장된 큐브를 읽는다. 버전이 다르면 None"""
+        with np.load(path) as data:
+            if int(data['version']) != CUBE_VERSION:
+                return None
+            arrays = {name: data[name] for name in data.files if name not in ('version', 'n_rows')}
+            return cls(arrays, int(data['n_rows']))
+
+
+def _label_value(value):
+    """numpy 라벨을 JSON/템플릿용 기본 타입으로 변환 (계약년월은 정수)"""
+    if isinstance(value, np.floating):
+        return int(value) if float(value).is_integer() else float(value)
+    return str(value)
+
+
+def cube_path_for(dataset_path: str) -> str:
+    """분석 캐시 파일에 대응하는 큐브 파일 경로"""
+    return sidecar_path(dataset_path, CUBE_SUFFIX)
+
+
+def build_and_save_cube(dataset_path: str, df: pd.DataFrame) -> StatsCube:
+    """df 로 큐브를 만들고 dataset_path 옆에 저장"""
+    cube = StatsCube.from_dataframe(df)
+    path = cube_path_for(dataset_path)
+    try:
+        cube.save(path)
+        print(f"[CUBE] 통계 큐브 저장: {path} (셀 {len(cube.counts):,}개, {cube.n_rows:,}건)")
+    except OSError as e:
+        print(f"[CUBE] 통계 큐브 저장 실패: {path}, 오류: {e}")
+    return cube
+
+
+def get_cube(dataset_path: str, load: Callable[[], pd.DataFrame]) -> StatsCube:
+    """
+    dataset_path 에 대한 큐브를 반환.
+    메모리 → 디스크 순으로 찾고, 없거나 데이터보다 오래됐으면 load() 로 CUBE_COLUMNS 를 읽어 새로 만든다.
+    """
+    return get_or_build(dataset_path, CUBE_SUFFIX,
+                        build=lambda: build_and_save_cube(dataset_path, load()),
+                        load=StatsCube.load,
+                        label='[CUBE] 통계 큐브')
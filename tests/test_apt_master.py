@@ -0,0 +1,143 @@
+"""
+apt_master_info 일괄 조회 / 단지명 좌표 조인 테스트
+
+Supabase 클라이언트 대신 .table().select().in_().range().execute() 체인을 흉내 내는
+가짜 클라이언트를 주입한다. 가짜 클라이언트는 PostgREST 처럼 in_ 필터와 range(시작, 끝 포함)를 적용한다.
+"""
+from types import SimpleNamespace
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+from postgrest.exceptions import APIError
+
+import data_processing
+import map_utils
+from config import Config
+from data_processing import (APT_MASTER_TABLE, fetch_apt_master_coords, match_with_supabase,
+                             resolve_complex_coordinates)
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.names = None
+        self.start, self.end = 0, None
+
+    def select(self, columns):
+        self.columns = [col.strip() for col in columns.split(',')]
+        return self
+
+    def in_(self, column, values):
+        assert column == 'apt_nm'
+        self.names = list(values)
+        return self
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    def execute(self):
+        self.client.requests.append({'names': self.names, 'range': (self.start, self.end)})
+        if self.table not in self.client.tables:
+            raise APIError({'code': '42P01', 'message': f'relation "public.{self.table}" does not exist'})
+        rows = [row for row in self.client.tables[self.table]
+                if self.names is None or row['apt_nm'] in self.names]
+        rows = rows[self.start:self.end + 1]
+        return SimpleNamespace(data=[{col: row[col] for col in self.columns} for row in rows])
+
+
+class FakeSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+        self.requests = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def _master_row(name, city='서울특별시', la=37.5, lo=127.0):
+    return {'apt_nm': name, 'la': la, 'lo': lo, 'lnno_adres': f'{city} 강남구 삼성동 1'}
+
+
+def test_fetch_splits_names_into_url_sized_in_queries():
+    names = [f'래미안테스트아파트{i:03d}단지' for i in range(60)]
+    client = FakeSupabase({APT_MASTER_TABLE: [_master_row(name) for name in names]})
+    max_chars = 800
+
+    result = fetch_apt_master_coords(client, names, max_url_chars=max_chars)
+
+    assert len(client.requests) > 1
+    for request in client.requests:
+        cost = sum(len(quote(name, safe='')) + 9 for name in request['names'])
+        assert cost <= max_chars
+    # 모든 단지명이 정확히 한 번씩 조회되고 결과에 모두 포함
+    queried = [name for request in client.requests for name in request['names']]
+    assert sorted(queried) == sorted(names)
+    assert sorted(result['apt_nm']) == sorted(names)
+    assert list(result.columns) == data_processing.APT_MASTER_COLUMNS
+
+
+def test_fetch_pages_through_range_until_short_page():
+    rows = [_master_row('반포자이', la=37.0 + i * 1e-6) for i in range(2500)]
+    rows += [_master_row('잠실엘스')]
+    client = FakeSupabase({APT_MASTER_TABLE: rows})
+
+    result = fetch_apt_master_coords(client, ['반포자이', '잠실엘스'], page_size=1000)
+
+    assert [request['range'] for request in client.requests] == [(0, 999), (1000, 1999), (2000, 2999)]
+    assert len(result) == 2501
+    assert result['la'].nunique() == 2501
+
+
+def test_fetch_requests_one_more_page_when_last_page_is_full():
+    client = FakeSupabase({APT_MASTER_TABLE: [_master_row('헬리오시티') for _ in range(2000)]})
+
+    result = fetch_apt_master_coords(client, ['헬리오시티'], page_size=1000)
+
+    assert [request['range'] for request in client.requests] == [(0, 999), (1000, 1999), (2000, 2999)]
+    assert len(result) == 2000
+
+
+def test_resolve_matches_complex_name_and_city():
+    master = pd.DataFrame([
+        _master_row('센트럴파크', '서울특별시', 37.5, 127.0),
+        _master_row('센트럴파크', '인천광역시', 37.4, 126.6),
+        _master_row('좌표없음', '서울특별시', 0, 0),
+    ])
+    missing = pd.DataFrame({
+        '시군구': ['인천광역시 연수구 송도동', '서울특별시 서초구 서초동', None, '부산광역시 해운대구 우동',
+                '서울특별시 강남구 삼성동'],
+        '단지명': ['센트럴파크', '센트럴파크', '센트럴파크', '센트럴파크', '좌표없음'],
+    }, index=[10, 11, 12, 13, 14])
+
+    result = resolve_complex_coordinates(missing, master)
+
+    assert list(result.index) == [10, 11, 12, 13, 14]
+    np.testing.assert_allclose(result['위도'].to_numpy(), [37.4, 37.5, 37.5, np.nan, np.nan])
+    np.testing.assert_allclose(result['경도'].to_numpy(), [126.6, 127.0, 127.0, np.nan, np.nan])
+
+
+def test_missing_table_falls_back_to_district_center(monkeypatch, tmp_path):
+    client = FakeSupabase({})
+    monkeypatch.setattr(Config, 'APT_MASTER_SNAPSHOT_PATH', str(tmp_path / 'missing.parquet'))
+    district_center = {'서울특별시 서초구 서초동': (37.49, 127.01)}
+
+    def fake_geocode(addresses, progress_callback=None):
+        # 번지 주소는 찾지 못하고 시군구 중심 좌표만 찾는 상황
+        return {address: district_center.get(address, (None, None)) for address in addresses}
+
+    monkeypatch.setattr(map_utils, 'geocode_addresses_concurrently', fake_geocode)
+    df = pd.DataFrame({
+        '시군구': ['서울특별시 서초구 서초동', '서울특별시 서초구 서초동'],
+        '번지': ['1332-13', '1685'],
+        '단지명': ['래미안서초에스티지', '서초그랑자이'],
+    })
+
+    result = match_with_supabase(df, client)
+
+    # 단지명 조회는 테이블이 없어 실패했지만 3단계 시군구 중심 좌표로 채워진다
+    assert client.requests and all(request['names'] for request in client.requests)
+    assert result['위도'].tolist() == [37.49, 37.49]
+    assert result['경도'].tolist() == [127.01, 127.01]
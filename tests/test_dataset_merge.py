@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from dataset_merge import known_location_table, merge_datasets, select_new_rows
+from dataset_store import coerce_analyzed_dtypes
+from facets import FacetIndex, extend_and_save_facets, facets_path_for
+from spatial_index import GridIndex, extend_and_save_index, index_path_for
+
+
+def _rows(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        '시군구': rng.choice(['서울특별시 서초구 서초동', '서울특별시 강남구 역삼동', '경기도 성남시 분당구 정자동'], n),
+        '번지': rng.integers(1, 400, n).astype(str),
+        '단지명': rng.choice(['래미안', '자이', '힐스테이트'], n),
+        '전용면적(㎡)': rng.choice([59.97, 84.99, 114.8, 135.0], n),
+        '계약년월': rng.choice([202503, 202504, 202505], n).astype(float),
+        '거래금액': rng.integers(50000, 300000, n).astype(float),
+        '층': rng.integers(-1, 30, n).astype(float),
+        '건축년도': rng.integers(1990, 2025, n).astype(float),
+        '위도': rng.uniform(37.40, 37.60, n),
+        '경도': rng.uniform(126.90, 127.15, n),
+    })
+
+
+def test_select_new_rows_ignores_storage_types_and_duplicates():
+    existing = coerce_analyzed_dtypes(_rows(200, 0))
+    # 새 업로드(CSV 에서 읽은 float64 / 앞뒤 공백) 에 기존 거래 50건과 자체 중복 10건 포함
+    repeated = existing.iloc[:50].astype({'전용면적(㎡)': 'float64', '거래금액': 'float64'})
+    repeated['단지명'] = ' ' + repeated['단지명'] + ' '
+    fresh = _rows(80, 1)
+    incoming = pd.concat([repeated, fresh, fresh.iloc[:10]], ignore_index=True)
+
+    new_rows = select_new_rows(existing, incoming)
+    assert new_rows.index.tolist() == list(range(50, 130))
+
+
+def test_merge_appends_new_rows_in_storage_schema():
+    existing = coerce_analyzed_dtypes(_rows(30, 2))
+    new_rows = _rows(5, 3).drop(columns=['층'])
+    merged = merge_datasets(existing, new_rows)
+    assert list(merged.columns) == list(existing.columns)
+    assert merged.dtypes.equals(existing.dtypes)
+    pd.testing.assert_frame_equal(merged.iloc[:30], existing)
+    assert merged['층'].iloc[30:].isna().all()
+
+
+def test_known_location_table_uses_canonical_keys():
+    existing = pd.DataFrame({'시군구': ['서울 서초구 서초동', '서울특별시 서초구 서초동'], '번지': ['0012', '12'],
+                             '위도': [37.5, 37.6], '경도': [127.0, 127.1]})
+    table = known_location_table(existing)
+    assert table.index.tolist() == ['서울특별시 서초구 서초동 12']
+    assert table.loc['서울특별시 서초구 서초동 12'].tolist() == [37.5, 127.0]
+
+
+def test_incremental_sidecars_match_full_rebuild(tmp_path):
+    existing = coerce_analyzed_dtypes(_rows(400, 4))
+    new_rows = select_new_rows(existing, _rows(120, 5))
+    merged = merge_datasets(existing, new_rows)
+    path = str(tmp_path / 'merged_분석완료.parquet')
+
+    index = extend_and_save_index(path, GridIndex.from_dataframe(existing), new_rows, merged)
+    full_index = GridIndex.from_dataframe(merged)
+    for saved in (index, GridIndex.load(index_path_for(path))):
+        for name in ('order', 'cell_ids', 'starts'):
+            np.testing.assert_array_equal(getattr(saved, name), getattr(full_index, name))
+        assert saved.n_rows == full_index.n_rows
+
+    facets = extend_and_save_facets(path, FacetIndex.from_dataframe(existing), new_rows, merged)
+    full_facets = FacetIndex.from_dataframe(merged)
+    for saved in (facets, FacetIndex.load(facets_path_for(path))):
+        assert saved.n_rows == full_facets.n_rows
+        assert saved.counts() == full_facets.counts()
+        for facet, buckets in full_facets.bitmaps.items():
+            for code, bitmap in buckets.items():
+                np.testing.assert_array_equal(saved.bitmaps[facet][code], bitmap)
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from facets import AREA_BUCKETS, BUILD_YEAR_BUCKETS, FacetIndex
+
+YEAR = datetime.now().year
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    n = 500
+    area = rng.choice([59.99, 60.0, 60.01, 84.99, 85.0, 102.0, 134.97, 135.0, 135.01], n) + rng.normal(0, 5, n)
+    area[rng.random(n) < 0.05] = np.nan
+    year = rng.integers(YEAR - 30, YEAR + 1, n).astype(object)
+    year[rng.random(n) < 0.05] = None
+    year[rng.random(n) < 0.02] = '미상'
+    # 분석 캐시와 같은 저장 타입 (전용면적 float32, 건축년도는 문자열이 섞일 수 있음)
+    return pd.DataFrame({'전용면적(㎡)': area.astype('float32'), '건축년도': year})
+
+
+def _area_filter(df, code):
+    """구간 비트맵으로 바꾸기 전 /results 의 전용면적 비교식"""
+    area = df['전용면적(㎡)']
+    return {
+        'le60': area <= 60,
+        'gt60le85': (area > 60) & (area <= 85),
+        'gt85le102': (area > 85) & (area <= 102),
+        'gt102le135': (area > 102) & (area <= 135),
+        'gt135': area > 135,
+    }[code].to_numpy()
+
+
+def _build_year_filter(df, code):
+    """구간 비트맵으로 바꾸기 전 /results 의 건축년도 비교식 (결측/숫자가 아닌 값 제외)"""
+    year = pd.to_numeric(df['건축년도'], errors='coerce')
+    return {
+        'recent5': year >= YEAR - 5,
+        'recent10': year >= YEAR - 10,
+        'recent15': year >= YEAR - 15,
+        'over15': year < YEAR - 15,
+    }[code].to_numpy()
+
+
+@pytest.mark.parametrize('code', [code for code, _, _ in AREA_BUCKETS])
+def test_area_mask_matches_comparison_filter(code):
+    df = _frame()
+    mask = FacetIndex.from_dataframe(df).mask({'area_range': code, 'build_year': 'all'})
+    np.testing.assert_array_equal(mask, _area_filter(df, code))
+
+
+@pytest.mark.parametrize('code', [code for code, _, _ in BUILD_YEAR_BUCKETS])
+def test_build_year_mask_matches_comparison_filter(code):
+    df = _frame()
+    mask = FacetIndex.from_dataframe(df).mask({'area_range': 'all', 'build_year': code})
+    np.testing.assert_array_equal(mask, _build_year_filter(df, code))
+
+
+def test_combined_mask_is_intersection():
+    df = _frame()
+    mask = FacetIndex.from_dataframe(df).mask({'area_range': 'gt60le85', 'build_year': 'recent10'})
+    np.testing.assert_array_equal(mask, _area_filter(df, 'gt60le85') & _build_year_filter(df, 'recent10'))
+
+
+def test_all_selects_no_filter():
+    assert FacetIndex.from_dataframe(_frame()).mask({'area_range': 'all', 'build_year': 'all'}) is None
+
+
+def test_unknown_code_matches_nothing():
+    df = _frame()
+    facets = FacetIndex.from_dataframe(df)
+    for selections in ({'area_range': 'gt999'}, {'area_range': 'le60', 'build_year': 'recent99'}):
+        mask = facets.mask(selections)
+        assert mask.shape == (len(df),)
+        assert not mask.any()
+
+
+def test_missing_column_is_not_filtered():
+    df = _frame().drop(columns=['건축년도'])
+    mask = FacetIndex.from_dataframe(df).mask({'area_range': 'le60', 'build_year': 'recent5'})
+    np.testing.assert_array_equal(mask, _area_filter(df, 'le60'))
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from geopy.distance import geodesic
+
+from geo_utils import distance_km, filter_by_radius
+
+# 수도권 ~ 제주 범위의 중심점 / 좌표 (같은 점, 짧은 거리, 수백 km 포함)
+CENTER = (37.4979, 127.0276)
+rng = np.random.default_rng(0)
+LAT = np.concatenate([[CENTER[0], 37.4980, 33.4996], rng.uniform(33.0, 38.6, 200)])
+LON = np.concatenate([[CENTER[1], 127.0277, 126.5312], rng.uniform(124.6, 131.9, 200)])
+EXPECTED = np.array([geodesic(CENTER, (lat, lon)).km for lat, lon in zip(LAT, LON)])
+
+# 허용 오차: vincenty 는 geopy(Karney) 와 1mm, haversine 은 구면 근사 오차 0.5%
+VINCENTY_TOLERANCE_KM = 1e-6
+HAVERSINE_RELATIVE_TOLERANCE = 0.005
+
+
+def test_vincenty_matches_geopy_geodesic():
+    dist = distance_km(LAT, LON, *CENTER, method='vincenty')
+    np.testing.assert_allclose(dist, EXPECTED, rtol=0, atol=VINCENTY_TOLERANCE_KM)
+
+
+def test_haversine_within_spherical_error_of_geopy():
+    dist = distance_km(LAT, LON, *CENTER, method='haversine')
+    np.testing.assert_allclose(dist, EXPECTED, rtol=HAVERSINE_RELATIVE_TOLERANCE, atol=1e-9)
+
+
+def test_default_vincenty_radius_filter_matches_geopy_at_boundary():
+    # 반경 경계(±1m) 양쪽 좌표의 포함 여부가 geopy 와 같아야 한다
+    radius_km = 3.0
+    bearings = np.linspace(0, 360, 16, endpoint=False)
+    points = [geodesic(kilometers=radius_km + delta).destination(CENTER, bearing)
+              for bearing in bearings for delta in (-0.001, 0.001)]
+    df = pd.DataFrame({'위도': [p.latitude for p in points], '경도': [p.longitude for p in points]})
+    inside = filter_by_radius(df, *CENTER, radius_km, method='vincenty')
+    expected = [i for i, p in enumerate(points) if geodesic(CENTER, (p.latitude, p.longitude)).km <= radius_km]
+    assert sorted(inside.index.tolist()) == expected
@@ -0,0 +1,25 @@
+import sqlite3
+import time
+
+import map_utils
+from geocode_store import GeocodeStore
+
+
+def test_configure_purges_expired_negative_results(tmp_path, monkeypatch):
+    path = str(tmp_path / 'geocode.sqlite3')
+    store = GeocodeStore(path, negative_ttl=60)
+    store.put_many([('서울특별시 서초구 서초동 1', 37.5, 127.0),
+                    ('서울특별시 서초구 서초동 2', None, None),
+                    ('서울특별시 서초구 서초동 3', None, None)])
+    with sqlite3.connect(path) as conn:
+        # 찾은 좌표 1건과 좌표 없음 1건을 TTL 보다 오래된 것으로 만든다
+        conn.execute('UPDATE geocode SET updated_at = ? WHERE address IN (?, ?)',
+                     (time.time() - 3600, '서울특별시 서초구 서초동 1', '서울특별시 서초구 서초동 2'))
+
+    monkeypatch.setattr(map_utils, '_store', None)
+    configured = map_utils.configure_geocode_store(path, negative_ttl=60)
+    assert map_utils.get_geocode_store() is configured
+    assert configured.get('서울특별시 서초구 서초동 1') == (37.5, 127.0)
+    assert configured.get('서울특별시 서초구 서초동 3') == (None, None)
+    stats = configured.stats()
+    assert (stats['size'], stats['found'], stats['expired_not_found']) == (2, 1, 0)
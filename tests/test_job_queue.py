@@ -0,0 +1,50 @@
+import os
+import sqlite3
+
+import job_queue
+from job_queue import JobStore
+
+
+def _status(path, job_id):
+    with sqlite3.connect(path) as conn:
+        return conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+
+
+def test_restart_with_same_pid_fails_unfinished_jobs(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    before = JobStore(path)
+    before.create('queued-job', 'upload', [('파싱', 1.0)])
+    before.create('running-job', 'upload', [('파싱', 1.0)])
+    before.start('running-job')
+
+    # 재시작한 서버가 같은 pid 를 받은 경우 (컨테이너의 pid 1)
+    after = JobStore(path)
+    assert after.fail_orphaned('서버 재시작') == 2
+    assert _status(path, 'queued-job') == 'failed'
+    assert _status(path, 'running-job') == 'failed'
+
+
+def test_own_and_live_worker_jobs_are_kept(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    store = JobStore(path)
+    store.create('own-job', 'upload', [('파싱', 1.0)])
+    # 살아 있는 다른 워커(부모 프로세스)가 등록한 작업
+    store.create('other-job', 'upload', [('파싱', 1.0)])
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE jobs SET pid = ?, runner = 'other' WHERE id = 'other-job'", (os.getppid(),))
+
+    assert store.fail_orphaned('서버 재시작') == 0
+    assert _status(path, 'own-job') == 'queued'
+    assert _status(path, 'other-job') == 'queued'
+
+
+def test_configure_fails_jobs_left_by_previous_runner(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    JobStore(path).create('stale-job', 'upload', [('파싱', 1.0)])
+    job_queue.configure(path, max_workers=1)
+    try:
+        job = job_queue.get_job('stale-job')
+        assert job['status'] == 'failed'
+        assert job['error'] == '서버 재시작으로 작업이 중단되었습니다.'
+    finally:
+        job_queue._get_runner().shutdown()
@@ -0,0 +1,53 @@
+import datetime as real_datetime
+
+import pandas as pd
+
+import query_engine
+from query_engine import QueryEngine, query_etag
+
+FILTER = {'lat': 37.5, 'lon': 127.0, 'radius': 5, 'area_range': 'all', 'build_year': 'all'}
+
+
+def _dataset(tmp_path):
+    df = pd.DataFrame({
+        '위도': [37.50, 37.51, 37.55, 37.60],
+        '경도': [127.00, 127.01, 127.03, 127.10],
+        '전용면적(㎡)': [59.9, 84.9, 101.2, 134.5],
+        '건축년도': [2001, 2015, 2020, 1995],
+    })
+    path = str(tmp_path / 'abc_분석완료.parquet')
+    df.to_parquet(path)
+    return path, df
+
+
+def _no_geocode(address):
+    raise AssertionError('좌표가 주어진 필터는 지오코딩하지 않는다')
+
+
+def test_cache_key_includes_result_settings(tmp_path, monkeypatch):
+    path, df = _dataset(tmp_path)
+    engine = QueryEngine()
+
+    first = engine.run(path, df, FILTER, _no_geocode, method='haversine')
+    assert engine.run(path, df, FILTER, _no_geocode, method='haversine') is first
+    assert engine.run(path, df, FILTER, _no_geocode, method='vincenty') is not first
+    assert engine.run(path, df, FILTER, _no_geocode, method='haversine', cell_deg=0.05) is not first
+    assert engine.info()['misses'] == 3
+
+    # 해가 바뀌면 건축년도 구간 기준연도가 달라지므로 다시 계산
+    class NextYear(real_datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return real_datetime.datetime(real_datetime.datetime.now().year + 1, 1, 1)
+
+    monkeypatch.setattr(query_engine, 'datetime', NextYear)
+    assert engine.run(path, df, FILTER, _no_geocode, method='haversine') is not first
+    assert engine.info()['misses'] == 4
+
+
+def test_etag_changes_with_result_settings(tmp_path):
+    path, _ = _dataset(tmp_path)
+    base = query_etag(path, FILTER, 'json', method='haversine')
+    assert query_etag(path, FILTER, 'json', method='haversine') == base
+    assert query_etag(path, FILTER, 'json', method='vincenty') != base
+    assert query_etag(path, FILTER, 'json', method='haversine', cell_deg=0.05) != base
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from data_processing import clean_for_json
+from result_formatter import format_records
+
+
+def _original_results_loop(data_records, columns):
+    """컬럼 단위 변환 전 /results 의 셀 단위 포맷 루프 (비교 기준)"""
+    def format_number(val):
+        try:
+            if val is None or val == '' or (isinstance(val, float) and pd.isna(val)):
+                return ''
+            if isinstance(val, (int, float)):
+                return '{:,}'.format(int(val))
+            if isinstance(val, str) and val.replace(',', '').replace('.', '', 1).isdigit():
+                return '{:,}'.format(int(float(val)))
+            return val
+        except Exception:
+            return val
+
+    for row in data_records:
+        for col in columns:
+            if ('금액' in col or '보증금' in col or '월세' in col) and col in row and (isinstance(row[col], (int, float)) or (isinstance(row[col], str) and str(row[col]).replace(',', '').replace('.', '', 1).isdigit())):
+                row[col] = format_number(row[col])
+            elif col in ('계약년월', '층', '건축년도') and col in row and row[col] is not None and row[col] != '':
+                try:
+                    row[col] = str(int(float(row[col])))
+                except Exception:
+                    pass
+            elif col in ('전용면적(㎡)', '전용평') and col in row and row[col] is not None and row[col] != '':
+                try:
+                    row[col] = f"{float(row[col]):.2f}"
+                except Exception:
+                    pass
+            elif col in ('전용평당', '공급평당') and col in row and row[col] is not None and row[col] != '':
+                try:
+                    row[col] = f"{float(row[col]):,.2f}"
+                except Exception:
+                    pass
+    return clean_for_json(data_records)
+
+
+def _page():
+    return pd.DataFrame({
+        '시군구': ['서울특별시 서초구 서초동', None, '경기도 성남시 분당구 정자동', np.nan, '인천광역시 연수구 송도동'],
+        '거래금액': [125000.0, np.nan, 0.0, 98765.4, np.inf],
+        '보증금': pd.array([0, 5000, None, 120000, 7], dtype='Int64'),
+        '월세': ['1,200', 'abc', '', None, '35.5'],          # 문자열로 저장된 숫자
+        '계약년월': [202506.0, 202412.0, np.nan, 202501.0, 202307.0],
+        '전용면적(㎡)': [84.97, 59.991, np.nan, 0.0, 134.5],
+        '전용평': [25.7, np.nan, 18.15, 0.0, 40.69],
+        '층': [0.0, -1.0, 0.4, np.nan, 15.0],                # 0층/지하층, 0 으로 버림되는 값
+        '건축년도': ['2016', '1999.0', None, '', '미상'],
+        '전용평당': [4863.2, np.nan, 0.0, -1.5, 12345.678],
+        '공급평당': [3649.91, 1000.0, np.nan, np.inf, 0.0],
+        '도로명': ['서운로 107', '', None, '정자일로 95', np.nan],
+        '중심점과의거리': [0.12, 1.5, np.nan, 3.0, 4.9],     # columns 에 없는 컬럼은 결측만 '' 처리
+    })
+
+
+def test_format_records_matches_original_loop():
+    page = _page()
+    columns = [col for col in page.columns if col != '중심점과의거리'] + ['없는컬럼']
+    expected = _original_results_loop(page.to_dict(orient='records'), columns)
+    assert format_records(page, columns) == expected
+
+
+def test_format_records_with_subset_of_columns():
+    page = _page()
+    columns = ['거래금액', '층', '전용평당']
+    expected = _original_results_loop(page.to_dict(orient='records'), columns)
+    assert format_records(page, columns) == expected
+
+
+def test_format_records_empty_page():
+    page = _page().iloc[:0]
+    assert format_records(page, list(page.columns)) == []
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geo_utils import bounding_box, distance_km
+from spatial_index import GridIndex, DEFAULT_CELL_DEG, build_and_save_index, extend_and_save_index
+
+CELL = DEFAULT_CELL_DEG
+
+
+def _edge_coords(n, seed, lat_range=(37.40, 37.70), lon_range=(126.80, 127.20)):
+    """격자 경계 바로 위/아래(±1e-9도)와 정확히 경계인 좌표가 섞인 위경도, 일부는 결측"""
+    rng = np.random.default_rng(seed)
+    lat = np.round(rng.uniform(*lat_range, n) / CELL) * CELL + rng.choice([-1e-9, 0.0, 1e-9], n)
+    lon = np.round(rng.uniform(*lon_range, n) / CELL) * CELL + rng.choice([-1e-9, 0.0, 1e-9], n)
+    inner = rng.random(n) < 0.3
+    lat[inner] += rng.uniform(0, CELL, inner.sum())
+    lon[inner] += rng.uniform(0, CELL, inner.sum())
+    lat[rng.random(n) < 0.03] = np.nan
+    return lat, lon
+
+
+def _assert_same(actual: GridIndex, expected: GridIndex):
+    np.testing.assert_array_equal(actual.order, expected.order)
+    np.testing.assert_array_equal(actual.cell_ids, expected.cell_ids)
+    np.testing.assert_array_equal(actual.starts, expected.starts)
+    assert (actual.lat0, actual.lon0, actual.cell_deg, actual.n_cols, actual.n_rows) == \
+           (expected.lat0, expected.lon0, expected.cell_deg, expected.n_cols, expected.n_rows)
+
+
+def test_extend_matches_full_build():
+    lat, lon = _edge_coords(3000, 0)
+    # 새 행은 기존 격자 범위 안 (원점/열 수가 바뀌지 않는 경우)
+    new_lat, new_lon = _edge_coords(700, 1, lat_range=(37.45, 37.65), lon_range=(126.85, 127.15))
+    base = GridIndex.build(lat, lon)
+    extended = base.extend(new_lat, new_lon)
+    assert extended is not None
+    _assert_same(extended, GridIndex.build(np.concatenate([lat, new_lat]), np.concatenate([lon, new_lon])))
+
+
+def test_extend_without_coordinates_only_adds_rows():
+    lat, lon = _edge_coords(100, 2)
+    extended = GridIndex.build(lat, lon).extend(np.full(5, np.nan), np.full(5, np.nan))
+    _assert_same(extended, GridIndex.build(np.concatenate([lat, np.full(5, np.nan)]),
+                                           np.concatenate([lon, np.full(5, np.nan)])))
+
+
+@pytest.mark.parametrize('new_lat, new_lon', [
+    ([37.0], [127.0]),    # 원점보다 아래
+    ([37.5], [126.0]),    # 원점보다 왼쪽
+    ([37.5], [128.0]),    # 열 범위 밖
+])
+def test_extend_outside_grid_needs_rebuild(new_lat, new_lon):
+    lat, lon = _edge_coords(200, 3)
+    assert GridIndex.build(lat, lon).extend(np.array(new_lat), np.array(new_lon)) is None
+
+
+def test_extend_and_save_falls_back_to_full_build(tmp_path):
+    lat, lon = _edge_coords(300, 4)
+    existing = pd.DataFrame({'위도': lat, '경도': lon})
+    new_rows = pd.DataFrame({'위도': [36.9, 37.5], '경도': [127.0, 127.5]})
+    merged = pd.concat([existing, new_rows], ignore_index=True)
+    path = str(tmp_path / 'abc_분석완료.parquet')
+    index = extend_and_save_index(path, GridIndex.from_dataframe(existing), new_rows, merged)
+    _assert_same(index, GridIndex.from_dataframe(merged))
+    _assert_same(GridIndex.load(str(tmp_path / 'abc_분석완료.grid.npz')), index)
+
+
+def test_rounding_at_grid_origin_is_clamped():
+    # 124.13 / 0.01 은 13413.0 으로 반올림되어 원점(13413 * 0.01)이 좌표보다 커진다 (열 -1)
+    lat = np.array([37.5, 37.6, 37.55])
+    lon = np.array([124.13, 124.5, 124.3])
+    assert np.floor((lon[0] - np.floor(lon[0] / CELL) * CELL) / CELL) == -1
+    index = GridIndex.build(lat, lon)
+    assert index.cell_ids.min() >= 0
+    assert 0 in index.candidates(bounding_box(37.5, 124.13, 0.1))
+
+    extended = index.extend(np.array([37.52]), np.array([124.13]))
+    _assert_same(extended, GridIndex.build(np.append(lat, 37.52), np.append(lon, 124.13)))
+    assert 3 in extended.candidates(bounding_box(37.52, 124.13, 0.1))
+
+
+@pytest.mark.parametrize('method', ['haversine', 'vincenty'])
+def test_candidates_contain_all_radius_matches_near_cell_edges(method):
+    lat, lon = _edge_coords(5000, 5)
+    index = GridIndex.build(lat, lon)
+    rng = np.random.default_rng(6)
+    centers = np.column_stack([np.round(rng.uniform(37.42, 37.68, 40) / CELL) * CELL,
+                               np.round(rng.uniform(126.82, 127.18, 40) / CELL) * CELL])
+    for (center_lat, center_lon), radius_km in zip(centers, rng.choice([0.3, 1.0, 2.5, 5.0], 40)):
+        dist = distance_km(lat, lon, center_lat, center_lon, method=method)
+        exact = np.flatnonzero(dist <= radius_km)
+        candidates = index.candidates(bounding_box(center_lat, center_lon, radius_km))
+        assert np.isin(exact, candidates).all()
+        assert np.all(np.diff(candidates) > 0)
+
+
+def test_build_and_save_roundtrip(tmp_path):
+    lat, lon = _edge_coords(500, 7)
+    df = pd.DataFrame({'위도': lat, '경도': lon})
+    path = str(tmp_path / 'abc_분석완료.parquet')
+    index = build_and_save_index(path, df)
+    _assert_same(GridIndex.load(str(tmp_path / 'abc_분석완료.grid.npz')), index)
@@ -0,0 +1,102 @@
+"""
+업로드 파일 저장 + 스트리밍 해시 모듈
+
+요청 스트림을 UPLOAD_FOLDER 에 chunk 단위로 쓰면서 동시에 해시를 갱신하므로
+저장 후 파일을 다시 읽거나 파일 전체를 메모리에 올리지 않는다 (메모리 사용량은 chunk 크기).
+해시는 분석 캐시 키(`{hash}_분석완료.parquet`)와 저장 파일 이름(`{hash}_{원본 이름}`)으로만 쓰이므로
+암호학적 강도가 필요 없다. 같은 이름의 파일이 동시에 올라와도 임시 파일과 저장 파일이 겹치지 않는다.
+
+지원 알고리즘 (Config.UPLOAD_HASH_ALGORITHM)
+- 'blake2b' : hashlib 내장, 16바이트 digest (기본값)
+- 'xxhash'  : xxhash 패키지의 xxh3_128 (설치되어 있지 않으면 blake2b 사용)
+- 'md5'     : 기존 캐시 키와 호환
+"""
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Tuple
+
+DEFAULT_ALGORITHM = 'blake2b'
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+_xxhash_warned = False
+
+
+def new_hasher(algorithm: str = DEFAULT_ALGORITHM):
+    """알고리즘 이름에 해당하는 해시 객체 (update / hexdigest 지원)"""
+    global _xxhash_warned
+    if algorithm == 'xxhash':
+        if xxhash is not None:
+            return xxhash.xxh3_128()
+        if not _xxhash_warned:
+            print("[UPLOAD] xxhash 패키지가 없어 blake2b 로 해시를 계산합니다.")
+            _xxhash_warned = True
+        algorithm = 'blake2b'
+    if algorithm == 'blake2b':
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == 'md5':
+        return hashlib.md5()
+    raise ValueError(f"지원하지 않는 해시 알고리즘입니다: {algorithm}")
+
+
+def _save_to_temp(stream: BinaryIO, directory: str, algorithm: str, chunk_size: int) -> Tuple[str, str, int]:
+    """stream 을 directory 의 고유한 임시 파일에 저장하면서 해시를 계산. (임시 파일 경로, 해시 hex, 바이트 수)"""
+    hasher = new_hasher(algorithm)
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=directory, prefix='upload_', suffix='.part', delete=False) as out:
+        try:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                hasher.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    return out.name, hasher.hexdigest(), size
+
+
+def _replace(tmp_path: str, path: str):
+    try:
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_stream(stream: BinaryIO, path: str, algorithm: str = DEFAULT_ALGORITHM,
+                chunk_size: int = HASH_CHUNK_SIZE) -> Tuple[str, int]:
+    """
+    stream 을 path 에 저장하면서 해시를 계산. (해시 hex, 바이트 수) 반환.
+    같은 폴더의 고유한 임시 파일에 쓴 뒤 교체하므로 중간에 실패해도 불완전한 파일이 남지 않는다.
+    """
+    tmp_path, digest, size = _save_to_temp(stream, os.path.dirname(os.path.abspath(path)), algorithm, chunk_size)
+    _replace(tmp_path, path)
+    return digest, size
+
+
+def save_upload(stream: BinaryIO, directory: str, filename: str, algorithm: str = DEFAULT_ALGORITHM,
+                chunk_size: int = HASH_CHUNK_SIZE) -> Tuple[str, str, int]:
+    """
+    업로드 스트림을 directory/{해시}_{filename} 으로 저장. (저장 경로, 해시 hex, 바이트 수) 반환.
+    내용이 다른 같은 이름의 업로드는 다른 파일이 되므로 대기/실행 중인 작업이 읽는 파일을 덮어쓰지 않는다.
+    같은 내용이면 같은 경로로 교체되지만 이미 열려 있는 파일에는 영향이 없다.
+    """
+    tmp_path, digest, size = _save_to_temp(stream, directory, algorithm, chunk_size)
+    path = os.path.join(directory, f"{digest}_{filename}")
+    _replace(tmp_path, path)
+    return path, digest, size
+
+
+def file_hash(path: str, algorithm: str = DEFAULT_ALGORITHM, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """이미 저장된 파일의 해시를 chunk 단위로 계산"""
+    hasher = new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()